@@ -1,9 +1,10 @@
 # ocr_tool_qt/app/widgets/file_list.py
 
-from PyQt5.QtWidgets import QListWidget, QListWidgetItem
-from PyQt5.QtCore import Qt, QSize, pyqtSignal
-from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+from PyQt5.QtCore import Qt, QSize, QPoint, QObject, QRunnable, QThreadPool, QTimer, QAbstractListModel, QModelIndex, pyqtSignal
+from PyQt5.QtGui import QIcon, QPixmap
 import os
+from collections.abc import Sequence
 
 try:
     import fitz # PyMuPDF
@@ -11,26 +12,346 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
+from core.path_index import PathIndex
+from utils.logger import log
 
-class FileList(QListWidget):
+
+class _ThumbnailSignals(QObject):
+    """Shared state and signal of the thumbnail tasks of one FileList."""
+    thumbnail_ready = pyqtSignal(str, bytes)  # path, PNG bytes (empty on failure)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.wanted = set()     # Paths of the rows on screen, replaced by the GUI thread
+        self.requested = set()  # Paths queued or being rendered
+
+
+class _ThumbnailTask(QRunnable):
+    """Loads or renders one thumbnail on the thread pool."""
+    def __init__(self, path, thumbnail_cache, signals):
+        super().__init__()
+        self.path = path
+        self.thumbnail_cache = thumbnail_cache
+        self.signals = signals
+
+    def run(self):
+        if self.path not in self.signals.wanted:
+            # Scrolled out of view before the task started
+            self.signals.requested.discard(self.path)
+            return
+        try:
+            data = self.thumbnail_cache.get_or_create(self.path)
+        except Exception as e:
+            log.warning(f"Thumbnail failed for {self.path}: {e}")
+            data = None
+        self.signals.thumbnail_ready.emit(self.path, data or b'')
+
+
+class FileListModel(QAbstractListModel):
+    """
+    A list model over a PathIndex: one row per imported file, looked up by
+    path in O(1). Icons and other per-file roles (e.g. a status colour set
+    while processing) are kept in dicts keyed by path rather than in items.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path_index = PathIndex()
+        self._role_data = {}  # path -> {role: value}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.path_index)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.path_index):
+            return None
+        path = self.path_index[index.row()]
+        if role == Qt.DisplayRole:
+            return os.path.basename(path)
+        if role == Qt.UserRole:
+            return path  # Full path
+        if role == Qt.ToolTipRole and role not in self._role_data.get(path, ()):
+            return path
+        return self._role_data.get(path, {}).get(role)
+
+    def index_for_path(self, path):
+        """Returns the model index of a path; invalid if it is not in the list."""
+        row = self.path_index.row(path)
+        return self.index(row, 0) if row >= 0 else QModelIndex()
+
+    def add_paths(self, paths):
+        """Appends the paths not in the list yet with a single row insertion; returns them."""
+        new_paths = [path for path in dict.fromkeys(paths) if path not in self.path_index]
+        if not new_paths:
+            return []
+        first = len(self.path_index)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_paths) - 1)
+        self.path_index.extend(new_paths)
+        self.endInsertRows()
+        return new_paths
+
+    def remove_path(self, path):
+        return self.remove_paths([path]) == 1
+
+    def remove_paths(self, paths):
+        """
+        Removes several paths, one row removal per run of adjacent rows (from
+        the bottom up, so the rows above stay put); returns how many were
+        present. The selection and scroll position are kept, unlike with a
+        model reset.
+        """
+        rows = sorted({row for row in map(self.path_index.row, paths) if row >= 0}, reverse=True)
+        runs = []  # (first, last), bottom run first
+        for row in rows:
+            if runs and runs[-1][0] == row + 1:
+                runs[-1] = (row, runs[-1][1])
+            else:
+                runs.append((row, row))
+        for first, last in runs:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for path in self.path_index.remove_range(first, last):
+                self._role_data.pop(path, None)
+            self.endRemoveRows()
+        return len(rows)
+
+    def set_path_data(self, path, role, value):
+        """Sets a role (e.g. Qt.DecorationRole or Qt.ForegroundRole) for a path's row."""
+        row = self.path_index.row(path)
+        if row < 0:
+            return False
+        self._role_data.setdefault(path, {})[role] = value
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def clear(self):
+        self.beginResetModel()
+        self.path_index.clear()
+        self._role_data.clear()
+        self.endResetModel()
+
+
+class FileListItem:
+    """
+    A handle on one row of a FileList with the QListWidgetItem methods
+    callers of the former QListWidget-based FileList use. It refers to its
+    row by path, so it stays valid while other rows come and go; setters
+    store the role in the model.
+    """
+    def __init__(self, file_model, path):
+        self._model = file_model
+        self._path = path
+
+    def __eq__(self, other):
+        return isinstance(other, FileListItem) and (self._model, self._path) == (other._model, other._path)
+
+    def __hash__(self):
+        return hash(self._path)
+
+    def data(self, role):
+        if role == Qt.UserRole:
+            return self._path
+        return self._model.data(self._model.index_for_path(self._path), role)
+
+    def setData(self, role, value):
+        self._model.set_path_data(self._path, role, value)
+
+    def text(self):
+        return os.path.basename(self._path)
+
+    def toolTip(self):
+        return self.data(Qt.ToolTipRole)
+
+    def setToolTip(self, tooltip):
+        self.setData(Qt.ToolTipRole, tooltip)
+
+    def icon(self):
+        return self.data(Qt.DecorationRole) or QIcon()
+
+    def setIcon(self, icon):
+        self.setData(Qt.DecorationRole, icon)
+
+    def foreground(self):
+        return self.data(Qt.ForegroundRole)
+
+    def setForeground(self, brush):
+        self.setData(Qt.ForegroundRole, brush)
+
+    def background(self):
+        return self.data(Qt.BackgroundRole)
+
+    def setBackground(self, brush):
+        self.setData(Qt.BackgroundRole, brush)
+
+
+class _FilePathList(Sequence):
+    """
+    FileList.file_paths: reads like the list of paths it used to be, with
+    O(1) membership and index lookups, and list methods that change the
+    file list go through the model.
+    """
+    def __init__(self, file_list):
+        self._file_list = file_list
+        self._index = file_list.file_model.path_index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, row):
+        return self._index.paths()[row] if isinstance(row, slice) else self._index[row]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __eq__(self, other):
+        return isinstance(other, (list, _FilePathList)) and list(self) == list(other)
+
+    def __repr__(self):
+        return repr(self._index.paths())
+
+    def index(self, path, *args):
+        row = self._index.row(path)
+        if row < 0 or args:
+            return self._index.paths().index(path, *args)  # Raises ValueError as list.index does
+        return row
+
+    def count(self, path):
+        return int(path in self._index)
+
+    def copy(self):
+        return self._index.paths()
+
+    def append(self, path):
+        self._file_list.add_file(path)
+
+    def extend(self, paths):
+        self._file_list.add_files(paths)
+
+    def remove(self, path):
+        if not self._file_list.remove_files([path]):
+            raise ValueError(f"{path!r} is not in the file list")
+
+    def clear(self):
+        self._file_list.clear_files()
+
+
+class FileList(QListView):
     """
-    A QListWidget to display imported files, with drag-and-drop support.
+    A list view to display imported files, with drag-and-drop support,
+    backed by a FileListModel so that adding and finding files stays fast
+    with tens of thousands of them. Once a thumbnail cache is set,
+    thumbnails are loaded lazily for the rows on screen only, on a
+    background thread pool.
     """
     # Signal to notify the main window of dropped files.
     files_dropped = pyqtSignal(list)
+    # Signal to notify the main window of dropped folders, for a folder import.
+    folders_dropped = pyqtSignal(list)
+    # The item signals of the former QListWidget base, with FileListItem handles.
+    itemClicked = pyqtSignal(object)
+    itemDoubleClicked = pyqtSignal(object)
+    currentItemChanged = pyqtSignal(object, object)  # current, previous (None when there is none)
+    itemSelectionChanged = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setViewMode(QListWidget.ListMode)
+        self.file_model = FileListModel(self)
+        self.setModel(self.file_model)
+        self.setViewMode(QListView.ListMode)
         self.setIconSize(QSize(64, 64))
         self.setSpacing(5)
+        # Uniform rows let the view lay out any number of files at once
+        self.setUniformItemSizes(True)
         
         # Enable drag and drop
         self.setAcceptDrops(True)
-        self.setDragDropMode(self.NoDragDrop) # We handle drops, not internal moves
-        self.setSelectionMode(self.ExtendedSelection)
+        self.setDragDropMode(QAbstractItemView.NoDragDrop) # We handle drops, not internal moves
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.thumbnail_cache = None # Set with set_thumbnail_cache
+        self._thumbnail_pending = set()  # Paths waiting for their thumbnail
+        self._thumbnail_done = set()
+        self._thumbnail_pool = QThreadPool(self)
+        self._thumbnail_pool.setMaxThreadCount(max(1, min(4, os.cpu_count() or 1)))
+        self._thumbnail_signals = _ThumbnailSignals(self)
+        self._thumbnail_signals.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self._thumbnail_timer = QTimer(self)
+        self._thumbnail_timer.setSingleShot(True)
+        self._thumbnail_timer.setInterval(50)
+        self._thumbnail_timer.timeout.connect(self._request_visible_thumbnails)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_thumbnails)
+
+        self.clicked.connect(lambda index: self.itemClicked.emit(self._item_at(index)))
+        self.doubleClicked.connect(lambda index: self.itemDoubleClicked.emit(self._item_at(index)))
+        self.selectionModel().currentChanged.connect(
+            lambda current, previous: self.currentItemChanged.emit(self._item_at(current), self._item_at(previous)))
+        self.selectionModel().selectionChanged.connect(lambda *args: self.itemSelectionChanged.emit())
+
+    @property
+    def file_paths(self):
+        """The listed paths in list order, as a list-like view (see _FilePathList)."""
+        return _FilePathList(self)
+
+    def count(self):
+        return self.file_model.rowCount()
+
+    def set_thumbnail_cache(self, thumbnail_cache):
+        """Enables thumbnails, stored in the given ThumbnailCache."""
+        self.thumbnail_cache = thumbnail_cache
+        self._schedule_thumbnails()
+
+    def _schedule_thumbnails(self, *args):
+        if self.thumbnail_cache is not None:
+            self._thumbnail_timer.start()
+
+    def _row_at(self, y):
+        """Returns the row at a viewport height, skipping the spacing between rows."""
+        x = self.viewport().width() // 2
+        for offset in range(0, self.spacing() * 2 + 2):
+            index = self.indexAt(QPoint(x, y + offset))
+            if index.isValid():
+                return index.row()
+        return -1
+
+    def _request_visible_thumbnails(self):
+        """Queues thumbnails for the rows on screen (and a few beyond) that lack one."""
+        if self.thumbnail_cache is None or not self.count():
+            return
+        first = self._row_at(0)
+        last = self._row_at(self.viewport().height() - self.spacing() * 2 - 2)
+        first = max(0, first)
+        last = self.count() - 1 if last < 0 else last
+        overscan = max(1, last - first + 1) // 2
+
+        paths = self.file_model.path_index
+        wanted = [paths[row] for row in range(max(0, first - overscan), min(self.count(), last + overscan + 1))
+                  if paths[row] not in self._thumbnail_done]
+        signals = self._thumbnail_signals
+        signals.wanted = set(wanted)
+        for path in wanted:
+            self._thumbnail_pending.add(path)
+            if path not in signals.requested:
+                signals.requested.add(path)
+                self._thumbnail_pool.start(_ThumbnailTask(path, self.thumbnail_cache, signals))
 
-        self.file_paths = []
+    def _on_thumbnail_ready(self, path, data):
+        self._thumbnail_signals.requested.discard(path)
+        if path not in self._thumbnail_pending:
+            return
+        self._thumbnail_pending.discard(path)
+        if path not in self.file_model.path_index:
+            return  # Removed in the meantime
+        self._thumbnail_done.add(path)
+        pixmap = QPixmap()
+        if data and pixmap.loadFromData(data, "PNG"):
+            self.file_model.set_path_data(path, Qt.DecorationRole, QIcon(pixmap))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_thumbnails()
 
     def dragEnterEvent(self, event):
         """Accepts the drag event if it contains file URLs."""
@@ -52,56 +373,101 @@ class FileList(QListWidget):
             event.acceptProposedAction()
             urls = event.mimeData().urls()
             filepaths = [url.toLocalFile() for url in urls]
-            
-            # Filter for supported file types to avoid errors
-            supported_exts = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.pdf')
-            valid_files = [path for path in filepaths if path.lower().endswith(supported_exts)]
-            
-            if valid_files:
-                # Emit a signal with the list of valid file paths
-                self.files_dropped.emit(valid_files)
+
+            # Folders are scanned by the importer, in the background
+            folders = [path for path in filepaths if os.path.isdir(path)]
+            if folders:
+                self.folders_dropped.emit(folders)
+
+            # Files are not read here: the importer checks their type by
+            # content on its threads and skips unsupported ones
+            files = [path for path in filepaths if path and path not in folders]
+            if files:
+                self.files_dropped.emit(files)
         else:
             super().dropEvent(event)
 
     def add_file(self, file_path):
         """Adds a file to the list if it's not already present."""
-        if file_path in self.file_paths:
-            return
-            
-        self.file_paths.append(file_path)
-        base_name = os.path.basename(file_path)
-        
-        item = QListWidgetItem(base_name)
-        item.setData(Qt.UserRole, file_path) # Store full path
-        
-        self.addItem(item)
+        self.add_files([file_path])
+
+    def add_files(self, file_paths):
+        """Adds a batch of files in one model update; connect FileImporter.files_imported here."""
+        if self.file_model.add_paths(file_paths):
+            self._schedule_thumbnails()
         
     def get_selected_path(self):
-        if self.currentItem():
-            return self.currentItem().data(Qt.UserRole)
+        index = self.currentIndex()
+        if index.isValid():
+            return index.data(Qt.UserRole)
         return None
         
     def get_all_paths(self):
-        return self.file_paths
+        return self.file_model.path_index.paths()
 
     def clear_files(self):
-        self.clear()
-        self.file_paths.clear()
+        self.file_model.clear()
+        self._thumbnail_pending.clear()
+        self._thumbnail_done.clear()
         
-    def get_item_by_path(self, path):
-        for i in range(self.count()):
-            item = self.item(i)
-            if item.data(Qt.UserRole) == path:
-                return item
-        return None
+    def remove_files(self, paths):
+        """Removes files from the list; returns how many were listed."""
+        removed = self.file_model.remove_paths(paths)
+        for path in paths:
+            self._thumbnail_pending.discard(path)
+            self._thumbnail_done.discard(path)
+        return removed
+
+    def get_index_by_path(self, path):
+        """Returns the model index of a file (invalid if it is not listed), in O(1)."""
+        return self.file_model.index_for_path(path)
+
+    def set_file_data(self, path, role, value):
+        """Sets display data such as Qt.ForegroundRole for a file's row, e.g. its processing status."""
+        return self.file_model.set_path_data(path, role, value)
 
     def remove_selected_file(self):
-        current_item = self.currentItem()
-        if not current_item:
+        index = self.currentIndex()
+        if not index.isValid():
             return None
         
-        path_to_remove = current_item.data(Qt.UserRole)
-        self.file_paths.remove(path_to_remove)
-        self.takeItem(self.row(current_item))
+        path_to_remove = index.data(Qt.UserRole)
+        self.remove_files([path_to_remove])
         return path_to_remove
 
+    # QListWidget-style access, for code written against the former base class
+
+    def _item_at(self, index):
+        return FileListItem(self.file_model, index.data(Qt.UserRole)) if index.isValid() else None
+
+    def get_item_by_path(self, path):
+        """Returns the FileListItem of a listed file, or None, in O(1)."""
+        return self._item_at(self.get_index_by_path(path))
+
+    def item(self, row):
+        return self._item_at(self.file_model.index(row, 0))
+
+    def row(self, item):
+        return self.file_model.path_index.row(item.data(Qt.UserRole)) if item is not None else -1
+
+    def currentItem(self):
+        return self._item_at(self.currentIndex())
+
+    def setCurrentItem(self, item):
+        self.setCurrentIndex(self.get_index_by_path(item.data(Qt.UserRole)) if item is not None else QModelIndex())
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.file_model.index(row, 0))
+
+    def selectedItems(self):
+        return [self._item_at(index) for index in self.selectionModel().selectedRows()]
+
+    def takeItem(self, row):
+        """Removes the file at a row; returns its (now detached) FileListItem, or None."""
+        item = self.item(row)
+        if item is not None:
+            self.remove_files([item.data(Qt.UserRole)])
+        return item
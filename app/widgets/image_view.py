@@ -1,19 +1,30 @@
 # ocr_tool_qt/app/widgets/image_view.py
 
+import math
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsPixmapItem
-from PyQt5.QtCore import Qt, QPointF
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QBrush
+from PyQt5.QtCore import Qt, QPointF, QThread, QTimer, QCoreApplication
+from PyQt5.QtGui import QPixmap, QImage, QImageReader, QPainter, QPen, QBrush
 
-# Conditional import for PDF rendering
-try:
-    from pdf2image import convert_from_path, pdfinfo_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
+from app.widgets.page_renderer import PageRenderer, PagePrefetcher, pages_to_prefetch, visible_tiles
+from core.memory_cache import SizedLRUCache
+from utils.logger import log
 
 class ImageView(QGraphicsView):
     """
     A QGraphicsView for displaying images/PDF pages and interacting with snips.
+    Pages are rendered on a background thread into an LRU page cache, and
+    the pages around the current one are prefetched, so page turns never
+    rasterise on the GUI thread.
+
+    Each page is shown at a base resolution (the preview dpi for PDFs, at
+    most IMAGE_BASE_MAX_SIDE pixels for images). When zoomed in beyond it,
+    the visible viewport is covered with TILE_SIZE tiles from a pyramid of
+    power-of-two levels of detail, rendered on demand and cached, so a
+    high-resolution raster of the whole page is never built.
+
+    current_file_path and current_page_num name the page asked for last;
+    the page on screen (whose tiles are drawn) only changes when that
+    page's base image is shown.
     """
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -30,57 +41,218 @@ class ImageView(QGraphicsView):
         self.total_pages = 0
         self.auto_zoom_enabled = False
         self.poppler_path = None # To be set from config
+        self.preview_dpi = 150 # 'pdf_preview_dpi' from config
+        self.prefetch_radius = 2 # 'viewer_prefetch_pages' from config
+        self.max_zoom_dpi = 600 # 'viewer_max_dpi' from config; finest PDF level of detail
+        self.page_renderer = PageRenderer() # Page counts only; pages render in the background
+
+        self._shown_page = None  # (path, page, dpi) of the base pixmap on screen
+        self._image_size = None  # Native size of the image file on screen
+        self._requested_image_size = None  # Native size of the image file asked for
+        self._base_scale = 1.0   # Base pixmap pixels per scene unit
+        self._tile_level = None  # Level of detail of the tiles on screen
+        self._tile_items = {}    # tile key -> QGraphicsPixmapItem
+        self._tile_timer = QTimer(self)
+        self._tile_timer.setSingleShot(True)
+        self._tile_timer.setInterval(40)
+        self._tile_timer.timeout.connect(self._update_tiles)
+
+        self.page_cache = SizedLRUCache(256 * 1024 * 1024) # 'viewer_cache_mb' from config
+        self.tile_cache = SizedLRUCache(128 * 1024 * 1024) # 'viewer_tile_cache_mb' from config
+        self.prefetcher = PagePrefetcher(self.page_cache, self.tile_cache)
+        self.prefetcher.page_rendered.connect(self._on_page_rendered)
+        self.prefetcher.tile_rendered.connect(self._on_tile_rendered)
+        self.prefetcher.render_failed.connect(self._on_render_failed)
+        self.render_thread = QThread(self)
+        self.prefetcher.moveToThread(self.render_thread)
+        self.render_thread.started.connect(self.prefetcher.run)
+        self.render_thread.start()
+        if QCoreApplication.instance() is not None:
+            QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+    def apply_config(self, config):
+        """Applies the viewer settings of a ConfigManager."""
+        self.set_poppler_path(config.get("poppler_path") or None)
+        self.set_preview_dpi(config.get("pdf_preview_dpi", 150))
+        self.set_page_cache_mb(config.get("viewer_cache_mb", 256))
+        self.set_prefetch_radius(config.get("viewer_prefetch_pages", 2))
+        self.set_tile_cache_mb(config.get("viewer_tile_cache_mb", 128))
+        self.set_max_zoom_dpi(config.get("viewer_max_dpi", 600))
 
     def set_poppler_path(self, path):
         self.poppler_path = path
+        self.page_renderer.poppler_path = path
+        self.prefetcher.poppler_path = path
+
+    def set_preview_dpi(self, dpi):
+        self.preview_dpi = int(dpi)
+
+    def set_page_cache_mb(self, megabytes):
+        self.page_cache.set_max_bytes(megabytes * 1024 * 1024)
+
+    def set_tile_cache_mb(self, megabytes):
+        self.tile_cache.set_max_bytes(megabytes * 1024 * 1024)
+
+    def set_max_zoom_dpi(self, dpi):
+        self.max_zoom_dpi = int(dpi)
+
+    def set_prefetch_radius(self, pages):
+        self.prefetch_radius = max(0, int(pages))
+
+    def shutdown(self):
+        """Stops the background renderer."""
+        if self.render_thread.isRunning():
+            self.prefetcher.stop()
+            self.render_thread.quit()
+            self.render_thread.wait()
 
     def load_page(self, file_path, page_num=1):
-        """Loads and displays a specific page of a file."""
+        """
+        Loads and displays a specific page of a file. A page that is not in
+        the page cache yet is shown once the background renderer has
+        finished it; the previous page stays visible until then.
+        """
         self.current_file_path = file_path
         self.current_page_num = page_num
-        self.scene.clear()
-        
-        pixmap = None
+        self._requested_image_size = None
+
         if file_path.lower().endswith('.pdf'):
-            if not PDF2IMAGE_AVAILABLE:
+            if not self.page_renderer.is_available():
                 # Handle error display on the canvas
+                self._show_pixmap(None)
                 return
             
             try:
-                info = pdfinfo_from_path(file_path, poppler_path=self.poppler_path)
-                self.total_pages = info.get('Pages', 0)
-                
-                # Render page to QImage
-                images = convert_from_path(
-                    file_path, 
-                    dpi=150, 
-                    first_page=page_num, 
-                    last_page=page_num,
-                    poppler_path=self.poppler_path
-                )
-                if images:
-                    q_image = QImage(
-                        images[0].tobytes("raw", "RGB"),
-                        images[0].width,
-                        images[0].height,
-                        QImage.Format_RGB888
-                    )
-                    pixmap = QPixmap.fromImage(q_image)
-
+                self.total_pages = self.page_renderer.page_count(file_path)
             except Exception as e:
-                print(f"Error loading PDF page: {e}")
+                log.error(f"Error loading PDF page: {e}")
                 # Display an error message on the scene
+                self._show_pixmap(None)
                 return
         else: # It's an image
-            pixmap = QPixmap(file_path)
+            self._requested_image_size = QImageReader(file_path).size()
             self.total_pages = 1
-        
+
+        q_image = self.page_cache.get((file_path, page_num, self.preview_dpi))
+        self._request_pages(file_path, page_num)
+        if q_image is not None:
+            self._show_pixmap(QPixmap.fromImage(q_image))
+
+    def _request_pages(self, file_path, page_num):
+        """Asks the background renderer for the current page and its neighbours."""
+        self.prefetcher.request(file_path, pages_to_prefetch(page_num, self.prefetch_radius, self.total_pages),
+                                self.preview_dpi)
+
+    def _on_page_rendered(self, file_path, page_num, dpi, q_image):
+        """Shows a page finished by the background renderer if it is still the current one."""
+        if (file_path, page_num, dpi) == (self.current_file_path, self.current_page_num, self.preview_dpi):
+            self._show_pixmap(QPixmap.fromImage(q_image))
+
+    def _on_render_failed(self, file_path, page_num, message):
+        """Clears the view if the page asked for cannot be rendered, rather than leaving the previous one."""
+        if (file_path, page_num) == (self.current_file_path, self.current_page_num):
+            self._show_pixmap(None)
+
+    def _show_pixmap(self, pixmap):
+        """Shows the base pixmap of the page asked for last (or clears the view); its tiles follow."""
+        self.scene.clear()
+        self.pixmap_item = None
+        self._tile_items = {}
+        self._tile_level = None
+        self._shown_page = None
+        self._image_size = self._requested_image_size
         if pixmap:
+            self._shown_page = (self.current_file_path, self.current_page_num, self.preview_dpi)
             self.pixmap_item = QGraphicsPixmapItem(pixmap)
+            # Scene units are pixels at the preview dpi for PDFs and native
+            # pixels for images, whose base pixmap may be downscaled
+            self._base_scale = 1.0
+            if self._image_size is not None and self._image_size.isValid() and pixmap.width():
+                self._base_scale = pixmap.width() / self._image_size.width()
+                self.pixmap_item.setScale(1 / self._base_scale)
             self.scene.addItem(self.pixmap_item)
-            self.setSceneRect(self.pixmap_item.boundingRect())
+            if self._base_scale != 1.0:
+                self.setSceneRect(0, 0, self._image_size.width(), self._image_size.height())
+            else:
+                self.setSceneRect(self.pixmap_item.sceneBoundingRect())
             if self.auto_zoom_enabled:
                 self.fit_in_view()
+            self._schedule_tile_update()
+
+    def _schedule_tile_update(self):
+        if self.pixmap_item is not None:
+            self._tile_timer.start()
+
+    def _level_of_detail(self):
+        """
+        Returns the tile level (pixels per scene unit, a power of two) the
+        current zoom needs, or None while the base pixmap is sharp enough.
+        Levels stop at 'max_zoom_dpi' for PDFs and at native pixels for images.
+        """
+        zoom = self.transform().m11()
+        if zoom <= self._base_scale * 1.01:
+            return None
+        max_level = 1.0 if self._image_size is not None else max(1.0, self.max_zoom_dpi / self._shown_page[2])
+        level = min(2.0 ** math.ceil(math.log2(zoom)), max_level)
+        return level if level > self._base_scale * 1.01 else None
+
+    def _update_tiles(self):
+        """Shows the cached tiles of the visible viewport and requests the missing ones."""
+        if self.pixmap_item is None:
+            return
+        level = self._level_of_detail()
+        if level != self._tile_level:
+            for item in self._tile_items.values():
+                self.scene.removeItem(item)
+            self._tile_items = {}
+            self._tile_level = level
+        if level is None:
+            self.prefetcher.request_tiles([])
+            return
+
+        visible = self.mapToScene(self.viewport().rect()).boundingRect().intersected(self.sceneRect())
+        if visible.isEmpty():
+            return
+        # Tiles of the page on screen, which may lag behind the page asked for
+        wanted = [self._shown_page + (level, tx, ty) for tx, ty in
+                  visible_tiles(visible.left(), visible.top(), visible.right(), visible.bottom(), level)]
+
+        wanted_set = set(wanted)
+        for key in [key for key in self._tile_items if key not in wanted_set]:
+            self.scene.removeItem(self._tile_items.pop(key))
+        missing = []
+        for key in wanted:
+            if key in self._tile_items:
+                continue
+            tile = self.tile_cache.get(key)
+            if tile is None:
+                missing.append(key)
+            else:
+                self._add_tile(key, *tile)
+        self.prefetcher.request_tiles(missing)
+
+    def _add_tile(self, key, q_image, x, y):
+        level = key[3]
+        item = QGraphicsPixmapItem(QPixmap.fromImage(q_image))
+        item.setScale(1 / level)
+        item.setPos(x / level, y / level)
+        item.setZValue(1)  # Above the base pixmap
+        self.scene.addItem(item)
+        self._tile_items[key] = item
+
+    def _on_tile_rendered(self, key, q_image, x, y):
+        """Shows a tile finished by the background renderer if it belongs to the current view."""
+        if self.pixmap_item is not None and key[:3] == self._shown_page and key[3] == self._tile_level \
+                and key not in self._tile_items:
+            self._add_tile(key, q_image, x, y)
+
+    def scrollContentsBy(self, dx, dy):
+        super().scrollContentsBy(dx, dy)
+        self._schedule_tile_update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_tile_update()
     
     def fit_in_view(self):
         """Zooms to fit the image to the view."""
@@ -96,6 +268,7 @@ class ImageView(QGraphicsView):
             self.scale(zoom_in_factor, zoom_in_factor)
         else:
             self.scale(zoom_out_factor, zoom_out_factor)
+        self._schedule_tile_update()
             
     # Placeholder methods for snip drawing
     def start_drawing_snip(self):
@@ -104,5 +277,8 @@ class ImageView(QGraphicsView):
     def redraw_snips(self, templates):
         # This would clear existing QGraphicsRectItems and redraw them
         # based on the coordinates in the templates.
+        # Template coords are pixels at 'ocr_dpi' for PDFs (see
+        # OcrProcessor._locate_snip) while scene units are pixels at
+        # preview_dpi, so they are drawn scaled by preview_dpi / ocr_dpi.
         pass
 
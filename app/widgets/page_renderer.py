@@ -0,0 +1,307 @@
+# ocr_tool_qt/app/widgets/page_renderer.py
+
+import os
+import math
+import threading
+from PyQt5.QtCore import Qt, QObject, QRect, QSize, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QImage, QImageReader, QImageIOHandler
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Poppler is only used when PyMuPDF is missing or cannot handle a file
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+
+from core.document_cache import DocumentCache
+from utils.logger import log
+
+# Edge length of viewer tiles in pixels of their level of detail
+TILE_SIZE = 512
+# Image files larger than this are shown downscaled until the user zooms in
+IMAGE_BASE_MAX_SIDE = 2048
+
+def pages_to_prefetch(page_num, radius, total_pages):
+    """Returns the page to show followed by its neighbours up to `radius` pages away, nearest first."""
+    page_nums = [page_num]
+    for offset in range(1, radius + 1):
+        page_nums += [page_num + offset, page_num - offset]
+    return [p for p in page_nums if 1 <= p <= total_pages]
+
+
+def visible_tiles(left, top, right, bottom, level):
+    """
+    Returns the (tile_x, tile_y) of the TILE_SIZE tiles of a level of
+    detail that cover a scene rectangle, nearest to its centre first.
+    """
+    first_x, first_y = int(left * level) // TILE_SIZE, int(top * level) // TILE_SIZE
+    last_x = max(first_x, math.ceil(right * level) - 1) // TILE_SIZE
+    last_y = max(first_y, math.ceil(bottom * level) - 1) // TILE_SIZE
+    centre_x, centre_y = (first_x + last_x) / 2, (first_y + last_y) / 2
+    return sorted(((tx, ty) for tx in range(first_x, last_x + 1) for ty in range(first_y, last_y + 1)),
+                  key=lambda t: (t[0] - centre_x) ** 2 + (t[1] - centre_y) ** 2)
+
+
+class PageRenderer:
+    """
+    Renders PDF pages and image files to QImages for the viewer. Documents
+    stay open in a DocumentCache, page counts are cached per document, and
+    PyMuPDF pixmap samples are wrapped into the QImage without copying.
+    pdf2image/Poppler is kept as a fallback.
+
+    Besides whole pages at their base resolution (the preview dpi for PDFs,
+    at most IMAGE_BASE_MAX_SIDE pixels for images), it renders TILE_SIZE
+    tiles of a page at higher levels of detail for zoomed-in views.
+
+    Not thread-safe: use one renderer per thread.
+    """
+    def __init__(self, poppler_path=None, max_open_documents=4):
+        self.poppler_path = poppler_path
+        self.document_cache = DocumentCache(max_open_documents) if PYMUPDF_AVAILABLE else None
+        self._page_counts = {}  # (path, mtime) -> page count
+        self._decoded_image = None  # (path, mtime, QImage) for image formats that cannot clip
+
+    @staticmethod
+    def is_available():
+        return PYMUPDF_AVAILABLE or PDF2IMAGE_AVAILABLE
+
+    def page_count(self, path):
+        """Returns the number of pages in a PDF, cached until the file changes."""
+        key = (path, os.path.getmtime(path))
+        page_count = self._page_counts.get(key)
+        if page_count is not None:
+            return page_count
+
+        if self.document_cache is not None:
+            try:
+                page_count = self.document_cache.get(path).page_count
+            except Exception as e:
+                if not PDF2IMAGE_AVAILABLE:
+                    raise
+                log.warning(f"PyMuPDF could not open {path}, asking Poppler for the page count: {e}")
+        if page_count is None:
+            if not PDF2IMAGE_AVAILABLE:
+                raise RuntimeError("Neither PyMuPDF nor pdf2image is available for reading PDFs.")
+            page_count = pdfinfo_from_path(path, poppler_path=self.poppler_path).get('Pages', 0)
+
+        self._page_counts[key] = page_count
+        return page_count
+
+    def render_page(self, path, page_num, dpi=150):
+        """
+        Renders one page of a PDF as an RGB888 QImage at `dpi`, or decodes an
+        image file at its base resolution.
+
+        Returns:
+            The QImage, or None if the page does not exist.
+        """
+        if not path.lower().endswith('.pdf'):
+            return self._read_image(path, page_num)
+        if self.document_cache is not None:
+            try:
+                return self._render_with_pymupdf(path, page_num, dpi)
+            except Exception as e:
+                if not PDF2IMAGE_AVAILABLE:
+                    raise
+                log.warning(f"PyMuPDF failed to render {path} page {page_num}, falling back to Poppler: {e}")
+        if not PDF2IMAGE_AVAILABLE:
+            raise RuntimeError("Neither PyMuPDF nor pdf2image is available for rendering PDF pages.")
+        return self._render_with_poppler(path, page_num, dpi)
+
+    def _render_with_pymupdf(self, path, page_num, dpi):
+        doc = self.document_cache.get(path)
+        if not 1 <= page_num <= doc.page_count:
+            return None
+        pix = doc.load_page(page_num - 1).get_pixmap(dpi=dpi, alpha=False)
+        image = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
+        image.source_buffer = pix  # The QImage borrows the pixmap's samples
+        return image
+
+    def _render_with_poppler(self, path, page_num, dpi):
+        images = convert_from_path(path, dpi=dpi, first_page=page_num, last_page=page_num,
+                                   poppler_path=self.poppler_path)
+        if not images:
+            return None
+        data = images[0].convert("RGB").tobytes("raw", "RGB")
+        image = QImage(data, images[0].width, images[0].height, images[0].width * 3, QImage.Format_RGB888)
+        image.source_buffer = data
+        return image
+
+    def _read_image(self, path, page_num):
+        if page_num != 1:
+            return None
+        reader = QImageReader(path)
+        size = reader.size()
+        if not size.isValid():
+            raise ValueError(f"Unsupported or corrupt image file: {reader.errorString()}")
+        longest = max(size.width(), size.height())
+        if longest > IMAGE_BASE_MAX_SIDE:
+            factor = IMAGE_BASE_MAX_SIDE / longest
+            reader.setScaledSize(QSize(max(1, round(size.width() * factor)), max(1, round(size.height() * factor))))
+        image = reader.read()
+        if image.isNull():
+            raise ValueError(f"Could not decode image: {reader.errorString()}")
+        return image
+
+    def render_tile(self, path, page_num, dpi, scale, tile_x, tile_y):
+        """
+        Renders one TILE_SIZE tile of a page at `scale` times the page's
+        scene resolution (pixels at `dpi` for PDFs, native pixels for
+        images). Only the tile's area is rasterised.
+
+        Returns:
+            (QImage, x, y) with the tile's origin in pixels of its level,
+            or None if the tile lies outside the page or cannot be rendered.
+        """
+        x0, y0 = tile_x * TILE_SIZE, tile_y * TILE_SIZE
+        if path.lower().endswith('.pdf'):
+            if self.document_cache is None:
+                return None  # Poppler cannot render clips; the base page is shown scaled
+            doc = self.document_cache.get(path)
+            if not 1 <= page_num <= doc.page_count:
+                return None
+            page = doc.load_page(page_num - 1)
+            zoom = dpi * scale / 72.0
+            clip = fitz.Rect(x0 / zoom, y0 / zoom, (x0 + TILE_SIZE) / zoom, (y0 + TILE_SIZE) / zoom) & page.rect
+            if clip.is_empty:
+                return None
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, alpha=False)
+            image = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
+            image.source_buffer = pix
+            return image, pix.x, pix.y
+
+        if page_num != 1:
+            return None
+        reader = QImageReader(path)
+        source = QRect(math.floor(x0 / scale), math.floor(y0 / scale),
+                       math.ceil(TILE_SIZE / scale), math.ceil(TILE_SIZE / scale)) & QRect(0, 0, reader.size().width(), reader.size().height())
+        if source.isEmpty():
+            return None
+        target = QSize(max(1, round(source.width() * scale)), max(1, round(source.height() * scale)))
+        if reader.supportsOption(QImageIOHandler.ClipRect):
+            reader.setClipRect(source)
+            reader.setScaledSize(target)
+            image = reader.read()
+        else:
+            # The format decodes whole images only: decode once, then cut tiles
+            image = self._decoded_source(path).copy(source)
+            if target != source.size():
+                image = image.scaled(target, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        if image.isNull():
+            return None
+        return image, round(source.x() * scale), round(source.y() * scale)
+
+    def _decoded_source(self, path):
+        mtime = os.path.getmtime(path)
+        if self._decoded_image is None or self._decoded_image[:2] != (path, mtime):
+            self._decoded_image = (path, mtime, QImage(path))
+        return self._decoded_image[2]
+
+    def close(self):
+        """Closes the documents held open for rendering."""
+        if self.document_cache is not None:
+            self.document_cache.close_all()
+        self._decoded_image = None
+
+
+class PagePrefetcher(QObject):
+    """
+    Worker object that renders pages and tiles on a background thread into
+    shared SizedLRUCaches of QImages, so the GUI thread never rasterises.
+    `request` replaces the pending pages: the first page is the one on
+    screen, the rest are prefetched neighbours. `request_tiles` replaces
+    the pending tiles of the visible viewport, which are rendered after
+    the current page and before any prefetching. Cached entries are
+    skipped. Images are detached from PyMuPDF's buffer before they cross
+    threads.
+    """
+    page_rendered = pyqtSignal(str, int, int, QImage)  # path, page, dpi, image
+    tile_rendered = pyqtSignal(object, QImage, int, int)  # tile key, image, x, y
+    render_failed = pyqtSignal(str, int, str)  # path, page, message
+
+    def __init__(self, page_cache, tile_cache, poppler_path=None):
+        super().__init__()
+        self.page_cache = page_cache
+        self.tile_cache = tile_cache
+        self.poppler_path = poppler_path
+        self._cond = threading.Condition()
+        self._current = []  # [(path, page_num, dpi)] for the page on screen
+        self._tiles = []    # (path, page_num, dpi, scale, tile_x, tile_y), nearest first
+        self._pending = []  # (path, page_num, dpi) of neighbouring pages
+        self._stopped = False
+
+    def request(self, path, page_nums, dpi):
+        """Queues pages for rendering, dropping earlier page and tile requests. Thread-safe."""
+        keys = [(path, page_num, dpi) for page_num in page_nums]
+        with self._cond:
+            self._current, self._pending = keys[:1], keys[1:]
+            self._tiles = []
+            self._cond.notify()
+
+    def request_tiles(self, tile_keys):
+        """Queues the tiles of the visible viewport, dropping earlier tile requests. Thread-safe."""
+        with self._cond:
+            self._tiles = list(tile_keys)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    @pyqtSlot()
+    def run(self):
+        """The render loop; runs until stop() is called."""
+        # PyMuPDF documents must not be shared between threads
+        renderer = PageRenderer(self.poppler_path)
+        try:
+            while True:
+                with self._cond:
+                    while not (self._current or self._tiles or self._pending) and not self._stopped:
+                        self._cond.wait()
+                    if self._stopped:
+                        return
+                    queue = self._current or self._tiles or self._pending
+                    key = queue.pop(0)
+
+                renderer.poppler_path = self.poppler_path
+                if len(key) == 6:
+                    self._render_tile(renderer, key)
+                    continue
+                if key in self.page_cache:
+                    continue
+                path, page_num, dpi = key
+                try:
+                    image = renderer.render_page(path, page_num, dpi)
+                except Exception as e:
+                    log.error(f"Failed to render {path} page {page_num}: {e}")
+                    self.render_failed.emit(path, page_num, str(e))
+                    continue
+                if image is None:
+                    continue
+                image = image.copy()
+                self.page_cache.put(key, image, image.sizeInBytes())
+                self.page_rendered.emit(path, page_num, dpi, image)
+        finally:
+            renderer.close()
+
+    def _render_tile(self, renderer, key):
+        if key in self.tile_cache:
+            return
+        try:
+            tile = renderer.render_tile(*key)
+        except Exception as e:
+            log.error(f"Failed to render a tile of {key[0]} page {key[1]}: {e}")
+            return
+        if tile is None:
+            return
+        image, x, y = tile
+        image = image.copy()
+        self.tile_cache.put(key, (image, x, y), image.sizeInBytes())
+        self.tile_rendered.emit(key, image, x, y)
@@ -1,19 +1,99 @@
 # ocr_tool_qt/app/widgets/results_table.py
 
-from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView, QMenu
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QTableView, QHeaderView, QMenu
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
 import clipboard
 
-class ResultsTable(QTableWidget):
+from core.result_store import ResultStore
+from core.exporter import result_columns, export_rows
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    A read-only table model over a columnar ResultStore. Rows are appended
+    in batches with a single beginInsertRows call, and sorting happens in
+    the store rather than in per-cell items. While sorted, appends and
+    re-sorts are layout changes, so the selection and scroll position
+    follow their rows.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = ResultStore(["File", "Page"])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.ToolTipRole) and index.isValid():
+            return self.store.value(index.row(), index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.store.columns[section] if section < len(self.store.columns) else None
+        return section + 1
+
+    def set_columns(self, columns):
+        self.beginResetModel()
+        self.store.set_columns(columns)
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        """Appends a batch of row dicts."""
+        if not rows:
+            return
+        if self.store.sort_column < 0:
+            first = len(self.store)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.store.append_rows(rows)
+            self.endInsertRows()
+        else:
+            # The rows are merged into the sort order at scattered positions
+            self._change_layout(lambda: self.store.append_rows(rows))
+
+    def _change_layout(self, change):
+        """
+        Applies a change that reorders the view as a layout change, moving
+        persistent indexes (the selection, the current cell) along with
+        their rows instead of resetting the model.
+        """
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        row_ids = [self.store.row_id(index.row()) for index in persistent]
+        change()
+        new_rows = self.store.view_rows(row_ids)
+        self.changePersistentIndexList(
+            persistent, [self.index(row, index.column()) for index, row in zip(persistent, new_rows)])
+        self.layoutChanged.emit()
+
+    def clear(self):
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._change_layout(lambda: self.store.sort(column, order == Qt.DescendingOrder))
+
+
+class ResultsTable(QTableView):
     """
-    A QTableWidget specialized for displaying OCR results.
+    A QTableView specialized for displaying OCR results, backed by a
+    ResultsTableModel so that hundreds of thousands of rows stay responsive.
     """
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setColumnCount(2)
-        self.setHorizontalHeaderLabels(["File", "Page"])
+        self.results_model = ResultsTableModel(self)
+        self.setModel(self.results_model)
         self.horizontalHeader().setStretchLastSection(True)
+        # Uniform row heights keep scrolling independent of the row count
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
         self.setAlternatingRowColors(True)
+        self.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder) # Insertion order until a header is clicked
         self.setSortingEnabled(True)
         self.setEditTriggers(self.NoEditTriggers) # Read-only
         self.setSelectionBehavior(self.SelectRows)
@@ -24,68 +104,56 @@ class ResultsTable(QTableWidget):
 
     def update_columns(self, templates):
         """Updates the table columns based on the provided templates."""
-        headers = ["File", "Page"]
-        
-        # Logic to determine headers from mixed template types
-        # For simplicity, we'll use fields from the first text_parser,
-        # or names from all visual snips.
-        text_parser = next((t for t in templates if t.get('type') == 'text_parser'), None)
-        
-        if text_parser:
-            headers.extend([field['column_name'] for field in text_parser.get('fields', [])])
-        else: # Visual snips
-            headers.extend([t['name'] for t in templates if t.get('type') == 'visual'])
-            
-        self.setColumnCount(len(headers))
-        self.setHorizontalHeaderLabels(headers)
+        # Fields of the first text parser, or the names of all visual snips
+        self.results_model.set_columns(result_columns(templates))
+        self.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
         self.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
 
     def add_row(self, row_data):
         """Adds a new row of data to the table."""
-        row_count = self.rowCount()
-        self.insertRow(row_count)
-        
-        headers = [self.horizontalHeaderItem(i).text() for i in range(self.columnCount())]
-        
-        for col_idx, header in enumerate(headers):
-            item_value = str(row_data.get(header, ''))
-            self.setItem(row_count, col_idx, QTableWidgetItem(item_value))
-            
+        self.results_model.append_rows([row_data])
+
+    def add_rows(self, rows):
+        """Adds a batch of rows to the table in one model update; connect OcrProcessor.results_ready here."""
+        self.results_model.append_rows(rows)
+
+    def export_results(self, path):
+        """Exports every row, in insertion order, to a .csv, .xlsx, .parquet or .arrow file; returns the row count."""
+        store = self.results_model.store
+        return export_rows(path, store.columns, store.iter_rows())
+
     def clear_results(self):
         """Clears all rows from the table."""
-        self.setRowCount(0)
+        self.results_model.clear()
 
     def show_context_menu(self, pos):
         """Shows the right-click context menu."""
         menu = QMenu()
         copy_row_action = menu.addAction("Copy Row(s) as TSV")
         copy_cell_action = menu.addAction("Copy Cell Value")
-        
+
         action = menu.exec_(self.mapToGlobal(pos))
-        
+
         if action == copy_row_action:
             self.copy_selected_rows()
         elif action == copy_cell_action:
             self.copy_selected_cell()
-            
+
     def copy_selected_rows(self):
         """Copies the selected rows to the clipboard in Tab-Separated Value format."""
         selection = self.selectionModel().selectedRows()
         if not selection:
             return
-            
-        headers = "\t".join([self.horizontalHeaderItem(i).text() for i in range(self.columnCount())])
-        
-        rows_text = [headers]
-        for index in selection:
-            row_items = [self.item(index.row(), col).text() for col in range(self.columnCount())]
-            rows_text.append("\t".join(row_items))
-            
+
+        store = self.results_model.store
+        rows_text = ["\t".join(store.columns)]
+        for index in sorted(selection, key=lambda i: i.row()):
+            rows_text.append("\t".join(store.row_values(index.row())))
+
         clipboard.copy("\n".join(rows_text))
 
     def copy_selected_cell(self):
         """Copies the value of the currently selected cell."""
-        current_item = self.currentItem()
-        if current_item:
-            clipboard.copy(current_item.text())
-
+        index = self.currentIndex()
+        if index.isValid():
+            clipboard.copy(self.results_model.data(index))
@@ -0,0 +1,82 @@
+# ocr_tool_qt/benchmarks/bench_file_list.py
+#
+# Adds, looks up and removes files in the FileList the old way (a
+# QListWidget with a list of paths, scanned on every add and lookup) and
+# with the indexed FileList model. The old way is quadratic, so it runs on
+# a smaller count by default.
+#
+#   python -m benchmarks.bench_file_list [file_count] [old_way_count]
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt
+
+from app.widgets.file_list import FileList
+
+
+class ListWidgetFileList(QListWidget):
+    """The FileList before the indexed model, reduced to what is measured."""
+    def __init__(self):
+        super().__init__()
+        self.file_paths = []
+
+    def add_file(self, file_path):
+        if file_path in self.file_paths:
+            return
+        self.file_paths.append(file_path)
+        item = QListWidgetItem(os.path.basename(file_path))
+        item.setData(Qt.UserRole, file_path)
+        self.addItem(item)
+
+    def get_item_by_path(self, path):
+        for i in range(self.count()):
+            item = self.item(i)
+            if item.data(Qt.UserRole) == path:
+                return item
+        return None
+
+    def remove_file(self, path):
+        item = self.get_item_by_path(path)
+        self.file_paths.remove(path)
+        self.takeItem(self.row(item))
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed:8.3f}s ({count / elapsed:10.0f}/s)")
+
+
+def run(name, file_list, paths, lookup, remove, add_batch=None):
+    print(f"{name}, {len(paths)} files:")
+    timed("add one by one", len(paths), lambda: [file_list.add_file(path) for path in paths])
+    if add_batch:
+        file_list.clear_files()
+        timed("add as one batch", len(paths), lambda: add_batch(paths))
+    sample = paths[::max(1, len(paths) // 2000)]
+    timed("look up", len(sample), lambda: [lookup(path) for path in sample])
+    doomed = paths[::max(1, len(paths) // 200)]
+    timed("remove", len(doomed), lambda: [remove(path) for path in doomed])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    old_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    app = QApplication.instance() or QApplication(sys.argv)
+    paths = [f"/data/imports/batch_{i // 1000:03d}/scan_{i:06d}.pdf" for i in range(count)]
+
+    old = ListWidgetFileList()
+    run("QListWidget with a path list", old, paths[:old_count], old.get_item_by_path, old.remove_file)
+
+    new = FileList()
+    run("Indexed FileList", new, paths, new.get_index_by_path, new.file_model.remove_path, new.add_files)
+
+
+if __name__ == "__main__":
+    main()
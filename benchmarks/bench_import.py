@@ -0,0 +1,58 @@
+# ocr_tool_qt/benchmarks/bench_import.py
+#
+# Imports a folder of small scans (a quarter of them duplicates) the old
+# way, shutil.copy2 one file after another, and with the FileImporter,
+# which copies on a thread pool into the deduplicating ImportStore.
+# Reports files/s and MB/s. Point the source at a network share to see the
+# effect of the threads on latency-bound copies.
+#
+#   python -m benchmarks.bench_import [file_count] [workers] [source_dir]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from core.file_importer import FileImporter
+
+
+def make_files(source_dir, count, size=256 * 1024):
+    paths = []
+    for i in range(count):
+        path = os.path.join(source_dir, f"scan_{i:05d}.pdf")
+        with open(path, 'wb') as f:
+            # Every fourth file repeats an earlier one
+            f.write(os.urandom(size) if i % 4 else (b"%PDF-1.7 duplicate " * (size // 19)))
+        paths.append(path)
+    return paths
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = sys.argv[3] if len(sys.argv) > 3 else os.path.join(tmp_dir, "source")
+        os.makedirs(source_dir, exist_ok=True)
+        paths = make_files(source_dir, count)
+        total_mb = sum(os.path.getsize(path) for path in paths) / 1e6
+
+        target = os.path.join(tmp_dir, "copy2")
+        os.makedirs(target)
+        start = time.perf_counter()
+        for path in paths:
+            shutil.copy2(path, os.path.join(target, os.path.basename(path)))
+        elapsed = time.perf_counter() - start
+        print(f"     copy2: {elapsed:6.2f}s, {count / elapsed:8.0f} files/s, {total_mb / elapsed:7.1f} MB/s")
+
+        importer = FileImporter(os.path.join(tmp_dir, "imports"), max_workers=workers)
+        importer.set_files_to_import(paths)
+        importer.run()
+        stats = importer.import_stats
+        print(f"  importer: {stats['seconds']:6.2f}s, {stats['files'] / stats['seconds']:8.0f} files/s, "
+              f"{total_mb / stats['seconds']:7.1f} MB/s ({stats['deduplicated']} duplicates, "
+              f"{stats['copied_bytes'] / 1e6:.1f} MB written)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# ocr_tool_qt/benchmarks/bench_native_routing.py
+#
+# Runs visual snip templates over a mixed PDF archive (pages with a text
+# layer and image-only scans) with native-text-first routing switched on
+# and off, and reports pages/s and how many pages had to be rasterised.
+#
+#   python -m benchmarks.bench_native_routing [pages] [scanned_fraction]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from core.config_manager import ConfigManager
+from core.ocr_processor import OcrProcessor
+from core.template_manager import TemplateManager
+
+
+def build_mixed_pdf(path, page_count, scanned_fraction):
+    """Writes a PDF where roughly `scanned_fraction` of the pages are image-only scans."""
+    scan = np.full((1100, 850), 255, np.uint8)
+    cv2.putText(scan, "Invoice No: 4711", (100, 130), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 2)
+    scan_png = cv2.imencode('.png', scan)[1].tobytes()
+    scan_every = max(1, round(1 / scanned_fraction)) if scanned_fraction else 0
+
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page(width=612, height=792)
+        if scan_every and i % scan_every == 0:
+            page.insert_image(page.rect, stream=scan_png)
+        else:
+            page.insert_text((72, 90), f"Invoice No: {4711 + i}", fontsize=12)
+            page.insert_text((72, 130), "\n".join(f"Line {n}: 1,250.00" for n in range(30)), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def run_batch(tmp_dir, pdf_path, native_text_first):
+    config = ConfigManager(os.path.join(tmp_dir, "config.json"))
+    config.set('workspace_dir', os.path.join(tmp_dir, "data"))
+    config.set('max_workers', 1)
+    config.set('ocr_cache_mb', 0)
+    config.set('page_text_cache_mb', 0)
+    config.set('native_text_first', native_text_first)
+    config._ensure_workspace_dirs()
+
+    processor = OcrProcessor(config, TemplateManager(config))
+    processor.ocr_engine = "tesseract"
+    if not shutil.which("tesseract"):
+        # Times rendering and routing only
+        processor._perform_ocr_batch = lambda crops, snip_configs: [""] * len(crops)
+    processor.files_to_process = [pdf_path]
+    processor.templates_to_use = [
+        {'name': 'Invoice', 'type': 'visual', 'coords': [250, 280, 1200, 400]},
+        {'name': 'Amount', 'type': 'visual', 'coords': [250, 500, 1200, 560], 'numeric_optimize': True},
+    ]
+    start = time.perf_counter()
+    processor.run()
+    return time.perf_counter() - start, processor.batch_stats
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    scanned_fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    if not shutil.which("tesseract"):
+        print("tesseract executable not found; OCR time is excluded from both runs.")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "mixed.pdf")
+        build_mixed_pdf(pdf_path, page_count, scanned_fraction)
+        for label, enabled in (("always OCR", False), ("native first", True)):
+            elapsed, stats = run_batch(tmp_dir, pdf_path, enabled)
+            print(f"{label:>13}: {page_count / elapsed:8.1f} pages/s, "
+                  f"{stats.get('ocr_pages', 0)} rasterised / {stats.get('native_text_pages', 0)} native pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# ocr_tool_qt/benchmarks/bench_session_results.py
+#
+# Saves and loads a session with imported documents and a large result set,
+# once in the 3.0-qt layout (everything rewritten on each save, results as
+# inline JSON) and once in the incremental 3.2-qt layout, then re-saves
+# after a small batch of new results, as an autosave would.
+#
+#   python -m benchmarks.bench_session_results [rows] [document_mb]
+
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+from core.config_manager import ConfigManager
+from core.session_manager import SessionManager
+
+
+def make_rows(row_count, start=0):
+    return [
+        {'File': f"invoice_{i // 20:05d}.pdf", 'Page': i % 20 + 1, 'Invoice No': str(4711 + i),
+         'Date': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}", 'Total': f"{(i * 37) % 100000 / 100:.2f}"}
+        for i in range(start, start + row_count)
+    ]
+
+
+def make_documents(doc_dir, total_mb, count=10):
+    """Writes incompressible stand-ins for imported PDFs."""
+    paths = []
+    for i in range(count):
+        path = os.path.join(doc_dir, f"scan_{i}.pdf")
+        with open(path, 'wb') as f:
+            f.write(os.urandom(total_mb * 1024 * 1024 // count))
+        paths.append(path)
+    return paths
+
+
+def save_legacy(path, image_paths, rows):
+    """Writes a session the way 3.0-qt did: one deflated zip with inline JSON results."""
+    session_data = {'version': '3.0-qt', 'image_basenames': [os.path.basename(p) for p in image_paths],
+                    'templates': [], 'ocr_results': rows, 'ui_settings': {}}
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('session_data.json', json.dumps(session_data, indent=4))
+        for image_path in image_paths:
+            zf.write(image_path, os.path.join("imported_documents", os.path.basename(image_path)))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    document_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rows = make_rows(row_count)
+    more_rows = rows + make_rows(1000, start=row_count)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config = ConfigManager(os.path.join(tmp_dir, "config.json"))
+        config.set('workspace_dir', os.path.join(tmp_dir, "data"))
+        config._ensure_workspace_dirs()
+        manager = SessionManager(config)
+        doc_dir = os.path.join(tmp_dir, "docs")
+        os.makedirs(doc_dir)
+        image_paths = make_documents(doc_dir, document_mb)
+
+        legacy_path = os.path.join(tmp_dir, "legacy.ocrtool_session")
+        save_time, _ = timed(save_legacy, legacy_path, image_paths, rows)
+        resave_time, _ = timed(save_legacy, legacy_path, image_paths, more_rows)
+        load_time, _ = timed(manager.load_session, legacy_path)
+        print(f"3.0-qt: {os.path.getsize(legacy_path) / 1e6:8.1f} MB, save {save_time:6.2f}s, "
+              f"re-save +1000 rows {resave_time:6.2f}s, load {load_time:6.2f}s")
+
+        path = os.path.join(tmp_dir, "incremental.ocrtool_session")
+        save_time, _ = timed(manager.save_session, path, image_paths, [], rows, {})
+        size = os.path.getsize(path)
+        resave_time, _ = timed(manager.save_session, path, image_paths, [], more_rows, {})
+        grown = os.path.getsize(path) - size
+        load_time, session = timed(manager.load_session, path)
+        read_time, loaded = timed(lambda: sum(1 for _ in session['ocr_results']))
+        print(f"3.2-qt: {os.path.getsize(path) / 1e6:8.1f} MB, save {save_time:6.2f}s, "
+              f"re-save +1000 rows {resave_time:6.2f}s ({grown / 1e3:.0f} kB appended), "
+              f"load {load_time:6.2f}s, read {loaded} rows {read_time:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# ocr_tool_qt/benchmarks/bench_snip_ocr.py
+#
+# Compares the two visual snip OCR modes of OcrProcessor on a synthetic
+# page: "per_snip" (one Tesseract call per cropped snip) and "page_layout"
+# (one Tesseract call per page, snips filled from word boxes). Also times
+# the WordGrid box lookup against a linear scan over all words.
+#
+#   python -m benchmarks.bench_snip_ocr [snips]
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from core.config_manager import ConfigManager
+from core.ocr_processor import OcrProcessor
+from core.template_manager import TemplateManager
+from core.word_index import Word, WordGrid
+
+
+def build_page(path, snip_count, rng):
+    """Draws `snip_count` labelled values on an A4 page at 300 dpi and returns their boxes."""
+    page = np.full((3508, 2480), 255, np.uint8)
+    boxes = []
+    for i in range(snip_count):
+        x, y = 150 + (i % 2) * 1150, 150 + (i // 2) * 150
+        cv2.putText(page, f"Field {i}: {rng.randint(1000, 99999)}", (x, y + 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.6, 0, 3)
+        boxes.append([x - 10, y, x + 900, y + 90])
+    cv2.imwrite(path, page)
+    return boxes
+
+
+def bench_word_lookup(rng, word_count=3000, snip_count=40, rounds=50):
+    words = []
+    for i in range(word_count):
+        x, y = rng.randint(0, 2400), rng.randint(0, 3400)
+        words.append(Word(x, y, x + 60, y + 25, f"w{i}", 90.0, i))
+    boxes = [(x, y, x + 500, y + 80) for x, y in
+             ((rng.randint(0, 1900), rng.randint(0, 3300)) for _ in range(snip_count))]
+
+    def linear():
+        for x1, y1, x2, y2 in boxes:
+            [w for w in words if x1 <= (w.x1 + w.x2) // 2 < x2 and y1 <= (w.y1 + w.y2) // 2 < y2]
+
+    def grid():
+        index = WordGrid(words)
+        for box in boxes:
+            index.query(*box)
+
+    for label, fn in (("linear scan", linear), ("word grid", grid)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        elapsed = (time.perf_counter() - start) / rounds
+        print(f"{label:>12}: {elapsed * 1000:8.3f} ms per page ({word_count} words, {snip_count} snips)")
+
+
+def bench_ocr_modes(tmp_dir, snip_count, rng, pages=3):
+    config = ConfigManager(os.path.join(tmp_dir, "config.json"))
+    config.set('workspace_dir', os.path.join(tmp_dir, "data"))
+    config.set('ocr_cache_mb', 0)
+    config.set('tesseract_psm', "7")
+    config._ensure_workspace_dirs()
+
+    image_path = os.path.join(tmp_dir, "page.png")
+    boxes = build_page(image_path, snip_count, rng)
+    processor = OcrProcessor(config, TemplateManager(config))
+    processor.ocr_engine = "tesseract"
+    processor.templates_to_use = [{'name': f"Field {i}", 'type': 'visual', 'coords': box}
+                                  for i, box in enumerate(boxes)]
+
+    for mode in ("per_snip", "page_layout"):
+        processor.snip_ocr_mode = mode
+        start = time.perf_counter()
+        for _ in range(pages):
+            row = processor._process_page_with_visual_snips(image_path, 1)
+        elapsed = time.perf_counter() - start
+        print(f"{mode:>12}: {pages / elapsed:8.3f} pages/s, {snip_count * pages / elapsed:8.1f} snips/s "
+              f"(sample: {row.get('Field 0')!r})")
+
+
+def main():
+    snip_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(3)
+    bench_word_lookup(rng)
+
+    if not shutil.which("tesseract"):
+        print("tesseract executable not found; skipping the OCR mode comparison.")
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bench_ocr_modes(tmp_dir, snip_count, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# ocr_tool_qt/benchmarks/bench_text_extraction.py
+#
+# Compares PDF text extraction throughput with one fitz.open() per page
+# against the DocumentCache used by OcrProcessor.
+#
+#   python -m benchmarks.bench_text_extraction [pages]
+
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from core.document_cache import DocumentCache
+
+
+def build_sample_pdf(path, page_count):
+    """Writes a synthetic multi-page PDF with a few lines of text per page."""
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page()
+        lines = [f"Invoice # {i + 1}", "Financial Year 2023-24", "1. GSTIN 27ABCDE1234F1Z5"] * 10
+        page.insert_text((72, 72), "\n".join(lines), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def open_per_page(path, page_nums):
+    for page_num in page_nums:
+        doc = fitz.open(path)
+        doc.load_page(page_num - 1).get_text("text")
+        doc.close()
+
+
+def cached(path, page_nums, tasks_of=8):
+    cache = DocumentCache(max_open=4)
+    for i in range(0, len(page_nums), tasks_of):
+        cache.get_page_texts(path, page_nums[i:i + tasks_of])
+    cache.close_all()
+
+
+def main():
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sample.pdf")
+        build_sample_pdf(path, page_count)
+        page_nums = list(range(1, page_count + 1))
+
+        for label, fn in (("open per page", open_per_page), ("document cache", cached)):
+            start = time.perf_counter()
+            fn(path, page_nums)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>15}: {page_count / elapsed:10.1f} pages/s ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
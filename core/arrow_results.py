@@ -0,0 +1,171 @@
+# ocr_tool_qt/core/arrow_results.py
+
+import bisect
+from collections.abc import Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Result columns stored as integers; every other column is stored as text.
+INTEGER_COLUMNS = ('Page',)
+# Rows per record batch when writing result tables
+RECORD_BATCH_ROWS = 65536
+
+
+def _integer(value):
+    if value is None or value == '':
+        return None
+    return value if isinstance(value, int) else int(value)
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _is_integer_column(values):
+    try:
+        return pa.types.is_integer(pa.array(values).type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return False  # Mixed types
+
+
+def results_schema(columns, integer_columns=INTEGER_COLUMNS):
+    """Returns the Arrow schema for result columns: int64 for page numbers, strings otherwise."""
+    return pa.schema([(name, pa.int64() if name in integer_columns else pa.string()) for name in columns])
+
+
+def rows_schema(rows):
+    """
+    Returns the Arrow schema for a list of row dicts. Columns are the union
+    of the row keys in first-seen order; integer columns stay int64 only if
+    every value in them is an int.
+    """
+    columns = dict.fromkeys(name for row in rows for name in row)
+    integer_columns = [
+        name for name in INTEGER_COLUMNS
+        if name in columns and _is_integer_column([row.get(name) for row in rows])
+    ]
+    return results_schema(columns, integer_columns)
+
+
+def rows_to_record_batch(rows, schema):
+    """Converts row dicts to a RecordBatch; missing values become nulls."""
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        try:
+            # Fast path: the values already have the column's type
+            arrays.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            convert = _integer if pa.types.is_integer(field.type) else _text
+            arrays.append(pa.array([convert(value) for value in values], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_results_ipc(sink, rows):
+    """
+    Writes a list of row dicts to `sink` (a path or writable file object)
+    in the Arrow IPC file format, with zstd-compressed buffers.
+
+    Returns:
+        The number of rows written.
+    """
+    schema = rows_schema(rows)
+    if isinstance(sink, str):
+        sink = pa.OSFile(sink, 'wb')
+    elif not isinstance(sink, pa.NativeFile):
+        sink = pa.PythonFile(sink, mode='w')
+    options = pa.ipc.IpcWriteOptions(compression='zstd')
+    with sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for start in range(0, len(rows), RECORD_BATCH_ROWS):
+            writer.write_batch(rows_to_record_batch(rows[start:start + RECORD_BATCH_ROWS], schema))
+    return len(rows)
+
+
+class ArrowResultRows(Sequence):
+    """
+    A read-only sequence of result row dicts over one or more memory-mapped
+    Arrow IPC files, read one after the other. Nothing is decoded up front:
+    rows are converted to dicts only when they are indexed or iterated,
+    batch by batch, so large result sets load in constant time. Slices
+    are decoded batch by batch too, and the last batch read is kept
+    decompressed for lookups of single rows near each other. Null cells are
+    left out of the row dicts, matching rows that never had the key.
+    """
+    def __init__(self, paths):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self._sources = []
+        self._batches = []       # (reader, batch index) of every record batch
+        self._batch_starts = []  # First row index of every record batch
+        columns = {}
+        row_count = 0
+        for path in self.paths:
+            source = pa.memory_map(path, 'r')
+            self._sources.append(source)
+            reader = pa.ipc.open_file(source)
+            columns.update(dict.fromkeys(reader.schema.names))
+            for i in range(reader.num_record_batches):
+                self._batches.append((reader, i))
+                self._batch_starts.append(row_count)
+                row_count += reader.get_batch(i).num_rows
+        self.columns = list(columns)
+        self._row_count = row_count
+        self._cached_batch = (None, None)  # (batch index, RecordBatch) read last
+
+    def __len__(self):
+        return self._row_count
+
+    @staticmethod
+    def _iter_batch_rows(batch):
+        names = batch.schema.names
+        columns = [column.to_pylist() for column in batch.columns]
+        for values in zip(*columns):
+            yield {name: value for name, value in zip(names, values) if value is not None}
+
+    def _batch(self, batch_index):
+        """Returns a record batch; every read decompresses the whole batch, so the last one is kept."""
+        cached_index, batch = self._cached_batch
+        if cached_index != batch_index:
+            reader, i = self._batches[batch_index]
+            batch = reader.get_batch(i)
+            self._cached_batch = (batch_index, batch)
+        return batch
+
+    def _iter_range(self, start, stop):
+        """Yields the rows start..stop-1, decoding each record batch they span once."""
+        if start >= stop:
+            return
+        batch_index = bisect.bisect_right(self._batch_starts, start) - 1
+        while start < stop:
+            batch = self._batch(batch_index)
+            offset = start - self._batch_starts[batch_index]
+            count = min(batch.num_rows - offset, stop - start)
+            yield from self._iter_batch_rows(batch.slice(offset, count))
+            start += count
+            batch_index += 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._row_count)
+            if step == 1:
+                return list(self._iter_range(start, stop))
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += self._row_count
+        if not 0 <= index < self._row_count:
+            raise IndexError("result row index out of range")
+        return next(self._iter_range(index, index + 1))
+
+    def __iter__(self):
+        for reader, i in self._batches:
+            yield from self._iter_batch_rows(reader.get_batch(i))
+
+    def close(self):
+        self._batches = []
+        self._cached_batch = (None, None)
+        for source in self._sources:
+            source.close()
@@ -0,0 +1,135 @@
+# ocr_tool_qt/core/batch_engine.py
+
+import os
+from collections import deque
+from utils.logger import log
+
+
+def parse_page_selection(selection, page_count):
+    """
+    Resolves a page selection into a sorted list of 1-based page numbers.
+
+    Args:
+        selection: None, "" or "all" for every page; a string such as
+            "1-3, 7, 10-" (open-ended ranges run to the last page); or an
+            iterable of page numbers.
+        page_count (int): The number of pages in the document.
+
+    Returns:
+        A sorted list of unique page numbers within 1..page_count.
+    """
+    if page_count <= 0:
+        return []
+    if selection is None or (isinstance(selection, str) and selection.strip().lower() in ("", "all")):
+        return list(range(1, page_count + 1))
+
+    pages = set()
+    if isinstance(selection, str):
+        for token in selection.split(','):
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                if '-' in token:
+                    start, end = token.split('-', 1)
+                    start = int(start) if start.strip() else 1
+                    end = int(end) if end.strip() else page_count
+                    pages.update(range(start, end + 1))
+                else:
+                    pages.add(int(token))
+            except ValueError:
+                log.warning(f"Ignoring invalid page selection token: '{token}'")
+    else:
+        pages.update(int(p) for p in selection)
+
+    return sorted(p for p in pages if 1 <= p <= page_count)
+
+
+def expand_work_units(file_paths, page_selection, page_counter):
+    """
+    Expands a list of files into (file_path, page_num) work units.
+
+    Args:
+        file_paths (list): Files to process, in display order.
+        page_selection (dict): Optional per-file selections, keyed by full
+            path or basename. Files without an entry get every page.
+        page_counter (callable): Returns the page count for a file path.
+    """
+    page_selection = page_selection or {}
+    units = []
+    for file_path in file_paths:
+        selection = page_selection.get(file_path, page_selection.get(os.path.basename(file_path)))
+        for page_num in parse_page_selection(selection, page_counter(file_path)):
+            units.append((file_path, page_num))
+    return units
+
+
+def chunk_work_units(work_units, max_pages):
+    """
+    Groups consecutive (file_path, page_num) units of the same file into
+    (file_path, (page_num, ...)) tasks of at most `max_pages` pages, so a
+    worker can read all of a task's pages from one open document.
+    """
+    max_pages = max(1, int(max_pages))
+    tasks = []
+    for file_path, page_num in work_units:
+        if tasks and tasks[-1][0] == file_path and len(tasks[-1][1]) < max_pages:
+            tasks[-1][1].append(page_num)
+        else:
+            tasks.append((file_path, [page_num]))
+    return [(file_path, tuple(pages)) for file_path, pages in tasks]
+
+
+def resolve_worker_count(configured):
+    """Returns the number of pool workers to use. 0 or None means one per CPU core."""
+    try:
+        workers = int(configured or 0)
+    except (TypeError, ValueError):
+        workers = 0
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, workers)
+
+
+def iter_ordered_results(executor, fn, work_units, max_in_flight, should_stop=None, finish_started=False):
+    """
+    Submits work units to an executor and yields (unit, result) pairs in
+    submission order. At most `max_in_flight` units are queued at a time,
+    so memory stays bounded on very large batches.
+
+    Args:
+        executor: A concurrent.futures executor.
+        fn (callable): A picklable function taking a single work unit.
+        work_units (iterable): The units to process.
+        max_in_flight (int): The submission window size.
+        should_stop (callable): Optional; when it returns True, no further
+            units are submitted and pending ones are cancelled.
+        finish_started (bool): On stop, still yield the units that had
+            already started or finished (waiting for the running ones),
+            for work whose effects persist, such as copied files.
+    """
+    pending = deque()
+    units = iter(work_units)
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            if should_stop and should_stop():
+                exhausted = True
+                break
+            unit = next(units, None)
+            if unit is None:
+                exhausted = True
+                break
+            pending.append((unit, executor.submit(fn, unit)))
+
+        if not pending:
+            return
+        if should_stop and should_stop():
+            started = [(unit, future) for unit, future in pending if not future.cancel()]
+            if finish_started:
+                for unit, future in started:
+                    yield unit, future.result()
+            return
+
+        unit, future = pending.popleft()
+        yield unit, future.result()
@@ -2,6 +2,7 @@
 
 import json
 import os
+import shutil
 from utils.logger import log
 
 class ConfigManager:
@@ -28,7 +29,38 @@ class ConfigManager:
             "template_match_threshold": 0.6,
             "windows_ocr_lang": "en-US",
             "tesseract_psm": "3",
-            "tesseract_oem": "3"
+            "tesseract_oem": "3",
+            "max_workers": 0,
+            "pages_per_task": 8,
+            "max_open_documents": 16,
+            "text_parser_engine": "regex",
+            "page_text_cache_mb": 512,
+            "ocr_cache_mb": 256,
+            "ocr_cache_memory_items": 4096,
+            "snip_search_margin_px": 100,
+            "tesseract_backend": "auto",
+            "layout_tesseract_psm": "3",
+            "native_text_first": True,
+            "native_text_min_chars": 20,
+            "viewer_cache_mb": 256,
+            "viewer_prefetch_pages": 2,
+            "viewer_tile_cache_mb": 128,
+            "viewer_max_dpi": 600,
+            "thumbnail_cache_mb": 64,
+            "result_batch_rows": 200,
+            "result_batch_interval_ms": 100,
+            "stream_export_format": "",
+            "session_pack_workers": 0,
+            "import_workers": 8,
+            "import_link_sources": False,
+            "watch_poll_interval_ms": 1000,
+            "watch_settle_ms": 2000,
+            "watch_debounce_ms": 500,
+            "watch_max_wait_ms": 2000,
+            "watch_batch_files": 50,
+            "watch_workers": 0,
+            "watch_export_format": "csv",
+            "watch_skip_existing": False
         }
 
     def _load_config(self):
@@ -71,6 +103,26 @@ class ConfigManager:
             except OSError as e:
                 log.error(f"Failed to create directory {dir_path}: {e}")
 
+    def get_cache_dir(self, name):
+        """Returns the path of a named cache inside the workspace cache directory."""
+        return os.path.join(self.get('workspace_dir', 'data'), 'cache', name)
+
+    def clear_cache(self):
+        """Removes everything inside the workspace cache directory."""
+        cache_root = os.path.join(self.get('workspace_dir', 'data'), 'cache')
+        if not os.path.isdir(cache_root):
+            return
+        for name in os.listdir(cache_root):
+            path = os.path.join(cache_root, name)
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.unlink(path)
+            except OSError as e:
+                log.error(f"Failed to clear cache entry {path}: {e}")
+        log.info(f"Cleared workspace cache at {cache_root}")
+
     def get(self, key, default=None):
         """Gets a configuration value by key."""
         return self.config.get(key, default)
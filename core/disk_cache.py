@@ -0,0 +1,115 @@
+# ocr_tool_qt/core/disk_cache.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+from utils.logger import log
+
+class DiskCache:
+    """
+    A size-capped store of text (or bytes) values under a workspace cache directory.
+    Every entry is its own file, written atomically, so several worker
+    processes can share one cache. When the total size goes over
+    `max_bytes`, the least recently used entries (by file mtime, refreshed
+    on every hit) are deleted first.
+    """
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self._written_since_prune = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, key):
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name[:2], name)
+
+    def get(self, key):
+        """Returns the cached value for a key, or None on a miss."""
+        return self._read(key, binary=False)
+
+    def get_bytes(self, key):
+        """Returns the cached bytes for a key, or None on a miss."""
+        return self._read(key, binary=True)
+
+    def _read(self, key, binary):
+        path = self._entry_path(key)
+        try:
+            if binary:
+                with open(path, 'rb') as f:
+                    value = f.read()
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = f.read()
+            os.utime(path)  # Mark as recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            log.warning(f"Could not read cache entry {path}: {e}")
+            return None
+
+    def put(self, key, value):
+        """Stores a value, replacing any existing entry for the key."""
+        self._write(key, value)
+
+    def put_bytes(self, key, data):
+        """Stores bytes, replacing any existing entry for the key."""
+        self._write(key, data)
+
+    def _write(self, key, value):
+        path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            if isinstance(value, bytes):
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(value)
+            else:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning(f"Could not write cache entry {path}: {e}")
+            return
+
+        # Prune once roughly a tenth of the budget has been written
+        self._written_since_prune += len(value)
+        if self._written_since_prune > self.max_bytes // 10:
+            self.prune()
+
+    def prune(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        self._written_since_prune = 0
+        entries = []
+        total = 0
+        for sub_entry in os.scandir(self.cache_dir):
+            if not sub_entry.is_dir():
+                continue
+            for entry in os.scandir(sub_entry.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        log.info(f"Pruned {removed} entries from cache {self.cache_dir}.")
+
+    def clear(self):
+        """Deletes every entry."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
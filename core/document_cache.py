@@ -0,0 +1,74 @@
+# ocr_tool_qt/core/document_cache.py
+
+import os
+from collections import OrderedDict
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+from utils.logger import log
+
+class DocumentCache:
+    """
+    Keeps recently used PyMuPDF documents open so that a batch opens and
+    parses each PDF once instead of once per page. Handles are keyed by
+    path, evicted least-recently-used first, and bounded by `max_open`.
+    A document is reopened if its file changed on disk.
+    """
+    def __init__(self, max_open=16):
+        self.max_open = max(1, int(max_open))
+        self._docs = OrderedDict()  # path -> (mtime, fitz.Document)
+
+    def get(self, path):
+        """Returns an open document for the path, opening it if needed."""
+        if not PYMUPDF_AVAILABLE:
+            raise RuntimeError("PyMuPDF is not available.")
+
+        mtime = os.path.getmtime(path)
+        entry = self._docs.get(path)
+        if entry is not None:
+            cached_mtime, doc = entry
+            if cached_mtime == mtime:
+                self._docs.move_to_end(path)
+                return doc
+            self._close(path)
+
+        doc = fitz.open(path)
+        self._docs[path] = (mtime, doc)
+        while len(self._docs) > self.max_open:
+            oldest_path = next(iter(self._docs))
+            self._close(oldest_path)
+        return doc
+
+    def get_page_texts(self, path, page_nums, mode="text"):
+        """
+        Extracts the text of several pages in one pass over the document.
+
+        Returns:
+            A dict of page_num -> text. Pages beyond the end of the
+            document are left out.
+        """
+        doc = self.get(path)
+        texts = {}
+        for page_num in page_nums:
+            if 1 <= page_num <= doc.page_count:
+                texts[page_num] = doc.load_page(page_num - 1).get_text(mode)
+        return texts
+
+    def _close(self, path):
+        _, doc = self._docs.pop(path)
+        try:
+            doc.close()
+        except Exception as e:
+            log.warning(f"Failed to close document {path}: {e}")
+
+    def close_all(self):
+        """Closes every cached document."""
+        for path in list(self._docs):
+            self._close(path)
+
+    def __len__(self):
+        return len(self._docs)
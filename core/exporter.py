@@ -0,0 +1,194 @@
+# ocr_tool_qt/core/exporter.py
+
+import csv
+import os
+from datetime import datetime
+
+try:
+    from openpyxl import Workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+from core.arrow_results import PYARROW_AVAILABLE, RECORD_BATCH_ROWS, results_schema, rows_to_record_batch
+from utils.logger import log
+
+if PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+EXPORT_FORMATS = ('csv', 'xlsx', 'parquet', 'arrow')
+# Rows per worksheet in an .xlsx file, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+
+def result_columns(templates):
+    """
+    Returns the result columns for a set of templates: File and Page, then
+    the fields of the first text parser template, or else the names of the
+    visual snip templates.
+    """
+    columns = ["File", "Page"]
+    text_parser = next((t for t in templates if t.get('type') == 'text_parser'), None)
+    if text_parser:
+        columns.extend(field['column_name'] for field in text_parser.get('fields', []))
+    else:
+        columns.extend(t['name'] for t in templates if t.get('type') == 'visual')
+    return columns
+
+
+def make_export_path(exports_dir, export_format, prefix="results"):
+    """Returns a new timestamped file path in the exports dir for a format."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(exports_dir, f"{prefix}_{timestamp}.{export_format}")
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(exports_dir, f"{prefix}_{timestamp}_{counter}.{export_format}")
+        counter += 1
+    return path
+
+
+class CsvResultWriter:
+    """
+    Writes result rows to a UTF-8 CSV file as they arrive. Each batch is
+    flushed to disk, so the file can be opened while a run is in progress.
+    """
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.row_count = 0
+        # utf-8-sig lets Excel detect the encoding
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def write_rows(self, rows):
+        self._writer.writerows([row.get(name, '') for name in self.columns] for row in rows)
+        self._file.flush()
+        self.row_count += len(rows)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class ExcelResultWriter:
+    """
+    Writes result rows to an .xlsx file with openpyxl's write-only mode,
+    which streams rows to a temporary file instead of keeping cells in
+    memory. A new worksheet is started whenever one is full. The file is
+    only valid once the writer is closed.
+    """
+    def __init__(self, path, columns):
+        if not OPENPYXL_AVAILABLE:
+            raise RuntimeError("openpyxl is required for Excel export.")
+        self.path = path
+        self.columns = list(columns)
+        self.row_count = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._closed = False
+        self._add_sheet()
+
+    def _add_sheet(self):
+        sheet_number = len(self._workbook.worksheets) + 1
+        self._sheet = self._workbook.create_sheet("Results" if sheet_number == 1 else f"Results {sheet_number}")
+        self._sheet.append(self.columns)
+        self._sheet_rows = 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self._sheet_rows >= EXCEL_MAX_ROWS:
+                self._add_sheet()
+            self._sheet.append([row.get(name, '') for name in self.columns])
+            self._sheet_rows += 1
+        self.row_count += len(rows)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._workbook.save(self.path)
+
+
+class ArrowResultWriter:
+    """
+    Writes result rows to a columnar Parquet (zstd-compressed) or Arrow IPC
+    file. Rows are buffered into record batches of RECORD_BATCH_ROWS, so
+    small incoming batches do not produce tiny row groups; neither format
+    is readable before the writer is closed. Page numbers are stored as
+    integers and every other column as text.
+    """
+    def __init__(self, path, columns, file_format='parquet'):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("pyarrow is required for Parquet and Arrow export.")
+        self.path = path
+        self.columns = list(columns)
+        self.row_count = 0
+        self._schema = results_schema(self.columns)
+        self._sink = None
+        self._pending = []
+        if file_format == 'parquet':
+            self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(path, 'wb')
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+        self._closed = False
+
+    def write_rows(self, rows):
+        self._pending.extend(rows)
+        self.row_count += len(rows)
+        if len(self._pending) >= RECORD_BATCH_ROWS:
+            self._write_pending()
+
+    def _write_pending(self):
+        if self._pending:
+            self._writer.write_batch(rows_to_record_batch(self._pending, self._schema))
+            self._pending = []
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            try:
+                self._write_pending()
+            finally:
+                self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+
+
+def open_result_writer(path, columns):
+    """Opens a streaming result writer chosen by the file extension (.csv, .xlsx, .parquet or .arrow)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return CsvResultWriter(path, columns)
+    if extension == '.xlsx':
+        return ExcelResultWriter(path, columns)
+    if extension in ('.parquet', '.arrow'):
+        return ArrowResultWriter(path, columns, extension[1:])
+    raise ValueError(f"Unsupported export format: {extension}")
+
+
+def export_rows(path, columns, rows, batch_size=1000):
+    """
+    Exports an iterable of row dicts (e.g. ResultStore.iter_rows()) to a
+    CSV, Excel, Parquet or Arrow file in batches, without materialising
+    all rows.
+
+    Returns:
+        The number of rows written.
+    """
+    writer = open_result_writer(path, columns)
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_rows(batch)
+                batch = []
+        writer.write_rows(batch)
+    finally:
+        writer.close()
+    log.info(f"Exported {writer.row_count} rows to {path}")
+    return writer.row_count
@@ -0,0 +1,36 @@
+# ocr_tool_qt/core/file_hash.py
+
+import hashlib
+import os
+
+from core.memory_cache import SizedLRUCache
+
+_CHUNK_SIZE = 1024 * 1024
+# Digests remembered per process; the watch daemon sees new files for as long as it runs
+_MAX_MEMO_ENTRIES = 4096
+
+# Digests already computed in this process, keyed by
+# (path, size, mtime_ns) so a changed file is hashed again. Every entry
+# counts as one "byte", so the cache holds the most recent _MAX_MEMO_ENTRIES.
+_digest_memo = SizedLRUCache(_MAX_MEMO_ENTRIES)
+
+
+def file_sha256(path):
+    """Returns the hex SHA-256 of a file's content, memoized per file version."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _digest_memo.get(memo_key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        _digest_memo.put(memo_key, digest, 1)
+    return digest
+
+
+def remember_file_sha256(path, digest):
+    """Records a known digest for a file, e.g. one just extracted from a content-addressed blob."""
+    stat = os.stat(path)
+    _digest_memo.put((os.path.abspath(path), stat.st_size, stat.st_mtime_ns), digest, 1)
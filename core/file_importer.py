@@ -1,8 +1,13 @@
 # ocr_tool_qt/core/file_importer.py
 
 import os
-import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from core.batch_engine import resolve_worker_count, iter_ordered_results
+from core.folder_scanner import iter_folder_files, import_name, sniff_file_type
+from core.import_store import ImportStore
+from core.result_batcher import ResultBatcher
 from utils.logger import log
 
 class FileImporter(QObject):
@@ -10,9 +15,19 @@ class FileImporter(QObject):
     Worker object that handles copying files to the import directory
     in a background thread to prevent GUI freezes. This worker is
     designed to be persistent and reused for multiple import tasks.
+
+    Files are copied by a thread pool into a content-addressed ImportStore,
+    so identical files are stored once and same-named files do not
+    overwrite each other. Imported paths are emitted in submission order.
+    A folder import scans the folder while it copies, so the first files
+    arrive before the scan of a large tree is done.
     """
     # Signal to emit the path of each successfully imported file
     file_imported = pyqtSignal(str)
+
+    # Signal to emit the paths of imported files in batches; preferred
+    # over file_imported for large imports
+    files_imported = pyqtSignal(list)
     
     # Signal to emit when the entire batch of files has been processed
     import_finished = pyqtSignal()
@@ -20,62 +35,134 @@ class FileImporter(QObject):
     # Signal to emit if an error occurs during a file copy operation
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, imports_dir):
+    def __init__(self, imports_dir, max_workers=8, link_sources=False, batch_rows=200, batch_interval_ms=100):
         """
         Initializes the worker.
         Args:
             imports_dir (str): The target directory to copy files into.
+            max_workers (int): Copy threads; 0 means one per CPU core.
+                Copying is I/O bound, so more threads than cores pay off
+                on network shares.
+            link_sources (bool): Hard-link sources on the same filesystem
+                instead of copying them. Edits to the originals then
+                change the imports too.
+            batch_rows, batch_interval_ms: Batching of files_imported.
         """
         super().__init__()
         self.original_paths = []
         self.imports_dir = imports_dir
+        self.max_workers = max_workers
+        self.store = ImportStore(imports_dir, link_sources)
+        self.batch_rows = batch_rows
+        self.batch_interval_ms = batch_interval_ms
         self.is_stopped = False
+        # Totals of the last run: files, bytes, copied_bytes, deduplicated, skipped, failed, seconds
+        self.import_stats = {}
 
     def set_files_to_import(self, file_paths: list):
         """
         Sets the list of files for the next import run. This method is
         called from the main thread before starting the worker's task.
+        Files that are not supported documents (by content) are skipped by
+        the run, so callers such as drag and drop need not read them.
         """
         self.original_paths = file_paths
 
+    def set_folder_to_import(self, folder, include=(), exclude=(), recursive=True):
+        """
+        Sets a folder to import for the next run instead of a list of
+        files. Supported documents are found by content while the run
+        copies them (see folder_scanner.iter_folder_files).
+        """
+        self.original_paths = iter_folder_files(folder, include, exclude, recursive,
+                                                should_stop=lambda: self.is_stopped)
+
     @pyqtSlot()
     def stop(self):
         """Allows the import process to be stopped prematurely."""
         log.info("File import process stop requested.")
         self.is_stopped = True
 
+    def _import_one(self, original_path):
+        """
+        Pool task: imports one file. Returns (import path, stats), (None,
+        error), or (None, None) if the file is not a supported document.
+        """
+        try:
+            file_type = sniff_file_type(original_path)
+            if file_type is None:
+                return None, None
+            # Misnamed files get the extension of their actual type
+            return self.store.import_file(original_path, import_name(original_path, file_type))
+        except Exception as e:
+            return None, e
+
+    @staticmethod
+    def _exists(path):
+        if os.path.exists(path):
+            return True
+        log.error(f"Cannot import file, path does not exist: {path}")
+        return False
+
+    def _emit_imported(self, paths):
+        self.files_imported.emit(paths)
+        # Per-file signals cost a queued event each; only send them if used
+        if self.receivers(self.file_imported) > 0:
+            for path in paths:
+                self.file_imported.emit(path)
+
     @pyqtSlot()
     def run(self):
         """
-        The main task that runs in the background thread. It iterates through
-        the file paths and copies them to the import directory.
+        The main task that runs in the background thread. It copies the
+        files to the import directory on a thread pool.
         """
         # Reset the stop flag for the new run
         self.is_stopped = False
-        
-        log.info(f"Starting import for {len(self.original_paths)} files.")
-        for original_path in self.original_paths:
-            if self.is_stopped:
-                log.warning("Import process was stopped by user.")
-                break
-            
-            if not os.path.exists(original_path):
-                log.error(f"Cannot import file, path does not exist: {original_path}")
-                continue
-            
-            base_name = os.path.basename(original_path)
-            local_copy_path = os.path.join(self.imports_dir, base_name)
-            
-            try:
-                # Use copy2 to preserve metadata like modification time
-                shutil.copy2(original_path, local_copy_path)
-                log.info(f"Copied '{base_name}' to imports directory.")
-                # Signal that one file has been successfully imported
-                self.file_imported.emit(local_copy_path)
-            except Exception as e:
-                log.error(f"Could not copy '{base_name}' to imports directory: {e}", exc_info=True)
-                self.error_occurred.emit(f"Could not import '{base_name}': {e}")
-        
-        log.info("File import process finished.")
+        stats = {'files': 0, 'bytes': 0, 'copied_bytes': 0, 'deduplicated': 0, 'skipped': 0, 'failed': 0,
+                 'seconds': 0.0}
+        self.import_stats = stats
+        start = time.perf_counter()
+
+        if isinstance(self.original_paths, list):
+            log.info(f"Starting import for {len(self.original_paths)} files.")
+            workers = min(resolve_worker_count(self.max_workers), max(1, len(self.original_paths)))
+        else:
+            log.info("Starting import from a folder scan.")
+            workers = resolve_worker_count(self.max_workers)
+        # Checked as the paths are consumed, so a folder scan is not materialised
+        paths = (path for path in self.original_paths if self._exists(path))
+        batcher = ResultBatcher(self._emit_imported, self.batch_rows, self.batch_interval_ms)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import") as pool:
+            for original_path, (import_path, result) in iter_ordered_results(
+                    pool, self._import_one, paths, max_in_flight=workers * 4,
+                    should_stop=lambda: self.is_stopped, finish_started=True):
+                base_name = os.path.basename(original_path)
+                if import_path is None and result is None:
+                    stats['skipped'] += 1
+                    log.warning(f"Skipping '{base_name}': not a supported document.")
+                    continue
+                if import_path is None:
+                    stats['failed'] += 1
+                    log.error(f"Could not copy '{base_name}' to imports directory: {result}", exc_info=result)
+                    batcher.flush()  # Keep imports and errors in order
+                    self.error_occurred.emit(f"Could not import '{base_name}': {result}")
+                    continue
+                stats['files'] += 1
+                stats['bytes'] += result['bytes']
+                stats['copied_bytes'] += result['copied']
+                stats['deduplicated'] += result['deduplicated']
+                batcher.add(import_path)
+                if stats['files'] == 1:
+                    batcher.flush()  # Show the first file right away
+        batcher.flush()
+        if self.is_stopped:
+            log.warning("Import process was stopped by user.")
+
+        stats['seconds'] = elapsed = time.perf_counter() - start
+        rate = max(elapsed, 1e-6)
+        log.info(f"File import process finished: {stats['files']} files ({stats['deduplicated']} duplicates, "
+                 f"{stats['skipped']} skipped, {stats['failed']} failed), {stats['bytes'] / 1e6:.1f} MB in {elapsed:.2f}s with {workers} threads "
+                 f"({stats['files'] / rate:.0f} files/s, {stats['bytes'] / 1e6 / rate:.1f} MB/s).")
         # Signal that the entire batch is finished
         self.import_finished.emit()
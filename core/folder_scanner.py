@@ -0,0 +1,135 @@
+# ocr_tool_qt/core/folder_scanner.py
+
+import fnmatch
+import os
+
+# Leading bytes of the supported document types
+FILE_SIGNATURES = (
+    (b'%PDF-', 'pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'II*\x00', 'tiff'),
+    (b'MM\x00*', 'tiff'),
+    (b'BM', 'bmp'),
+)
+# Extensions accepted for each type; the first one is used when a file's
+# name does not match its content.
+TYPE_EXTENSIONS = {
+    'pdf': ('.pdf',),
+    'png': ('.png',),
+    'jpeg': ('.jpg', '.jpeg'),
+    'tiff': ('.tiff', '.tif'),
+    'bmp': ('.bmp',),
+}
+_SIGNATURE_SIZE = max(len(signature) for signature, _ in FILE_SIGNATURES)
+
+
+def sniff_file_type(path):
+    """Returns the document type of a file by its leading bytes ('pdf', 'png', ...), or None."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(_SIGNATURE_SIZE)
+    except OSError:
+        return None
+    for signature, file_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return file_type
+    return None
+
+
+def import_name(path, file_type=None):
+    """
+    Returns the name to import a file under: its own name, with the
+    extension of its actual type appended if the name does not already
+    carry one (the rest of the tool tells PDFs from images by extension).
+    """
+    base_name = os.path.basename(path)
+    file_type = file_type or sniff_file_type(path)
+    extensions = TYPE_EXTENSIONS.get(file_type)
+    if extensions and not base_name.lower().endswith(extensions):
+        return base_name + extensions[0]
+    return base_name
+
+
+def _match_parts(pattern_parts, path_parts):
+    """Matches path segments against glob segments; '**' stands for any number of segments."""
+    if not pattern_parts:
+        return not path_parts
+    if pattern_parts[0] == '**':
+        return any(_match_parts(pattern_parts[1:], path_parts[i:]) for i in range(len(path_parts) + 1))
+    return (bool(path_parts) and fnmatch.fnmatch(path_parts[0], pattern_parts[0])
+            and _match_parts(pattern_parts[1:], path_parts[1:]))
+
+
+def _matches(patterns, name, rel_path):
+    """
+    Globs without a '/' match the file name, others the path relative to
+    the scanned folder, where '*' does not cross folders and '**' does.
+    """
+    for pattern in patterns:
+        if '/' not in pattern:
+            if fnmatch.fnmatch(name, pattern):
+                return True
+        elif _match_parts(pattern.split('/'), rel_path.split('/')):
+            return True
+    return False
+
+
+def iter_folder_entries(root, include=(), exclude=(), recursive=True, should_stop=None):
+    """
+    Yields an os.DirEntry for every regular file below a folder that
+    passes the globs, as the folder is scanned. Directories are listed
+    with os.scandir and walked depth-first; files come in directory order,
+    without waiting for the whole directory. Symlinked directories are not
+    followed. Arguments as for iter_folder_files().
+    """
+    include, exclude = tuple(include or ()), tuple(exclude or ())
+    pending = [(root, '')]
+    while pending:
+        folder, rel_folder = pending.pop()
+        subfolders = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if should_stop and should_stop():
+                        return
+                    rel_path = f"{rel_folder}{entry.name}"
+                    if _matches(exclude, entry.name, rel_path):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                subfolders.append((entry.path, f"{rel_path}/"))
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if include and not _matches(include, entry.name, rel_path):
+                        continue
+                    yield entry
+        except OSError:
+            pass  # Unreadable or removed during the scan; skip the rest of it
+        # Name order within each level, popped from the end of the stack
+        pending.extend(sorted(subfolders, reverse=True))
+
+
+def iter_folder_files(root, include=(), exclude=(), recursive=True, should_stop=None):
+    """
+    Yields the supported documents below a folder as it is scanned, so
+    the first files can be imported while the rest of a large tree is
+    still being read (see iter_folder_entries). Files are recognised by
+    content, so misnamed or extensionless scans are found and other files
+    are skipped.
+
+    Args:
+        root (str): The folder to scan.
+        include (iterable): Globs a file must match (any of); empty means all.
+        exclude (iterable): Globs of files and directories to skip.
+            Excluded directories are not descended into.
+        recursive (bool): Whether to scan subfolders.
+        should_stop (callable): Optional; the scan ends when it returns True.
+    """
+    for entry in iter_folder_entries(root, include, exclude, recursive, should_stop):
+        if sniff_file_type(entry.path):
+            yield entry.path
@@ -0,0 +1,71 @@
+# ocr_tool_qt/core/folder_watcher.py
+
+import time
+
+from core.folder_scanner import iter_folder_entries, sniff_file_type
+from utils.logger import log
+
+
+class FolderWatcher:
+    """
+    Finds documents that appear in a folder tree by polling it. A file is
+    reported once its size and modification time have stayed the same for
+    `settle_seconds`, so files that a scanner or a network copy is still
+    writing are not picked up half-written. A file that is replaced or
+    rewritten later is reported again. Polling works on network shares,
+    where change notifications often miss writes made by other machines.
+    """
+    def __init__(self, folder, include=(), exclude=(), recursive=True, settle_seconds=2.0, clock=time.monotonic):
+        self.folder = folder
+        self.include = tuple(include or ())
+        self.exclude = tuple(exclude or ())
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self._clock = clock
+        self._candidates = {}  # path -> ((size, mtime), when that signature was first seen)
+        self._reported = {}    # path -> (size, mtime) when it was reported or skipped
+
+    def skip_existing(self):
+        """Marks the files present now as seen, so that only new files are reported."""
+        for entry in iter_folder_entries(self.folder, self.include, self.exclude, self.recursive):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            self._reported[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        log.info(f"Watching {self.folder}: skipping {len(self._reported)} existing files.")
+
+    def poll(self):
+        """Scans the folder once; returns the documents that became stable since the last poll."""
+        now = self._clock()
+        ready = []
+        present = set()
+        for entry in iter_folder_entries(self.folder, self.include, self.exclude, self.recursive):
+            path = entry.path
+            present.add(path)
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Removed since it was listed
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._reported.get(path) == signature:
+                continue
+            candidate = self._candidates.get(path)
+            if candidate is None or candidate[0] != signature:
+                # New or still changing; the settle time starts over
+                self._candidates[path] = (signature, now)
+                continue
+            if stat.st_size == 0 or now - candidate[1] < self.settle_seconds:
+                continue
+            del self._candidates[path]
+            self._reported[path] = signature
+            if sniff_file_type(path):
+                ready.append(path)
+            else:
+                log.warning(f"Ignoring {path}: not a supported document.")
+
+        # Forget deleted files, so a new file with the same name is picked up
+        for seen in (self._candidates, self._reported):
+            for path in [path for path in seen if path not in present]:
+                del seen[path]
+        return ready
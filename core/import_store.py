@@ -0,0 +1,223 @@
+# ocr_tool_qt/core/import_store.py
+
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import uuid
+
+from core.file_hash import file_sha256, remember_file_sha256
+
+_CHUNK_SIZE = 1024 * 1024
+# ioctl request for a copy-on-write clone of a whole file (Btrfs, XFS, ...)
+_FICLONE = 0x40049409
+
+if sys.platform.startswith('linux'):
+    import fcntl
+else:
+    fcntl = None
+
+
+def _copy_file_range(src, dst):
+    """Copies a whole open file with os.copy_file_range; returns False if that is not possible."""
+    remaining = os.fstat(src.fileno()).st_size
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), min(remaining, 1 << 30))
+            if copied == 0:
+                return False
+            remaining -= copied
+    except OSError:
+        return False
+    return True
+
+
+def clone_or_copy(source, target, exclusive=False):
+    """
+    Copies a file, preferring ways that do not move the data through this
+    process: a copy-on-write clone, then an in-kernel copy_file_range
+    (server-side on NFS 4.2/SMB 3), then a regular copy. The modification
+    time is preserved like shutil.copy2 does. With `exclusive`, raises
+    FileExistsError instead of overwriting an existing target.
+
+    Returns:
+        'reflink', 'copy_file_range' or 'copy'.
+    """
+    method = 'copy'
+    with open(source, 'rb') as src, open(target, 'xb' if exclusive else 'wb') as dst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+                method = 'reflink'
+            except OSError:
+                pass
+        if method == 'copy' and hasattr(os, 'copy_file_range'):
+            if _copy_file_range(src, dst):
+                method = 'copy_file_range'
+            else:
+                # Start over; part of the file may have been copied
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+        if method == 'copy':
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+    shutil.copystat(source, target)
+    return method
+
+
+class ImportStore:
+    """
+    A content-addressed store for imported files. Every distinct content is
+    kept once under `<imports_dir>/.objects/<sha256><ext>`, and each import
+    gets a human-readable name in the imports dir that is a hard link to its
+    object (or a copy where hard links are not supported). Importing the
+    same content again does not copy it again; a different file with an
+    existing name is imported as "name (2).ext" instead of overwriting it.
+
+    Sources are never hard-linked into the store unless `link_sources` is
+    set, because editing the original would then change the import too.
+    Safe to use from several threads.
+    """
+    def __init__(self, imports_dir, link_sources=False):
+        self.imports_dir = imports_dir
+        self.objects_dir = os.path.join(imports_dir, '.objects')
+        self.link_sources = link_sources
+        self._lock = threading.Lock()
+        self._reserved = set()  # Import names being written by other threads
+        self._imported = {}     # (name, sha256) -> import path, for this store's imports
+        self._next_counter = {} # name -> first "name (n)" suffix not known to be taken
+
+    def import_file(self, source, name=None):
+        """
+        Imports a file, under `name` if given and otherwise its own name.
+
+        Returns:
+            (import path, stats) where stats holds 'bytes' (file size),
+            'copied' (bytes actually written), 'method' and 'deduplicated'.
+        """
+        if not os.path.isdir(self.objects_dir):
+            # New, or emptied by renaming it away when a session was opened
+            os.makedirs(self.objects_dir, exist_ok=True)
+            with self._lock:
+                self._imported.clear()
+                self._next_counter.clear()
+        source_stat = os.stat(source)
+        size = source_stat.st_size
+        ext = os.path.splitext(name or source)[1].lower()
+        if source_stat.st_dev == os.stat(self.objects_dir).st_dev:
+            # Local: hashing first avoids writing content the store already has
+            digest = file_sha256(source)
+            object_path = self._object_path(digest, ext)
+            if os.path.exists(object_path):
+                method, copied = 'deduplicated', 0
+            else:
+                method, copied = self._store_local(source, object_path), size
+        else:
+            # Remote: read the source once, hashing while copying
+            digest, object_path, method = self._store_remote(source, ext)
+            copied = 0 if method == 'deduplicated' else size
+
+        import_path = self._link_import(name or os.path.basename(source), object_path, digest)
+        remember_file_sha256(import_path, digest)
+        return import_path, {'bytes': size, 'copied': copied, 'method': method,
+                             'deduplicated': method == 'deduplicated'}
+
+    def _object_path(self, digest, ext):
+        return os.path.join(self.objects_dir, f"{digest}{ext}")
+
+    def _tmp_path(self):
+        return os.path.join(self.objects_dir, f".tmp-{uuid.uuid4().hex}")
+
+    def _store_local(self, source, object_path):
+        tmp_path = self._tmp_path()
+        try:
+            method = None
+            if self.link_sources:
+                try:
+                    os.link(source, tmp_path)
+                    method = 'hardlink'
+                except OSError:
+                    pass
+            if method is None:
+                method = clone_or_copy(source, tmp_path)
+            os.replace(tmp_path, object_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return method
+
+    def _store_remote(self, source, ext):
+        tmp_path = self._tmp_path()
+        sha = hashlib.sha256()
+        try:
+            with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(_CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    dst.write(chunk)
+            shutil.copystat(source, tmp_path)
+            digest = sha.hexdigest()
+            object_path = self._object_path(digest, ext)
+            if os.path.exists(object_path):
+                return digest, object_path, 'deduplicated'
+            os.replace(tmp_path, object_path)
+            return digest, object_path, 'copy'
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def _link_import(self, base_name, object_path, digest):
+        """Gives an object its import name, reusing an existing import of the same content."""
+        stem, ext = os.path.splitext(base_name)
+        with self._lock:
+            import_path = self._imported.get((base_name, digest))
+            if import_path and os.path.exists(import_path):
+                return import_path
+        first_unchecked = 1  # Names below it hold other content
+        while True:
+            existing = None
+            with self._lock:
+                # Names below the counter were checked before; without it, many
+                # files sharing a name would make each import probe all of them
+                counter = max(first_unchecked, self._next_counter.get(base_name, 1))
+                while True:
+                    name = base_name if counter == 1 else f"{stem} ({counter}){ext}"
+                    import_path = os.path.join(self.imports_dir, name)
+                    if import_path not in self._reserved:
+                        if os.path.exists(import_path):
+                            existing = import_path
+                        else:
+                            self._reserved.add(import_path)
+                            self._next_counter[base_name] = counter + 1
+                        break
+                    counter += 1
+            if existing:
+                # Hashed without holding the lock, which the other import threads need
+                if file_sha256(existing) == digest:
+                    with self._lock:
+                        self._imported[(base_name, digest)] = existing
+                    return existing
+                first_unchecked = counter + 1
+                with self._lock:
+                    self._next_counter[base_name] = max(first_unchecked, self._next_counter.get(base_name, 1))
+                continue
+            try:
+                # Both ways fail rather than replace a file that appeared meanwhile,
+                # e.g. written by another importer on the same directory
+                try:
+                    os.link(object_path, import_path)
+                except FileExistsError:
+                    raise
+                except OSError:
+                    clone_or_copy(object_path, import_path, exclusive=True)
+            except FileExistsError:
+                # Taken; check it like any other existing name
+                with self._lock:
+                    self._next_counter[base_name] = min(counter, self._next_counter.get(base_name, counter))
+                continue
+            finally:
+                with self._lock:
+                    self._reserved.discard(import_path)
+            with self._lock:
+                self._imported[(base_name, digest)] = import_path
+            return import_path
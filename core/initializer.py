@@ -23,6 +23,8 @@ class AppInitializer(QObject):
         try:
             log.info("Background initialization started...")
             config = ConfigManager()
+            if config.get('clear_cache_on_startup', False):
+                config.clear_cache()
             templates = TemplateManager(config)
             session = SessionManager(config)
             log.info("Background initialization finished successfully.")
@@ -0,0 +1,195 @@
+# ocr_tool_qt/core/label_matcher.py
+
+import re
+
+# Labels shorter than this are not worth prefiltering.
+MIN_LABEL_LENGTH = 3
+
+# Characters with a meaning of their own in a regex, outside of escapes.
+_SPECIAL_CHARS = frozenset('.^$*+?{}[]|()\\')
+_QUANTIFIERS = frozenset('*+?{')
+
+# Lazily built string of every character that may be a case variant of another.
+_cased_candidates = None
+
+
+def _get_cased_candidates():
+    global _cased_candidates
+    if _cased_candidates is None:
+        # Every cased character in Unicode lies below U+20000.
+        _cased_candidates = ''.join(map(chr, range(0xD800))) + ''.join(map(chr, range(0xE000, 0x20000)))
+    return _cased_candidates
+
+
+def _case_classes(chars):
+    """
+    Maps each character to the set of characters re.IGNORECASE treats as
+    equal to it (e.g. 's' to {'s', 'S', 'ſ'}), found by asking the re
+    module itself.
+    """
+    chars = ''.join(chars)
+    candidates = set(re.findall(f"[{re.escape(chars)}]", _get_cased_candidates() + chars, re.IGNORECASE))
+    classes = {}
+    for ch in chars:
+        same = re.compile(re.escape(ch), re.IGNORECASE)
+        classes[ch] = frozenset(x for x in candidates if same.fullmatch(x)) | {ch}
+    return classes
+
+
+def _has_top_level_alternation(source):
+    """True if a regex source contains a '|' outside of groups and character classes."""
+    depth = 0
+    i = 0
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if ch == '[':
+            # Skip the class; a ']' right after '[' or '[^' is a literal
+            i += 2 if source[i + 1:i + 2] == '^' else 1
+            i += 1 if source[i:i + 1] == ']' else 0
+            while i < len(source) and source[i] != ']':
+                i += 2 if source[i] == '\\' else 1
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+
+def literal_label(pattern):
+    """
+    Returns the literal text every match of a compiled pattern must start
+    with (e.g. "1. GSTIN" for r"1\\. GSTIN\\s*(\\S+)"), or "" if the pattern
+    has no usable literal prefix. Only plain characters and escaped
+    punctuation count; the prefix ends at the first other construct.
+    """
+    source = pattern.pattern
+    if not isinstance(source, str) or pattern.flags & re.VERBOSE or _has_top_level_alternation(source):
+        return ""
+    chars = []
+    i = 0
+    while i < len(source):
+        ch = source[i]
+        if ch == '\\':
+            escaped = source[i + 1:i + 2]
+            if not escaped or escaped.isalnum() or escaped == '_':
+                break  # A class such as \s, a back-reference or an escape like \n
+            ch, step = escaped, 2
+        elif ch in _SPECIAL_CHARS:
+            break
+        else:
+            step = 1
+        if source[i + step:i + step + 1] in _QUANTIFIERS:
+            break  # The character is optional or repeated
+        chars.append(ch)
+        i += step
+    label = ''.join(chars)
+    return label if len(label) >= MIN_LABEL_LENGTH else ""
+
+
+def _label_scanner(labels):
+    """
+    Builds one regex that matches any of `labels` the way re.IGNORECASE
+    compares them. The labels are factored into a trie with one branch per
+    case class, so the scan follows one branch per character, and each
+    label end is marked with an empty group tried after the longer labels
+    through it; the group that matched names the longest label at a
+    position. The first character is spelled out per variant instead of
+    using re.IGNORECASE, which lets re skip positions that start no label.
+
+    Returns:
+        (compiled regex, {group index: indexes of the labels found when it matched}).
+    """
+    classes = _case_classes(set(''.join(labels)))
+    root = {}
+    for index, label in enumerate(labels):
+        node = root
+        for ch in label:
+            node = node.setdefault(classes[ch], {})
+        node.setdefault(None, []).append(index)
+
+    group_labels = {}
+
+    def build(node, found):
+        found = found + node.get(None, [])
+        branches = []
+        for variants, child in node.items():
+            if variants is None:
+                continue
+            chars = ''.join(map(re.escape, sorted(variants)))
+            branches.append((chars if len(variants) == 1 else f"[{chars}]") + build(child, found))
+        if None in node:
+            group_labels[len(group_labels) + 1] = tuple(found)
+            branches.append('()')
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    source = '|'.join(re.escape(first) + build(child, []) for variants, child in root.items()
+                      for first in sorted(variants))
+    return re.compile(source, re.DOTALL), group_labels
+
+
+class LabelMatcher:
+    """
+    Finds the matches of many field patterns that are anchored on literal
+    labels such as "Financial Year" or "1. GSTIN". One combined regex scan
+    of the page finds where every label occurs, and each field's capture
+    regex is only tried at its label's positions instead of at every
+    position of the page.
+
+    Results are identical to calling `pattern.search(text)` per pattern:
+    every match of a labelled pattern starts with its label, the scan
+    matches labels at least as loosely as the pattern does, and positions
+    are tried from left to right.
+    """
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (list): Compiled patterns, or None for fields that
+                have no pattern to run.
+        """
+        self._patterns = tuple(patterns)
+        self._label_ids = []  # Per pattern: index into self._labels, or None
+        distinct = {}
+        for pattern in self._patterns:
+            label = literal_label(pattern) if pattern is not None else ""
+            self._label_ids.append(distinct.setdefault(label, len(distinct)) if label else None)
+        self._labels = list(distinct)
+        self._scanner = None  # Built on first use
+
+    def _label_positions(self, text):
+        """Returns, per label, the positions where it occurs in the page, in order."""
+        if self._scanner is None:
+            self._scanner = _label_scanner(self._labels)
+        scanner, group_labels = self._scanner
+        positions = [[] for _ in self._labels]
+        hit = scanner.search(text)
+        while hit:
+            start = hit.start()
+            for index in group_labels[hit.lastindex]:
+                positions[index].append(start)
+            # Labels may overlap, so the next one can start right after this one's start
+            hit = scanner.search(text, start + 1)
+        return positions
+
+    def search_all(self, text):
+        """Returns one match object (or None) per pattern, in pattern order."""
+        positions = self._label_positions(text) if self._labels else None
+        matches = []
+        for pattern, label_id in zip(self._patterns, self._label_ids):
+            if pattern is None:
+                matches.append(None)
+            elif label_id is None:
+                matches.append(pattern.search(text))
+            else:
+                match = None
+                for pos in positions[label_id]:
+                    match = pattern.match(text, pos)
+                    if match:
+                        break
+                matches.append(match)
+        return matches
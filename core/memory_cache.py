@@ -0,0 +1,64 @@
+# ocr_tool_qt/core/memory_cache.py
+
+import threading
+from collections import OrderedDict
+
+class SizedLRUCache:
+    """
+    A thread-safe in-memory LRU cache bounded by the total size of its
+    values in bytes rather than by item count. Callers pass each value's
+    size in; the least recently used entries are evicted once the budget
+    is exceeded. A value larger than the whole budget is not cached.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max(0, int(max_bytes))
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for a key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        """Stores a value of `size` bytes, evicting old entries as needed."""
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max(0, int(max_bytes))
+            while self.total_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def discard(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
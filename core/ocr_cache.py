@@ -0,0 +1,76 @@
+# ocr_tool_qt/core/ocr_cache.py
+
+import hashlib
+from collections import OrderedDict
+from core.disk_cache import DiskCache
+
+class OcrResultCache:
+    """
+    Memoizes OCR output for image crops. Keys combine a hash of the crop's
+    pixel buffer with the engine settings (engine, lang, psm, oem,
+    whitelist), so an unchanged snip never reaches the OCR engine twice.
+    An in-memory LRU sits in front of a DiskCache in the workspace cache dir.
+    """
+    def __init__(self, cache_dir, max_bytes, memory_items=4096):
+        self._store = DiskCache(cache_dir, max_bytes)
+        self._memory = OrderedDict()
+        self.memory_items = max(0, int(memory_items))
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(image, settings):
+        """
+        Builds the cache key for an image crop.
+
+        Args:
+            image: A NumPy array or a PIL image.
+            settings (tuple): The engine settings that affect the result.
+        """
+        sha = hashlib.sha256()
+        if hasattr(image, 'shape'):  # NumPy array (possibly a view)
+            sha.update(f"{image.shape}{image.dtype.str}".encode())
+        else:  # PIL image
+            sha.update(f"{image.mode}{image.size}".encode())
+        sha.update(image.tobytes())
+        sha.update(repr(settings).encode())
+        return sha.hexdigest()
+
+    def get(self, key):
+        """Returns the cached text for a key, or None on a miss."""
+        text = self._memory.get(key)
+        if text is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return text
+
+        text = self._store.get(key)
+        if text is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(key, text)
+        return text
+
+    def put(self, key, text):
+        """Stores the OCR text for a key in memory and on disk."""
+        self._remember(key, text)
+        self._store.put(key, text)
+
+    def _remember(self, key, text):
+        if not self.memory_items:
+            return
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def take_stats(self):
+        """Returns the hit/miss counters since the last call and resets them."""
+        stats = {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits, 'misses': self.misses}
+        self.memory_hits = self.disk_hits = self.misses = 0
+        return stats
+
+    def prune(self):
+        self._store.prune()
@@ -2,6 +2,10 @@
 
 import os
 import re
+import json
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import cv2
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QThread
@@ -28,8 +32,34 @@ try:
 except ImportError:
     WINRT_AVAILABLE = False
 
+from core.batch_engine import expand_work_units, chunk_work_units, resolve_worker_count, iter_ordered_results
+from core.result_batcher import ResultBatcher, Throttle
+from core.exporter import EXPORT_FORMATS, result_columns, make_export_path, open_result_writer
+from core.document_cache import DocumentCache
+from core.page_text_cache import PageTextCache
+from core.ocr_cache import OcrResultCache
+from core.tesseract_pool import TesseractApiPool, TESSEROCR_AVAILABLE
+from core.word_index import Word, WordGrid, words_from_tesseract_data
+from core.text_layer import read_text_layer, count_text_chars, is_native_text, text_layer_words
+from core.file_hash import file_sha256
 from utils.logger import log
 
+# Characters Tesseract may return for snips marked 'numeric_optimize'.
+NUMERIC_WHITELIST = '0123456789.,$€£¥'
+
+# Whether the missing tesserocr package has been logged in this process
+_subprocess_fallback_logged = False
+
+
+def _log_subprocess_fallback():
+    """Warns once per process that Tesseract runs as one subprocess per snip because tesserocr is missing."""
+    global _subprocess_fallback_logged
+    if TESSEROCR_AVAILABLE or _subprocess_fallback_logged:
+        return
+    _subprocess_fallback_logged = True
+    log.warning("tesserocr is not installed; running one Tesseract process per snip, which is much slower. "
+                "Install tesserocr to keep Tesseract engines loaded between snips.")
+
 class OcrProcessor(QObject):
     """
     Worker object that performs OCR processing in a separate thread.
@@ -39,7 +69,9 @@ class OcrProcessor(QObject):
     progress_updated = pyqtSignal(int, int)  # current, total
     processing_finished = pyqtSignal()
     result_ready = pyqtSignal(dict) # Emits one row of results at a time
+    results_ready = pyqtSignal(list) # Emits rows in batches; preferred for large runs
     error_occurred = pyqtSignal(str)
+    export_finished = pyqtSignal(str) # Path of the file results were streamed to
 
     def __init__(self, config_manager, template_manager):
         super().__init__()
@@ -51,20 +83,70 @@ class OcrProcessor(QObject):
         self.templates_to_use = []
         self.page_selection = {}
         self.ocr_engine = "none"
+        # "per_snip" OCRs every snip crop; "page_layout" OCRs each page once
+        # and fills snips from the recognised word boxes.
+        self.snip_ocr_mode = "per_snip"
+        # "csv", "xlsx", "parquet" or "arrow" streams rows into the workspace exports dir during a run
+        self.export_format = self.config_manager.get("stream_export_format", "")
+        self._export_writer = None
+        self._visual_snips = None
+        self.document_cache = DocumentCache(self.config_manager.get("max_open_documents", 16))
+
+        cache_mb = self.config_manager.get("page_text_cache_mb", 512)
+        self.page_text_cache = None
+        if cache_mb:
+            self.page_text_cache = PageTextCache(self.config_manager.get_cache_dir('page_text'), cache_mb * 1024 * 1024)
+
+        ocr_cache_mb = self.config_manager.get("ocr_cache_mb", 256)
+        self.ocr_cache = None
+        if ocr_cache_mb:
+            self.ocr_cache = OcrResultCache(
+                self.config_manager.get_cache_dir('ocr'), ocr_cache_mb * 1024 * 1024,
+                self.config_manager.get("ocr_cache_memory_items", 4096)
+            )
+        # OCR cache hits/misses and native/OCR page routing counts for the
+        # last run, summed over all workers
+        self.batch_stats = {}
+        self._shared_executor = None  # (executor, workers); see share_executor
+        self._native_text_pages = 0
+        self._ocr_pages = 0
+
+        tesseract_cmd = self.config_manager.get("tesseract_cmd")
+        if TESSERACT_AVAILABLE and tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+        # Persistent in-process Tesseract engines when tesserocr is installed;
+        # "subprocess" forces one pytesseract call per image.
+        self.tesseract_pool = None
+        if TESSEROCR_AVAILABLE and self.config_manager.get("tesseract_backend", "auto") != "subprocess":
+            tessdata_path = None
+            if tesseract_cmd and os.path.isdir(os.path.join(os.path.dirname(tesseract_cmd), 'tessdata')):
+                tessdata_path = os.path.join(os.path.dirname(tesseract_cmd), 'tessdata')
+            self.tesseract_pool = TesseractApiPool(tessdata_path, self.config_manager.get("ocr_dpi", 300))
 
     @pyqtSlot()
     def stop(self):
         """Stops the processing loop."""
         log.info("OCR processing stop requested.")
         self.is_stopped = True
+
+    def close(self):
+        """Shuts down the pooled Tesseract engines and closes open documents; both reopen on demand."""
+        if self.tesseract_pool is not None:
+            self.tesseract_pool.close()
+        self.document_cache.close_all()
         
     def _post_process_ocr_text(self, text):
         """Cleans up extracted OCR text."""
         return ' '.join(text.replace('\n', ' ').replace('\r', ' ').split())
 
     def _perform_tesseract_ocr(self, image, snip_config):
-        """Performs OCR on an image crop using Tesseract."""
-        if not TESSERACT_AVAILABLE:
+        """
+        Performs OCR on an image crop using Tesseract. Results are memoized
+        in the OCR cache by crop pixels and engine settings. Pooled tesserocr
+        engines are used when available, pytesseract otherwise.
+        """
+        if not TESSERACT_AVAILABLE and self.tesseract_pool is None:
             return "[Tesseract N/A]"
         try:
             psm = self.config_manager.get("tesseract_psm", "3")
@@ -72,11 +154,27 @@ class OcrProcessor(QObject):
             lang = self.config_manager.get("tesseract_lang", "eng")
             custom_config = f'--psm {psm} --oem {oem}'
 
+            whitelist = ''
             if snip_config and snip_config.get('numeric_optimize', False):
-                custom_config += ' -c tessedit_char_whitelist=0123456789.,$€£¥'
+                whitelist = NUMERIC_WHITELIST
+                custom_config += f' -c tessedit_char_whitelist={whitelist}'
+
+            cache_key = None
+            if self.ocr_cache is not None:
+                cache_key = self.ocr_cache.make_key(image, ('tesseract', lang, psm, oem, whitelist))
+                cached_text = self.ocr_cache.get(cache_key)
+                if cached_text is not None:
+                    return cached_text
 
-            text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
-            return self._post_process_ocr_text(text)
+            if self.tesseract_pool is not None:
+                raw_text = self.tesseract_pool.image_to_string(image, lang, oem, psm, whitelist)
+            else:
+                _log_subprocess_fallback()
+                raw_text = pytesseract.image_to_string(image, lang=lang, config=custom_config)
+            text = self._post_process_ocr_text(raw_text)
+            if cache_key is not None:
+                self.ocr_cache.put(cache_key, text)
+            return text
         except Exception as e:
             log.error(f"Tesseract OCR failed: {e}", exc_info=True)
             return "[Tesseract Error]"
@@ -92,72 +190,586 @@ class OcrProcessor(QObject):
         log.warning("Windows OCR processing is a placeholder and not fully implemented in this refactor.")
         return "[Windows OCR Not Implemented]"
 
+    def _perform_ocr_batch(self, crops, snip_configs):
+        """Runs the selected OCR engine over a batch of crops from one page."""
+        if self.ocr_engine == "windows":
+            return [self._perform_windows_ocr(crop, cfg) for crop, cfg in zip(crops, snip_configs)]
+        return [self._perform_tesseract_ocr(crop, cfg) for crop, cfg in zip(crops, snip_configs)]
+
+    def _ocr_page_words(self, gray):
+        """
+        OCRs a whole page once with Tesseract's layout analysis and returns
+        its Words (boxes, text, confidences) in reading order, or None if
+        Tesseract is unavailable. Results are memoized in the OCR cache.
+        """
+        if not TESSERACT_AVAILABLE and self.tesseract_pool is None:
+            return None
+        psm = self.config_manager.get("layout_tesseract_psm", "3")
+        oem = self.config_manager.get("tesseract_oem", "3")
+        lang = self.config_manager.get("tesseract_lang", "eng")
+
+        cache_key = None
+        if self.ocr_cache is not None:
+            cache_key = self.ocr_cache.make_key(gray, ('tesseract-layout', lang, psm, oem))
+            cached = self.ocr_cache.get(cache_key)
+            if cached is not None:
+                return [Word(*fields) for fields in json.loads(cached)]
+
+        if self.tesseract_pool is not None:
+            words = self.tesseract_pool.image_to_words(gray, lang, oem, psm)
+        else:
+            _log_subprocess_fallback()
+            data = pytesseract.image_to_data(gray, lang=lang, config=f'--psm {psm} --oem {oem}',
+                                             output_type=pytesseract.Output.DICT)
+            words = words_from_tesseract_data(data)
+
+        if cache_key is not None:
+            self.ocr_cache.put(cache_key, json.dumps([list(word) for word in words]))
+        return words
+
+    def _fill_snips_from_layout(self, gray, boxes, snip_configs):
+        """Fills each snip box from the words of a single whole-page OCR pass."""
+        try:
+            words = self._ocr_page_words(gray)
+        except Exception as e:
+            log.error(f"Tesseract page layout OCR failed: {e}", exc_info=True)
+            return ["[Tesseract Error]"] * len(boxes)
+        if words is None:
+            return ["[Tesseract N/A]"] * len(boxes)
+        return self._fill_snips_from_words(words, boxes, snip_configs)
+
+    def _fill_snips_from_words(self, words, boxes, snip_configs):
+        """Fills each snip box with the words whose centre lies inside it."""
+        grid = WordGrid(words)
+        texts = []
+        for box, snip_config in zip(boxes, snip_configs):
+            text = grid.text_in(*box)
+            if snip_config.get('numeric_optimize', False):
+                # Emulates the per-snip character whitelist
+                tokens = (''.join(ch for ch in token if ch in NUMERIC_WHITELIST) for token in text.split())
+                text = ' '.join(token for token in tokens if token)
+            texts.append(text)
+        return texts
+
+    def _get_text_layer(self, pdf_path, page_num):
+        """
+        Returns the text layer (page size and word boxes in points) of a PDF
+        page, or None if the page does not exist. Layers are kept in the
+        persistent page-text cache, so re-runs route pages without opening
+        the document.
+        """
+        file_hash = None
+        if self.page_text_cache is not None:
+            file_hash = file_sha256(pdf_path)
+            layer = self.page_text_cache.get_text_layer(file_hash, page_num)
+            if layer is not None:
+                return layer
+
+        doc = self.document_cache.get(pdf_path)
+        if not 1 <= page_num <= doc.page_count:
+            return None
+        layer = read_text_layer(doc.load_page(page_num - 1))
+        if file_hash is not None:
+            self.page_text_cache.put_text_layer(file_hash, page_num, layer)
+        return layer
+
+    def _has_native_text(self, char_count):
+        """True if a page's text layer is dense enough to skip rasterising and OCR'ing it."""
+        return is_native_text(char_count, self.config_manager.get("native_text_min_chars", 20))
+
+    def _ocr_page_text(self, pdf_path, page_num):
+        """
+        Rasterises a PDF page without a usable text layer and OCRs it whole,
+        keeping line breaks for the text parser. Returns None if the page
+        does not exist or no OCR engine is selected.
+        """
+        if self.ocr_engine != "tesseract":
+            return None
+        if not TESSERACT_AVAILABLE and self.tesseract_pool is None:
+            raise RuntimeError("Tesseract is not available for OCR of pages without a text layer.")
+        gray = self._load_page_gray(pdf_path, page_num)
+        if gray is None:
+            return None
+        psm = self.config_manager.get("layout_tesseract_psm", "3")
+        oem = self.config_manager.get("tesseract_oem", "3")
+        lang = self.config_manager.get("tesseract_lang", "eng")
+
+        cache_key = None
+        if self.ocr_cache is not None:
+            cache_key = self.ocr_cache.make_key(gray, ('tesseract-page', lang, psm, oem))
+            cached = self.ocr_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if self.tesseract_pool is not None:
+            text = self.tesseract_pool.image_to_string(gray, lang, oem, psm)
+        else:
+            _log_subprocess_fallback()
+            text = pytesseract.image_to_string(gray, lang=lang, config=f'--psm {psm} --oem {oem}')
+        if cache_key is not None:
+            self.ocr_cache.put(cache_key, text)
+        return text
+
+    def _load_page_gray(self, path, page_num):
+        """
+        Decodes a page exactly once, straight into a single-channel uint8
+        NumPy array. PDF pages are rendered at 'ocr_dpi' in grayscale;
+        images are decoded by OpenCV in grayscale mode.
+        Returns None if the page does not exist.
+        """
+        if path.lower().endswith('.pdf'):
+            if not PYMUPDF_AVAILABLE:
+                raise RuntimeError("PyMuPDF is not available for rendering PDF pages.")
+            doc = self.document_cache.get(path)
+            if page_num > doc.page_count:
+                return None
+            dpi = int(self.config_manager.get("ocr_dpi", 300))
+            pix = doc.load_page(page_num - 1).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+            return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+
+        if page_num != 1:
+            return None
+        # np.fromfile + imdecode also copes with non-ASCII paths on Windows
+        gray = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError("Unsupported or corrupt image file.")
+        return gray
+
+    def _get_visual_snips(self):
+        """
+        Returns (template, anchor_patch) pairs for the visual templates in use.
+        Anchor patches are converted to grayscale once per batch, not per page.
+        """
+        if self._visual_snips is None:
+            snips = []
+            for template in self.templates_to_use:
+                if template.get('type', 'visual') != 'visual':
+                    continue
+                patch = template.get('image_np_array')
+                if patch is not None:
+                    patch = np.asarray(patch, dtype=np.uint8)
+                    if patch.ndim == 3:
+                        patch = cv2.cvtColor(patch, cv2.COLOR_RGB2GRAY)
+                    if not patch.size:
+                        patch = None
+                snips.append((template, patch))
+            self._visual_snips = snips
+        return self._visual_snips
+
+    def _locate_snip(self, gray, template, patch, tolerance, threshold, page_shape=None):
+        """
+        Finds the crop box (x1, y1, x2, y2) of a visual template on a page.
+        If the template has an anchor patch, cv2.matchTemplate searches for
+        it around the stored 'coords' (or on the whole page without coords)
+        and the best match above 'template_match_threshold' wins; otherwise
+        the stored coords are used. The box is widened by the dynamic box
+        tolerance and clipped to the page. Without a rendered page (`gray`
+        is None) the stored coords are clipped to `page_shape`.
+
+        'coords' and the anchor patch are in pixels of the page as it is
+        processed: rendered at 'ocr_dpi' for PDFs, native pixels for images.
+        The viewer shows PDF pages at 'pdf_preview_dpi', so a box drawn
+        there has to be scaled by ocr_dpi / preview_dpi before it is stored.
+        """
+        page_h, page_w = gray.shape if gray is not None else page_shape
+        coords = template.get('coords')
+        box = tuple(int(c) for c in coords) if coords else None
+
+        if patch is not None and gray is not None:
+            patch_h, patch_w = patch.shape
+            if box:
+                margin = int(self.config_manager.get("snip_search_margin_px", 100))
+                wx1, wy1 = max(0, box[0] - margin), max(0, box[1] - margin)
+                wx2, wy2 = min(page_w, box[2] + margin), min(page_h, box[3] + margin)
+            else:
+                wx1, wy1, wx2, wy2 = 0, 0, page_w, page_h
+            region = gray[wy1:wy2, wx1:wx2]  # A view into the shared page buffer
+            if region.shape[0] >= patch_h and region.shape[1] >= patch_w:
+                scores = cv2.matchTemplate(region, patch, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, max_loc = cv2.minMaxLoc(scores)
+                if max_val >= threshold:
+                    x, y = wx1 + max_loc[0], wy1 + max_loc[1]
+                    box = (x, y, x + patch_w, y + patch_h)
+
+        if not box:
+            return None
+        x1, y1, x2, y2 = box
+        x1, y1 = max(0, x1 - tolerance), max(0, y1 - tolerance)
+        x2, y2 = min(page_w, x2 + tolerance), min(page_h, y2 + tolerance)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return x1, y1, x2, y2
+
     def _process_page_with_visual_snips(self, image_path, page_num):
-        """Processes a single page/image using visual snip templates."""
-        # This function would contain the logic from the original script's
-        # _process_single_image_page_with_visual_snips, adapted for this class structure.
-        # It involves loading the image, finding template matches with OpenCV,
-        # cropping, and running the selected OCR engine.
-        pass # Placeholder for the detailed implementation
-
-    def _process_page_with_text_parser(self, pdf_path, page_num):
-        """Processes a single PDF page using a text parser template."""
+        """
+        Processes a single page/image using visual snip templates. PDF pages
+        with a usable text layer are not OCR'd: each snip is filled from the
+        native words clipped to its box, and the page is only rendered if an
+        anchor patch has to be located. Otherwise the page is decoded and
+        converted to grayscale once; every template is then matched against
+        that shared buffer, and the crops (zero-copy views) are OCR'd as one
+        batch. In "page_layout" mode the page is OCR'd once instead and each
+        snip is filled from the words inside its box.
+        Returns the row of results, or None.
+        """
+        snips = self._get_visual_snips()
+        if not snips:
+            return None
+
+        dpi = int(self.config_manager.get("ocr_dpi", 300))
+        native_words, page_shape = None, None
+        if image_path.lower().endswith('.pdf') and self.config_manager.get("native_text_first", True):
+            layer = self._get_text_layer(image_path, page_num)
+            if layer is None:
+                return None
+            if self._has_native_text(sum(len(word[4]) for word in layer['words'])):
+                native_words, page_shape = text_layer_words(layer, dpi)
+
+        gray = None
+        if native_words is None or any(patch is not None for _, patch in snips):
+            gray = self._load_page_gray(image_path, page_num)
+            if gray is None:
+                return None
+            page_shape = gray.shape
+        if native_words is None:
+            self._ocr_pages += 1
+        else:
+            self._native_text_pages += 1
+
+        tolerance = int(self.config_manager.get("dynamic_box_tolerance_px", 5))
+        threshold = float(self.config_manager.get("template_match_threshold", 0.6))
+
+        row_data = {'File': os.path.basename(image_path), 'Page': page_num}
+        names, boxes, snip_configs = [], [], []
+        for template, patch in snips:
+            box = self._locate_snip(gray, template, patch, tolerance, threshold, page_shape)
+            if box is None:
+                row_data[template['name']] = "[No Region]"
+                continue
+            names.append(template['name'])
+            boxes.append(box)
+            snip_configs.append(template)
+
+        if native_words is not None:
+            texts = self._fill_snips_from_words(native_words, boxes, snip_configs)
+        elif self.snip_ocr_mode == "page_layout" and self.ocr_engine != "windows":
+            texts = self._fill_snips_from_layout(gray, boxes, snip_configs)
+        else:
+            crops = [gray[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes]
+            texts = self._perform_ocr_batch(crops, snip_configs)
+        row_data.update(zip(names, texts))
+        return row_data
+
+    def _process_pages_with_text_parser(self, pdf_path, page_nums):
+        """
+        Processes several pages of one PDF using a text parser template. The
+        document is opened once (via the document cache) and all pages are
+        read in a single pass. Pages whose text layer is empty or too sparse
+        are rasterised and OCR'd instead when an OCR engine is selected.
+        Returns a (row_data, error_message) pair per page.
+        """
         if not PYMUPDF_AVAILABLE:
-            self.error_occurred.emit("PyMuPDF is not available for text parsing.")
+            raise RuntimeError("PyMuPDF is not available for text parsing.")
+
+        page_texts = self._get_page_texts(pdf_path, page_nums)
+        route_pages = self.config_manager.get("native_text_first", True)
+        for page_num, text in page_texts.items():
+            ocr_text = None
+            if route_pages and not self._has_native_text(count_text_chars(text)):
+                ocr_text = self._ocr_page_text(pdf_path, page_num)
+            if ocr_text is None:
+                self._native_text_pages += 1
+            else:
+                page_texts[page_num] = ocr_text
+                self._ocr_pages += 1
+
+        # Assuming the first text parser template is the one we want to use
+        parser_template = next(t for t in self.templates_to_use if t.get('type') == 'text_parser')
+
+        outcomes = []
+        for page_num in page_nums:
+            if page_num not in page_texts:
+                outcomes.append((None, None))
+                continue
+            try:
+                results = self.template_manager.apply_text_parser(parser_template['name'], page_texts[page_num])
+                row_data = {'File': os.path.basename(pdf_path), 'Page': page_num}
+                row_data.update(results)
+                outcomes.append((row_data, None))
+            except Exception as e:
+                log.error(f"Failed to parse PDF {pdf_path} page {page_num}: {e}", exc_info=True)
+                outcomes.append((None, f"Error processing {os.path.basename(pdf_path)} page {page_num}: {e}"))
+        return outcomes
+
+    def _get_page_texts(self, pdf_path, page_nums):
+        """
+        Returns a dict of page_num -> text for the requested pages. Pages found
+        in the persistent page-text cache are served from it; the document is
+        only opened if some pages are missing.
+        """
+        if self.page_text_cache is None:
+            return self.document_cache.get_page_texts(pdf_path, page_nums)
+
+        file_hash = file_sha256(pdf_path)
+        page_texts = {}
+        missing = []
+        for page_num in page_nums:
+            text = self.page_text_cache.get_text(file_hash, page_num)
+            if text is None:
+                missing.append(page_num)
+            else:
+                page_texts[page_num] = text
+
+        if missing:
+            for page_num, text in self.document_cache.get_page_texts(pdf_path, missing).items():
+                self.page_text_cache.put_text(file_hash, page_num, text)
+                page_texts[page_num] = text
+        return page_texts
+
+    def _count_pages(self, filepath):
+        """Returns the number of pages in a file. Images count as a single page."""
+        if not filepath.lower().endswith('.pdf') or not PYMUPDF_AVAILABLE:
+            return 1
+        try:
+            # Cheaper than hashing the whole file to look the count up in a cache
+            with fitz.open(filepath) as doc:
+                return doc.page_count
+        except Exception as e:
+            log.error(f"Could not read page count of {filepath}: {e}")
+            self.error_occurred.emit(f"Could not open {os.path.basename(filepath)}: {e}")
+            return 0
+
+    def process_pages(self, filepath, page_nums):
+        """
+        Processes a task of several pages of one file and returns a
+        (row_data, error_message) pair per page, in order. This never emits
+        signals, so it is safe to call inside a pool worker.
+        """
+        # Simple logic: if a text parser is defined, use it for PDFs.
+        # Otherwise, use visual snips.
+        is_pdf = filepath.lower().endswith('.pdf')
+        has_text_parser = any(t.get('type') == 'text_parser' for t in self.templates_to_use)
+
+        if is_pdf and has_text_parser:
+            try:
+                return self._process_pages_with_text_parser(filepath, page_nums)
+            except Exception as e:
+                log.error(f"Failed to process {filepath}: {e}", exc_info=True)
+                # Report the failure once for the task rather than once per page
+                error = f"Error processing {os.path.basename(filepath)}: {e}"
+                return [(None, error)] + [(None, None)] * (len(page_nums) - 1)
+
+        outcomes = []
+        for page_num in page_nums:
+            try:
+                outcomes.append((self._process_page_with_visual_snips(filepath, page_num), None))
+            except Exception as e:
+                log.error(f"Failed to process {filepath} page {page_num}: {e}", exc_info=True)
+                outcomes.append((None, f"Error processing {os.path.basename(filepath)} page {page_num}: {e}"))
+        return outcomes
+
+    def _iter_task_results(self, tasks):
+        """
+        Yields (task, outcomes) in task order, where outcomes holds one
+        (row_data, error) pair per page. Batches run on the shared process
+        pool if there is one, else on a process pool sized by the
+        'max_workers' setting; a single worker processes the tasks in this
+        thread.
+        """
+        if self._shared_executor is not None:
+            executor, workers = self._shared_executor
+        else:
+            executor, workers = None, min(resolve_worker_count(self.config_manager.get("max_workers", 0)), len(tasks))
+        if executor is None and workers <= 1:
+            try:
+                for task in tasks:
+                    if self.is_stopped:
+                        return
+                    yield task, self.process_pages(*task)
+            finally:
+                self.close()
+                self._add_batch_stats(self._take_batch_stats())
             return
 
+        owned = executor is None
+        if owned:
+            log.info(f"Starting process pool with {workers} workers.")
+            executor = self.make_batch_executor(workers)
         try:
-            doc = fitz.open(pdf_path)
-            if page_num > doc.page_count:
-                return
+            for task, (outcomes, batch_stats) in iter_ordered_results(
+                executor, _process_work_unit, tasks,
+                max_in_flight=workers * 4,
+                should_stop=lambda: self.is_stopped
+            ):
+                self._add_batch_stats(batch_stats)
+                yield task, outcomes
+        finally:
+            if owned:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def make_batch_executor(self, workers):
+        """
+        Returns a process pool whose workers are set up with this
+        processor's settings and templates. run() makes one per batch
+        unless share_executor() gave it one.
+        """
+        # 'spawn' keeps the Qt state of the GUI process out of the workers
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_batch_worker,
+            initargs=(self.config_manager, self.template_manager, self.templates_to_use,
+                      self.ocr_engine, self.snip_ocr_mode)
+        )
+
+    def share_executor(self, executor, workers):
+        """
+        Makes run() use a long-lived process pool from make_batch_executor()
+        (of `workers` processes) instead of starting one per batch, e.g.
+        for many small batches. The caller shuts it down; None reverts.
+        """
+        self._shared_executor = (executor, workers) if executor is not None else None
 
-            page = doc.load_page(page_num - 1)
-            full_text = page.get_text("text")
-            doc.close()
+    def _take_batch_stats(self):
+        """Returns this process's OCR cache and page routing counters since the last call."""
+        stats = self.ocr_cache.take_stats() if self.ocr_cache is not None else {}
+        stats['native_text_pages'] = self._native_text_pages
+        stats['ocr_pages'] = self._ocr_pages
+        self._native_text_pages = self._ocr_pages = 0
+        return stats
 
-            # Assuming the first template is the one we want to use
-            parser_template = self.templates_to_use[0]
-            results = self.template_manager.apply_text_parser(parser_template['name'], full_text)
-            
-            row_data = {'File': os.path.basename(pdf_path), 'Page': page_num}
-            row_data.update(results)
-            self.result_ready.emit(row_data)
+    def _add_batch_stats(self, stats):
+        for name, count in stats.items():
+            self.batch_stats[name] = self.batch_stats.get(name, 0) + count
 
+    def _emit_results(self, rows):
+        """Delivers a batch of rows; per-row signals are only sent if something listens for them."""
+        self.results_ready.emit(rows)
+        if self._export_writer is not None:
+            try:
+                self._export_writer.write_rows(rows)
+            except Exception as e:
+                log.error(f"Failed to write results to {self._export_writer.path}: {e}", exc_info=True)
+                self.error_occurred.emit(f"Export stopped: {e}")
+                self._close_export_writer()
+        if self.receivers(self.result_ready) > 0:
+            for row_data in rows:
+                self.result_ready.emit(row_data)
+
+    def _open_export_writer(self):
+        """Starts streaming this run's rows to a new file in the exports dir, if enabled."""
+        export_format = (self.export_format or "").lower().lstrip('.')
+        if not export_format:
+            return
+        if export_format not in EXPORT_FORMATS:
+            log.warning(f"Unknown export format '{self.export_format}', results will not be exported.")
+            return
+        exports_dir = os.path.join(self.config_manager.get('workspace_dir', 'data'), 'exports')
+        path = make_export_path(exports_dir, export_format)
+        try:
+            self._export_writer = open_result_writer(path, result_columns(self.templates_to_use))
+            log.info(f"Streaming results to {path}")
+        except Exception as e:
+            log.error(f"Could not start export to {path}: {e}")
+            self.error_occurred.emit(f"Could not start export: {e}")
+
+    def _close_export_writer(self):
+        """Finishes the streamed export file; returns its path, or None if it could not be written."""
+        writer, self._export_writer = self._export_writer, None
+        if writer is None:
+            return None
+        try:
+            writer.close()
         except Exception as e:
-            log.error(f"Failed to parse PDF {pdf_path} page {page_num}: {e}", exc_info=True)
-            self.error_occurred.emit(f"Error processing {os.path.basename(pdf_path)}: {e}")
+            log.error(f"Failed to finish export {writer.path}: {e}", exc_info=True)
+            self.error_occurred.emit(f"Could not finish export: {e}")
+            return None
+        return writer.path
 
     @pyqtSlot()
     def run(self):
-        """The main processing loop."""
+        """
+        The main processing loop. Every file is expanded into (file, page)
+        work units using `page_selection`; rows are emitted in that order
+        and progress is counted in pages. Rows are delivered in batches and
+        progress updates are throttled, so the GUI thread is not flooded
+        with one signal per page.
+        """
         self.is_stopped = False
-        total_files = len(self.files_to_process)
-        log.info(f"Starting OCR processing for {total_files} files.")
-        
-        # In a real implementation, a more complex loop would be needed to handle
-        # page ranges and count total pages for the progress bar.
-        # This is a simplified version for demonstration.
-        
-        for i, filepath in enumerate(self.files_to_process):
-            if self.is_stopped:
-                log.info("Processing was stopped by user.")
-                break
-
-            log.info(f"Processing file: {filepath}")
-            self.progress_updated.emit(i + 1, total_files)
-            
-            # Simple logic: if a text parser is defined, use it for PDFs.
-            # Otherwise, use visual snips.
-            is_pdf = filepath.lower().endswith('.pdf')
-            has_text_parser = any(t.get('type') == 'text_parser' for t in self.templates_to_use)
-
-            if is_pdf and has_text_parser:
-                # Here you would loop through the selected page numbers
-                self._process_page_with_text_parser(filepath, 1) # Simplified to page 1
-            else:
-                # Process with visual snips
-                self._process_page_with_visual_snips(filepath, 1) # Simplified
-                
-        log.info("OCR processing finished.")
+        self.batch_stats = {}
+        self._visual_snips = None
+        work_units = expand_work_units(self.files_to_process, self.page_selection, self._count_pages)
+        total_pages = len(work_units)
+        tasks = chunk_work_units(work_units, self.config_manager.get("pages_per_task", 8))
+        log.info(f"Starting OCR processing for {len(self.files_to_process)} files ({total_pages} pages).")
+
+        interval_ms = self.config_manager.get("result_batch_interval_ms", 100)
+        batcher = ResultBatcher(self._emit_results, self.config_manager.get("result_batch_rows", 200), interval_ms)
+        progress_throttle = Throttle(interval_ms)
+        pages_done = 0
+        self._open_export_writer()
+        try:
+            for task, outcomes in self._iter_task_results(tasks):
+                rows = []
+                for row_data, error in outcomes:
+                    if error:
+                        batcher.extend(rows)
+                        rows = []
+                        batcher.flush()  # Keep rows and errors in page order
+                        self.error_occurred.emit(error)
+                    elif row_data:
+                        rows.append(row_data)
+                    pages_done += 1
+                # Added together, so none of the task's rows wait for the next task
+                batcher.extend(rows)
+                if progress_throttle.ready():
+                    self.progress_updated.emit(pages_done, total_pages)
+        except Exception as e:
+            # Page errors come back as outcomes; this is the pool itself failing
+            # (a worker died, its initializer failed, a task could not be pickled)
+            log.error(f"OCR batch failed after {pages_done}/{total_pages} pages: {e}", exc_info=True)
+            self.error_occurred.emit(f"Processing failed: {e}")
+        finally:
+            batcher.flush()
+            export_path = self._close_export_writer()
+        self.progress_updated.emit(pages_done, total_pages)
+        if export_path:
+            log.info(f"Results exported to {export_path}")
+            self.export_finished.emit(export_path)
+
+        if self.page_text_cache is not None:
+            self.page_text_cache.prune()
+        if self.ocr_cache is not None:
+            self.ocr_cache.prune()
+            stats = self.batch_stats
+            log.info(f"OCR cache: {stats.get('memory_hits', 0)} memory hits, "
+                     f"{stats.get('disk_hits', 0)} disk hits, {stats.get('misses', 0)} misses.")
+        log.info(f"Page routing: {self.batch_stats.get('native_text_pages', 0)} pages read from the text layer, "
+                 f"{self.batch_stats.get('ocr_pages', 0)} pages rasterised for OCR.")
+        if self.is_stopped:
+            log.info("Processing was stopped by user.")
+        log.info(f"OCR processing finished. {pages_done}/{total_pages} pages processed.")
         self.processing_finished.emit()
 
+
+# Per-process state for batch pool workers, set up once by _init_batch_worker.
+_batch_processor = None
+
+def _init_batch_worker(config_manager, template_manager, templates_to_use, ocr_engine, snip_ocr_mode):
+    """Pool initializer: builds the worker-local processor once per process."""
+    global _batch_processor
+    _batch_processor = OcrProcessor(config_manager, template_manager)
+    _batch_processor.templates_to_use = templates_to_use
+    _batch_processor.ocr_engine = ocr_engine
+    _batch_processor.snip_ocr_mode = snip_ocr_mode
+    # Pool processes skip atexit handlers, but run multiprocessing finalizers on exit
+    multiprocessing.util.Finalize(None, _batch_processor.close, exitpriority=10)
+
+def _process_work_unit(task):
+    """
+    Pool task: processes the pages of one (file, pages) task. Returns the
+    outcomes together with the worker's cache and routing counters for the task.
+    """
+    filepath, page_nums = task
+    outcomes = _batch_processor.process_pages(filepath, page_nums)
+    return outcomes, _batch_processor._take_batch_stats()
@@ -0,0 +1,43 @@
+# ocr_tool_qt/core/page_text_cache.py
+
+try:
+    import fitz  # PyMuPDF
+    # Bump the suffix whenever the way page text is extracted changes.
+    EXTRACTOR_VERSION = f"pymupdf-{fitz.VersionBind}-text-1"
+except ImportError:
+    EXTRACTOR_VERSION = "none"
+
+import json
+from core.disk_cache import DiskCache
+
+class PageTextCache:
+    """
+    Persistent cache of extracted PDF page text, content-addressed by
+    (file SHA-256, page number, extractor version). Re-running a batch over
+    already seen documents, e.g. after tweaking a regex, then needs no PDF
+    parsing at all. Text layers (page size and word boxes, used to route
+    pages around OCR) are cached alongside the text. Page counts are not:
+    reading them from the PDF is cheaper than hashing the file to look
+    them up.
+    """
+    def __init__(self, cache_dir, max_bytes):
+        self._store = DiskCache(cache_dir, max_bytes)
+
+    def get_text(self, file_hash, page_num):
+        return self._store.get(f"{file_hash}:{page_num}:{EXTRACTOR_VERSION}")
+
+    def put_text(self, file_hash, page_num, text):
+        self._store.put(f"{file_hash}:{page_num}:{EXTRACTOR_VERSION}", text)
+
+    def get_text_layer(self, file_hash, page_num):
+        value = self._store.get(f"{file_hash}:{page_num}:layer:{EXTRACTOR_VERSION}")
+        return json.loads(value) if value is not None else None
+
+    def put_text_layer(self, file_hash, page_num, layer):
+        self._store.put(f"{file_hash}:{page_num}:layer:{EXTRACTOR_VERSION}", json.dumps(layer))
+
+    def prune(self):
+        self._store.prune()
+
+    def clear(self):
+        self._store.clear()
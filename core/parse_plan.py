@@ -0,0 +1,73 @@
+# ocr_tool_qt/core/parse_plan.py
+
+import re
+from collections import namedtuple
+from core.label_matcher import LabelMatcher
+from utils.logger import log
+
+# Flags used by every text parser field regex.
+FIELD_FLAGS = re.DOTALL | re.IGNORECASE
+
+NOT_FOUND = "[Not Found]"
+REGEX_ERROR = "[Regex Error]"
+
+# One compiled field of a text parser template. `group` is the capture
+# group whose value is reported (1 if the regex has groups, else the full
+# match). `error` holds the placeholder value for fields whose regex did
+# not compile, in which case `pattern` is None.
+FieldPlan = namedtuple('FieldPlan', ['column_name', 'pattern', 'group', 'error'])
+
+# An immutable, precompiled text parser template. `matcher` is the
+# LabelMatcher used by the optional label-prefilter matching engine.
+ParsePlan = namedtuple('ParsePlan', ['name', 'fields', 'matcher'])
+
+
+def compile_field(column_name, regex, template_name=""):
+    """Compiles a single field definition into a FieldPlan."""
+    try:
+        pattern = re.compile(regex, FIELD_FLAGS)
+    except re.error as e:
+        log.error(f"Regex error in template '{template_name}' for field '{column_name}': {e}")
+        return FieldPlan(column_name, None, 0, REGEX_ERROR)
+    return FieldPlan(column_name, pattern, 1 if pattern.groups > 0 else 0, None)
+
+
+def compile_parse_plan(template, skip_columns=()):
+    """
+    Compiles a text_parser template into a ParsePlan.
+
+    Args:
+        template (dict): The template, with a 'fields' list of
+            {'column_name', 'regex'} dicts.
+        skip_columns: Column names that are filled by special parser
+            logic and need no compiled pattern.
+    """
+    name = template.get('name', '')
+    fields = []
+    for field in template.get('fields', []):
+        col_name = field['column_name']
+        if col_name in skip_columns:
+            fields.append(FieldPlan(col_name, None, 0, None))
+        else:
+            fields.append(compile_field(col_name, field.get('regex', ''), name))
+    return ParsePlan(name, tuple(fields), LabelMatcher([f.pattern for f in fields]))
+
+
+def search_fields(plan, text, use_label_prefilter=False):
+    """
+    Returns one match object (or None) per plan field. With the label
+    prefilter the results are identical, but fields anchored on literal
+    labels are only tried where their label occurs.
+    """
+    if use_label_prefilter:
+        return plan.matcher.search_all(text)
+    return [f.pattern.search(text) if f.pattern is not None else None for f in plan.fields]
+
+
+def field_value(field, match):
+    """Returns the reported value of a field given its match (or None)."""
+    if field.error:
+        return field.error
+    if not match:
+        return NOT_FOUND
+    return (match.group(field.group) or '').strip()
@@ -0,0 +1,98 @@
+# ocr_tool_qt/core/path_index.py
+
+from bisect import bisect_left, insort
+
+# Removals are tracked until there are more than this many (or an eighth
+# of the paths, if that is more); then the row dict is rebuilt.
+_MIN_REMOVALS_BEFORE_COMPACT = 1024
+
+
+class PathIndex:
+    """
+    An ordered list of unique paths with a dict from path to row, so that
+    membership tests and row lookups are fast however many files are
+    loaded. The dict maps each path to its slot, its row when the dict was
+    last rebuilt; removed slots are kept in a sorted list and a path's row
+    is its slot minus the removed slots before it. Removing a path is
+    therefore a list deletion and a binary search rather than a renumbering
+    of every row after it, and the dict is rebuilt once per many removals.
+    """
+    def __init__(self, paths=()):
+        self._paths = []
+        self._slots = {}    # path -> slot
+        self._removed = []  # Sorted slots removed since the last rebuild
+        self.extend(paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return path in self._slots
+
+    def __getitem__(self, row):
+        return self._paths[row]
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def row(self, path):
+        """Returns the row of a path, or -1 if it is not in the index."""
+        slot = self._slots.get(path)
+        if slot is None:
+            return -1
+        return slot - bisect_left(self._removed, slot) if self._removed else slot
+
+    def paths(self):
+        """Returns a copy of the paths in order."""
+        return list(self._paths)
+
+    def add(self, path):
+        """Appends a path unless it is present already; returns whether it was added."""
+        if path in self._slots:
+            return False
+        # Every removed slot lies before a new one
+        self._slots[path] = len(self._paths) + len(self._removed)
+        self._paths.append(path)
+        return True
+
+    def extend(self, paths):
+        """Appends the new paths among `paths` (also dropping repeats within it); returns them."""
+        added = []
+        for path in paths:
+            if self.add(path):
+                added.append(path)
+        return added
+
+    def remove(self, path):
+        """Removes a path; returns its former row, or -1 if it was not present."""
+        row = self.row(path)
+        if row >= 0:
+            self.remove_range(row, row)
+        return row
+
+    def remove_range(self, first, last):
+        """Removes the rows first..last (inclusive); returns their paths."""
+        removed = self._paths[first:last + 1]
+        del self._paths[first:last + 1]
+        for path in removed:
+            insort(self._removed, self._slots.pop(path))
+        if len(self._removed) > max(_MIN_REMOVALS_BEFORE_COMPACT, len(self._paths) // 8):
+            self._compact()
+        return removed
+
+    def remove_many(self, paths):
+        """Removes several paths with one pass over the index; returns how many were present."""
+        doomed = {path for path in paths if path in self._slots}
+        if doomed:
+            self._paths = [path for path in self._paths if path not in doomed]
+            self._compact()
+        return len(doomed)
+
+    def _compact(self):
+        self._slots = {path: row for row, path in enumerate(self._paths)}
+        self._removed = []
+
+    def clear(self):
+        self._paths.clear()
+        self._slots.clear()
+        self._removed.clear()
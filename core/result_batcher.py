@@ -0,0 +1,66 @@
+# ocr_tool_qt/core/result_batcher.py
+
+import time
+
+class ResultBatcher:
+    """
+    Buffers result rows in the worker thread and hands them to `flush_func`
+    as one list, either once `max_rows` rows are buffered or once
+    `max_interval_ms` have passed since the last batch. This turns one
+    cross-thread signal per page into one per batch. The interval is
+    checked when rows are added, so callers that produce rows in bursts
+    (e.g. per task) add each burst with extend(): adding it row by row
+    could flush its first row and hold the rest until the next burst.
+    Call flush() when the run ends.
+    """
+    def __init__(self, flush_func, max_rows=200, max_interval_ms=100, clock=time.monotonic):
+        self.flush_func = flush_func
+        self.max_rows = max(1, int(max_rows))
+        self.max_interval = max(0, max_interval_ms) / 1000.0
+        self._clock = clock
+        self._rows = []
+        self._last_flush = clock()
+
+    def add(self, row):
+        self.extend([row])
+
+    def extend(self, rows):
+        """Adds a burst of rows, then flushes if the batch is full or due."""
+        self._rows.extend(rows)
+        if len(self._rows) >= self.max_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Flushes if `max_interval_ms` have passed since the last batch."""
+        if self._rows and self._clock() - self._last_flush >= self.max_interval:
+            self.flush()
+
+    def flush(self):
+        """Hands any buffered rows to `flush_func`."""
+        if self._rows:
+            rows, self._rows = self._rows, []
+            self._last_flush = self._clock()
+            self.flush_func(rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class Throttle:
+    """
+    Rate limit for frequent notifications such as progress updates:
+    ready() is True at most once every `interval_ms`.
+    """
+    def __init__(self, interval_ms=100, clock=time.monotonic):
+        self.interval = max(0, interval_ms) / 1000.0
+        self._clock = clock
+        self._last = None
+
+    def ready(self):
+        now = self._clock()
+        if self._last is not None and now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
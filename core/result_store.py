@@ -0,0 +1,158 @@
+# ocr_tool_qt/core/result_store.py
+
+import numpy as np
+
+def _numeric_keys(values):
+    """
+    Returns the display strings as a float64 array if every one parses as
+    a number, allowing thousands separators ("1,234.00"), otherwise None.
+    """
+    try:
+        return np.array([value.replace(',', '') for value in values], dtype=np.float64)
+    except ValueError:
+        return None
+
+
+class ResultStore:
+    """
+    A column-oriented store of result rows for the results table. Each
+    column is a list of display strings, so appending a batch of rows is
+    one list extend per column, and a view row maps to a stored row
+    through an optional sort order.
+
+    Sorting is stable in both directions and numeric for columns whose
+    non-empty values all parse as numbers, with or without thousands
+    separators. Empty cells sort after all other values in both
+    directions. While a sort is active, appended rows are merged into the
+    order with a binary search instead of re-sorting everything.
+    """
+    def __init__(self, columns=()):
+        self.columns = []
+        self._values = {}     # column name -> [str, ...] in insertion order
+        self._row_count = 0
+        self.sort_column = -1  # -1 shows rows in insertion order
+        self.descending = False
+        self._order = None    # Ids of the rows with a value, in view order
+        self._keys = None     # Sort keys aligned with _order
+        self._empty = None    # Ids of the rows without a value, in insertion order
+        self.set_columns(columns)
+
+    def __len__(self):
+        return self._row_count
+
+    def set_columns(self, columns):
+        """Sets the columns; values of kept columns are preserved, new ones are empty."""
+        self.columns = list(columns)
+        self._values = {name: self._values.get(name) or [''] * self._row_count for name in self.columns}
+        self._clear_sort()
+
+    def clear(self):
+        """Removes every row, keeping the columns."""
+        self._values = {name: [] for name in self.columns}
+        self._row_count = 0
+        self._clear_sort()
+
+    def _clear_sort(self):
+        self.sort_column = -1
+        self.descending = False
+        self._order = self._keys = self._empty = None
+
+    def append_rows(self, rows):
+        """
+        Appends a batch of row dicts; keys that are not columns are ignored.
+
+        Returns:
+            True if the rows were added at the end of the view, False if
+            they were merged into an active sort order.
+        """
+        if not rows:
+            return True
+        first_id = self._row_count
+        for name, values in self._values.items():
+            values.extend(str(row.get(name, '')) for row in rows)
+        self._row_count += len(rows)
+        if self._order is None:
+            return True
+
+        as_text = self._keys.dtype == object
+        new_order, new_keys, new_empty = self._sorted_keys(
+            self._values[self.columns[self.sort_column]][first_id:], self.descending, as_text, first_id)
+        if new_keys.dtype != self._keys.dtype:
+            # The column stopped being numeric: sort it as text from scratch
+            self.sort(self.sort_column, self.descending, force=True)
+            return False
+        if self.descending:
+            # The keys descend; a new key goes after every key >= it
+            positions = len(self._keys) - np.searchsorted(self._keys[::-1], new_keys, side='left')
+        else:
+            positions = np.searchsorted(self._keys, new_keys, side='right')
+        self._order = np.insert(self._order, positions, new_order)
+        self._keys = np.insert(self._keys, positions, new_keys)
+        self._empty.extend(new_empty)
+        return False
+
+    @staticmethod
+    def _sorted_keys(values, descending=False, as_text=False, first_id=0):
+        """
+        Sorts a run of display strings.
+
+        Returns:
+            (ids of the non-empty values in view order, their keys, ids of
+            the empty values), with ids counted from `first_id`.
+        """
+        ids = [i for i, value in enumerate(values) if value]
+        present = [values[i] for i in ids]
+        empty = [first_id + i for i, value in enumerate(values) if not value]
+        keys = None if as_text else _numeric_keys(present)
+        if keys is not None:
+            order = np.argsort(-keys if descending else keys, kind='stable')
+        else:
+            # Timsort on the strings beats argsort over an object array; it stays stable when reversed
+            order = np.array(sorted(range(len(present)), key=present.__getitem__, reverse=descending),
+                             dtype=np.int64)
+            keys = np.empty(len(present), dtype=object)
+            keys[:] = present
+        return np.asarray(ids, dtype=np.int64)[order] + first_id, keys[order], empty
+
+    def sort(self, column_index, descending=False, force=False):
+        """Sorts the view by a column; a column index of -1 restores insertion order."""
+        if not 0 <= column_index < len(self.columns):
+            self._clear_sort()
+            return
+        descending = bool(descending)
+        if force or column_index != self.sort_column or descending != self.descending:
+            # The order is kept up to date on append, so only a new sort needs sorting
+            self._order, self._keys, self._empty = self._sorted_keys(
+                self._values[self.columns[column_index]], descending)
+            self.sort_column = column_index
+            self.descending = descending
+
+    def row_id(self, view_row):
+        """Maps a row of the (possibly sorted) view to its insertion index."""
+        if self._order is None:
+            return view_row
+        if view_row < len(self._order):
+            return int(self._order[view_row])
+        return self._empty[view_row - len(self._order)]
+
+    def view_rows(self, row_ids):
+        """Maps insertion indexes to the rows of the (possibly sorted) view that show them."""
+        if self._order is None:
+            return list(row_ids)
+        view_row = np.empty(self._row_count, dtype=np.int64)
+        view_row[self._order] = np.arange(len(self._order))
+        view_row[self._empty] = np.arange(len(self._order), self._row_count)
+        return view_row[np.asarray(row_ids, dtype=np.int64)].tolist()
+
+    def value(self, view_row, column_index):
+        return self._values[self.columns[column_index]][self.row_id(view_row)]
+
+    def row_values(self, view_row):
+        row_id = self.row_id(view_row)
+        return [self._values[name][row_id] for name in self.columns]
+
+    def iter_rows(self):
+        """Yields every row as a dict of display strings, in insertion order."""
+        columns = [self._values[name] for name in self.columns]
+        for row_id in range(self._row_count):
+            yield {name: values[row_id] for name, values in zip(self.columns, columns)}
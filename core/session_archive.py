@@ -0,0 +1,314 @@
+# ocr_tool_qt/core/session_archive.py
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from collections.abc import Sequence
+from datetime import datetime
+
+from core.arrow_results import PYARROW_AVAILABLE, ArrowResultRows, write_results_ipc
+from core.file_hash import file_sha256
+from core.zip_packing import pack_files, copy_member_raw, central_directory_offset
+from utils.logger import log
+
+SESSION_VERSION = '3.2-qt'
+BASE_MEMBER = 'session_data.json'
+_DELTA_NAME = re.compile(r'^deltas/(\d+)\.json$')
+
+
+def _normalized_row(row):
+    """
+    A result row in a form that is stable across the ways rows reach the
+    session: fresh from the processor, read back from an Arrow table
+    (where missing cells are dropped), or as display strings.
+    """
+    return '\x1f'.join(f"{name}\x1e{value}" for name, value in sorted(row.items())
+                       if value is not None and value != '')
+
+
+def rows_digest(rows):
+    """Returns one digest over the content and order of a run of result rows."""
+    text = '\n'.join(_normalized_row(row) for row in rows)
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _stored_info(name):
+    """ZipInfo for members that are not worth deflating."""
+    return zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+
+
+class SessionArchive:
+    """
+    The incremental .ocrtool_session format (3.2-qt). Documents are stored
+    once as content-addressed blobs (blobs/<sha256>) and result rows as
+    Arrow tables (results/<seq>.arrow). The session state lives in
+    session_data.json plus numbered deltas (deltas/<seq>.json), applied in
+    order on load; each delta records the document list and only the
+    templates, UI settings and result members that changed.
+
+    save() appends new blobs, new result rows and a delta to an existing
+    archive, so its cost is proportional to what changed. Each result
+    member records its row count and a digest of its rows; members whose
+    rows are unchanged are kept, and the rows from the first changed
+    member on are written again.
+    compact() rewrites the archive without superseded members.
+
+    Blobs are stored or deflated depending on their type and measured
+    compressibility, and are packed by `pack_workers` threads (0 means one
+    per CPU core).
+    """
+    def __init__(self, path, pack_workers=0):
+        self.path = path
+        self.pack_workers = pack_workers
+
+    @staticmethod
+    def read_state(zf):
+        """Returns the session state of an open archive with every delta applied."""
+        state = json.loads(zf.read(BASE_MEMBER))
+        deltas = sorted((int(match.group(1)), name) for name in zf.namelist()
+                        for match in [_DELTA_NAME.match(name)] if match)
+        for _, name in deltas:
+            state.update(json.loads(zf.read(name)))
+        state['delta_count'] = len(deltas)
+        return state
+
+    def is_incremental(self):
+        """True if the file exists and is a 3.2-qt archive that can be appended to."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with zipfile.ZipFile(self.path) as zf:
+                return BASE_MEMBER in zf.namelist() and 'documents' in json.loads(zf.read(BASE_MEMBER))
+        except (zipfile.BadZipFile, ValueError, OSError):
+            return False
+
+    def save(self, image_paths, templates, ocr_results, ui_settings, incremental=True, known_digests=None):
+        """
+        Saves the session, appending to the archive when it is already in
+        the incremental format and `incremental` is set, and writing a new
+        archive otherwise.
+
+        `known_digests` maps paths of documents that are not on disk (not
+        extracted from this archive yet) to their blob hashes; they can only
+        be kept when appending to an archive that has those blobs.
+
+        Returns:
+            Save stats: bytes_written (what the archive grew by, or its size
+            when new), the pack_files() stats of the blobs written, and seconds.
+        """
+        documents = []
+        doc_paths = {}  # sha256 -> path
+        known_digests = known_digests or {}
+        for path in image_paths:
+            if os.path.exists(path):
+                digest = file_sha256(path)
+                documents.append([os.path.basename(path), digest])
+                doc_paths[digest] = path
+            elif path in known_digests:
+                documents.append([os.path.basename(path), known_digests[path]])
+            else:
+                log.warning(f"File not found during session save: {path}")
+        # Compare and store exactly what a JSON round trip gives back
+        templates = json.loads(json.dumps(templates))
+        ui_settings = json.loads(json.dumps(ui_settings))
+        # Sequences such as a loaded session's ArrowResultRows are only decoded where needed
+        rows = ocr_results if isinstance(ocr_results, Sequence) else list(ocr_results)
+
+        start = time.perf_counter()
+        if incremental and self.is_incremental():
+            stats = self._append(documents, doc_paths, templates, rows, ui_settings)
+        elif any(path in known_digests and not os.path.exists(path) for path in image_paths):
+            raise ValueError("Documents that are not extracted yet can only be kept by an incremental save.")
+        else:
+            stats = self._write_new(documents, doc_paths, templates, rows, ui_settings)
+        stats['seconds'] = time.perf_counter() - start
+        return stats
+
+    def _write_new(self, documents, doc_paths, templates, rows, ui_settings):
+        state = {
+            'version': SESSION_VERSION,
+            'documents': documents,
+            'templates': templates,
+            'ui_settings': ui_settings,
+            'results': self._results_descriptor(),
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+                self._add_results(zf, 0, state['results'], rows)
+                zf.writestr(BASE_MEMBER, json.dumps(state, indent=4))
+                pack_stats = self._write_blobs(zf, doc_paths)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return {'bytes_written': os.path.getsize(self.path), 'pack': pack_stats}
+
+    def _append(self, documents, doc_paths, templates, rows, ui_settings):
+        with zipfile.ZipFile(self.path) as zf:
+            state = self.read_state(zf)
+            names = set(zf.namelist())
+        seq = state['delta_count'] + 1
+
+        delta = {'documents': documents}
+        if templates != state.get('templates'):
+            delta['templates'] = templates
+        if ui_settings != state.get('ui_settings'):
+            delta['ui_settings'] = ui_settings
+        saved = state.get('results', {'members': [], 'count': 0})
+        kept, new_rows = self._unsaved_rows(saved, rows)
+        new_blobs = {digest: path for digest, path in doc_paths.items() if f"blobs/{digest}" not in names}
+        if new_rows or kept['members'] != saved.get('members', []):
+            delta['results'] = kept
+        if documents == state.get('documents') and len(delta) == 1 and not new_blobs:
+            log.info("Session unchanged since the last save; nothing appended.")
+            return {'bytes_written': 0, 'pack': pack_files(None, [])}
+
+        size_before = os.path.getsize(self.path)
+        # Appending overwrites the old central directory; keep it to restore on failure
+        with open(self.path, 'rb') as f:
+            directory_offset = central_directory_offset(f)
+            f.seek(directory_offset)
+            central_directory = f.read()
+        try:
+            with zipfile.ZipFile(self.path, 'a', zipfile.ZIP_DEFLATED) as zf:
+                pack_stats = self._write_blobs(zf, new_blobs)
+                if 'results' in delta:
+                    self._add_results(zf, seq, delta['results'], new_rows)
+                # The delta goes last, so it only refers to members already written
+                zf.writestr(f"deltas/{seq:06d}.json", json.dumps(delta, indent=4))
+        except BaseException:
+            with open(self.path, 'r+b') as f:
+                f.seek(directory_offset)
+                f.write(central_directory)
+                f.truncate()
+            raise
+        return {'bytes_written': os.path.getsize(self.path) - size_before, 'pack': pack_stats}
+
+    def _write_blobs(self, zf, doc_paths):
+        return pack_files(zf, [(path, f"blobs/{digest}") for digest, path in doc_paths.items()], self.pack_workers)
+
+    @staticmethod
+    def _unsaved_rows(saved, rows):
+        """
+        Compares the current rows with the saved result members.
+
+        Returns:
+            (descriptor of the members that are still valid, rows to write
+            after them). Members are checked in order against the digest of
+            their rows; everything from the first mismatch on is rewritten.
+            Descriptors without digests (older 3.2-qt saves) are rewritten.
+        """
+        kept = SessionArchive._results_descriptor()
+        offset = 0
+        digests = saved.get('member_digests')
+        if digests is None or len(digests) != len(saved.get('members', [])):
+            return kept, rows
+        # One sequential pass: indexing lazily loaded rows member by member decodes them row by row
+        remaining = iter(rows)
+        for name, count, digest in zip(saved['members'], saved['member_rows'], digests):
+            if offset + count > len(rows) or rows_digest(itertools.islice(remaining, count)) != digest:
+                break
+            kept['members'].append(name)
+            kept['member_rows'].append(count)
+            kept['member_digests'].append(digest)
+            offset += count
+        kept['count'] = offset
+        return kept, rows[offset:]
+
+    @staticmethod
+    def _results_descriptor():
+        return {'members': [], 'member_rows': [], 'member_digests': [], 'count': 0}
+
+    @staticmethod
+    def _add_results(zf, seq, descriptor, rows):
+        """Writes rows as a new member and records it in a results descriptor."""
+        for name in SessionArchive._write_results(zf, seq, rows):
+            descriptor['members'].append(name)
+            descriptor['member_rows'].append(len(rows))
+            descriptor['member_digests'].append(rows_digest(rows))
+            descriptor['count'] += len(rows)
+
+    @staticmethod
+    def _write_results(zf, seq, rows):
+        """Writes result rows as a new member and returns [its name], or [] if there are none."""
+        if not rows:
+            return []
+        if PYARROW_AVAILABLE:
+            name = f"results/{seq:06d}.arrow"
+            # The table is already zstd-compressed, deflating it again only costs time
+            with zf.open(_stored_info(name), 'w') as member:
+                write_results_ipc(member, rows)
+        else:
+            name = f"results/{seq:06d}.json"
+            zf.writestr(name, json.dumps(list(rows)))
+        return [name]
+
+    @staticmethod
+    def read_result_rows(zf, members, extract_dir):
+        """
+        Returns the result rows stored in `members`: an ArrowResultRows over
+        tables extracted into `extract_dir` when all members are Arrow
+        tables, otherwise a list of row dicts.
+        """
+        parts = []  # An extracted table path or a list of rows per member
+        for name in members:
+            if name.endswith('.json'):
+                parts.append(json.loads(zf.read(name)))
+                continue
+            if not PYARROW_AVAILABLE:
+                raise RuntimeError("This session stores its results as Arrow tables; install pyarrow to load it.")
+            fd, path = tempfile.mkstemp(suffix='.arrow', dir=extract_dir)
+            with zf.open(name) as source, os.fdopen(fd, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            parts.append(path)
+        if all(isinstance(part, str) for part in parts):
+            return ArrowResultRows(parts)
+        rows = []
+        for part in parts:
+            if isinstance(part, str):
+                table_rows = ArrowResultRows(part)
+                rows.extend(table_rows)
+                table_rows.close()
+            else:
+                rows.extend(part)
+        return rows
+
+    def compact(self):
+        """
+        Rewrites the archive with the current state in session_data.json, all
+        result rows in one table and only the blobs still referenced.
+
+        Returns:
+            (size before, size after) in bytes.
+        """
+        size_before = os.path.getsize(self.path)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with zipfile.ZipFile(self.path) as source, tempfile.TemporaryDirectory() as extract_dir, \
+                    zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as target:
+                state = self.read_state(source)
+                state.pop('delta_count')
+                rows = self.read_result_rows(source, state['results']['members'], extract_dir)
+                rows_list = list(rows)
+                if isinstance(rows, ArrowResultRows):
+                    rows.close()
+                state['results'] = self._results_descriptor()
+                self._add_results(target, 0, state['results'], rows_list)
+                state['version'] = SESSION_VERSION
+                target.writestr(BASE_MEMBER, json.dumps(state, indent=4))
+                for digest in dict.fromkeys(digest for _, digest in state['documents']):
+                    copy_member_raw(source, source.getinfo(f"blobs/{digest}"), target)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        size_after = os.path.getsize(self.path)
+        log.info(f"Compacted session {self.path}: {size_before} -> {size_after} bytes.")
+        return size_before, size_after
@@ -0,0 +1,85 @@
+# ocr_tool_qt/core/session_documents.py
+
+import os
+import shutil
+import threading
+import zipfile
+
+from core.file_hash import remember_file_sha256
+from utils.logger import log
+
+
+class SessionDocuments:
+    """
+    The documents of a loaded session, extracted from the session archive
+    into the imports directory on demand instead of all at load time.
+    ensure() materialises one document right away (e.g. when it is first
+    shown or processed); a SessionExtractor extracts the rest in the
+    background. Both can run at once: every document is extracted once,
+    into a temporary file that is renamed into place, so a path that
+    exists is always complete. Thread-safe.
+    """
+    def __init__(self, archive_path, entries):
+        """
+        Args:
+            archive_path (str): The session archive.
+            entries (list): (target path, member name, sha256 or None) per
+                document, in session order.
+        """
+        self.archive_path = archive_path
+        self.paths = [target for target, _, _ in entries]
+        self._entries = {target: (member, digest) for target, member, digest in entries}
+        self._ready = set()
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def digest(self, path):
+        """Returns the content hash recorded in the archive for a document, if any."""
+        entry = self._entries.get(path)
+        return entry[1] if entry else None
+
+    def is_ready(self, path):
+        with self._lock:
+            return path in self._ready or path not in self._entries
+
+    def pending(self):
+        """Returns the documents not extracted yet, in session order."""
+        with self._lock:
+            return [path for path in self.paths if path not in self._ready]
+
+    def ensure(self, path):
+        """
+        Extracts a document if it is not on disk yet and returns its path.
+        Paths that do not belong to the session are returned unchanged.
+        """
+        if path not in self._entries:
+            return path
+        with self._lock:
+            if path in self._ready:
+                return path
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        with path_lock:
+            with self._lock:
+                if path in self._ready:
+                    return path
+            member, digest = self._entries[path]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.part"
+            with zipfile.ZipFile(self.archive_path) as zf, zf.open(member) as source, open(tmp_path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            os.replace(tmp_path, path)
+            if digest:
+                # Saving the session again must not hash the document again
+                remember_file_sha256(path, digest)
+            with self._lock:
+                self._ready.add(path)
+                self._path_locks.pop(path, None)
+        log.info(f"Extracted '{os.path.basename(path)}' from the session.")
+        return path
+
+    def ensure_all(self):
+        for path in self.pending():
+            self.ensure(path)
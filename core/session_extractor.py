@@ -0,0 +1,63 @@
+# ocr_tool_qt/core/session_extractor.py
+
+import os
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from utils.logger import log
+
+class SessionExtractor(QObject):
+    """
+    Worker object that extracts the documents of a loaded session in a
+    background thread, so the session is usable as soon as its metadata
+    and results are read. Documents needed earlier are materialised by
+    SessionDocuments.ensure() in the thread that needs them; the extractor
+    skips those.
+    """
+    # Path of each document once it is on disk
+    document_extracted = pyqtSignal(str)
+    progress_updated = pyqtSignal(int, int)  # extracted, total
+    extraction_finished = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.documents = None
+        self.is_stopped = False
+
+    def set_documents(self, documents):
+        """Sets the SessionDocuments to extract; called from the main thread before run()."""
+        self.documents = documents
+
+    @pyqtSlot()
+    def stop(self):
+        log.info("Session extraction stop requested.")
+        self.is_stopped = True
+
+    @pyqtSlot()
+    def run(self):
+        """Extracts every pending document in session order."""
+        self.is_stopped = False
+        if self.documents is None:
+            self.extraction_finished.emit()
+            return
+        total = len(self.documents)
+        done = total - len(self.documents.pending())
+        log.info(f"Extracting {total - done} session documents in the background.")
+        for path in self.documents.pending():
+            if self.is_stopped:
+                log.warning("Session extraction was stopped.")
+                break
+            if self.documents.is_ready(path):
+                done += 1  # Materialised on demand in the meantime
+                self.progress_updated.emit(done, total)
+                continue
+            try:
+                self.documents.ensure(path)
+            except Exception as e:
+                log.error(f"Could not extract '{os.path.basename(path)}' from the session: {e}", exc_info=True)
+                self.error_occurred.emit(f"Could not extract '{os.path.basename(path)}': {e}")
+                continue
+            done += 1
+            self.document_extracted.emit(path)
+            self.progress_updated.emit(done, total)
+        log.info("Session extraction finished.")
+        self.extraction_finished.emit()
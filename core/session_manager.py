@@ -1,10 +1,19 @@
 # ocr_tool_qt/core/session_manager.py
 
+import glob
+import hashlib
 import json
 import os
 import shutil
+import tempfile
+import threading
+import uuid
 import zipfile
 from datetime import datetime
+from core.arrow_results import PYARROW_AVAILABLE, ArrowResultRows
+from core.import_store import ImportStore
+from core.session_archive import SessionArchive
+from core.session_documents import SessionDocuments
 from utils.logger import log
 
 class SessionManager:
@@ -15,21 +24,36 @@ class SessionManager:
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.imports_dir = os.path.join(self.config_manager.get('workspace_dir'), 'imports')
+        self.import_store = ImportStore(self.imports_dir, self.config_manager.get('import_link_sources', False))
         self.exports_dir = os.path.join(self.config_manager.get('workspace_dir'), 'exports')
+        # Result tables of loaded sessions are extracted here and memory-mapped
+        self.results_dir = self.config_manager.get_cache_dir('session_results')
+        self._loaded_results = None
+        # Stats of the last successful save_session(), including packing throughput
+        self.last_save_stats = None
+        # Documents of the loaded session, extracted on demand
+        self.documents = None
 
-    def save_session(self, filepath, image_paths, templates, ocr_results, ui_settings):
+    def save_session(self, filepath, image_paths, templates, ocr_results, ui_settings, incremental=True):
         """
         Saves the current session state to a .ocrtool_session zip file.
-        
+
+        Sessions are saved in the incremental 3.2-qt format: saving again to
+        a file in that format only appends what changed since the last save
+        (new documents, new result rows, changed templates or settings).
+        Use incremental=False (e.g. for "Save As") to write a fresh archive.
+
         Args:
             filepath (str): The path to save the session file.
             image_paths (list): List of full paths to the imported files.
             templates (list): List of template dictionaries.
-            ocr_results (list): List of OCR result dictionaries.
+            ocr_results (iterable): OCR result dictionaries.
             ui_settings (dict): Dictionary of current UI settings to save.
+            incremental (bool): Append to an existing incremental session.
         """
         log.info(f"Saving session to {filepath}...")
-        
+        known_digests = self._unextracted_document_digests(filepath, image_paths, incremental)
+
         templates_to_save = []
         for t_orig in templates:
             t_copy = t_orig.copy()
@@ -37,44 +61,91 @@ class SessionManager:
             t_copy.pop('image_np_array', None) 
             templates_to_save.append(t_copy)
 
-        session_data = {
-            'version': '3.0-qt',
-            'image_basenames': [os.path.basename(p) for p in image_paths],
-            'templates': templates_to_save,
-            'ocr_results': ocr_results,
-            'ui_settings': ui_settings
-        }
-
         try:
-            with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as zf:
-                # Write metadata
-                zf.writestr('session_data.json', json.dumps(session_data, indent=4))
-                
-                # Write imported documents
-                docs_subdir_in_zip = "imported_documents"
-                for local_import_path in image_paths:
-                    if os.path.exists(local_import_path):
-                        zf.write(local_import_path, os.path.join(docs_subdir_in_zip, os.path.basename(local_import_path)))
-                    else:
-                        log.warning(f"File not found during session save: {local_import_path}")
-            log.info("Session saved successfully.")
+            archive = SessionArchive(filepath, self.config_manager.get("session_pack_workers", 0))
+            stats = archive.save(image_paths, templates_to_save, ocr_results, ui_settings, incremental, known_digests)
+            self.last_save_stats = stats
+            pack = stats['pack']
+            throughput = pack['input_bytes'] / 1e6 / pack['seconds'] if pack['seconds'] else 0.0
+            log.info(f"Session saved successfully in {stats['seconds']:.2f}s: {stats['bytes_written'] / 1e6:.1f} MB written; "
+                     f"{pack['files']} documents ({pack['input_bytes'] / 1e6:.1f} MB, {pack['stored']} stored, "
+                     f"{pack['deflated']} deflated) packed at {throughput:.0f} MB/s.")
             return True
         except Exception as e:
             log.error(f"Failed to save session to {filepath}: {e}", exc_info=True)
             return False
 
-    def load_session(self, filepath):
+    def _unextracted_document_digests(self, filepath, image_paths, incremental):
+        """
+        Returns {path: sha256} for documents of the loaded session that are
+        not extracted yet but whose blobs an incremental save into the same
+        archive can keep referring to. Other unextracted documents are
+        extracted now, since their content must be written.
+        """
+        if self.documents is None:
+            return {}
+        same_archive = incremental and os.path.exists(filepath) and \
+            os.path.samefile(filepath, self.documents.archive_path)
+        known_digests = {}
+        for path in image_paths:
+            if self.documents.is_ready(path):
+                continue
+            digest = self.documents.digest(path)
+            if same_archive and digest:
+                known_digests[path] = digest
+            else:
+                self.documents.ensure(path)
+        return known_digests
+
+    def ensure_document(self, path):
+        """
+        Makes sure a document of the loaded session is on disk, extracting
+        it from the archive first if needed, and returns its path.
+        """
+        return self.documents.ensure(path) if self.documents is not None else path
+
+    def compact_session(self, filepath):
+        """
+        Rewrites an incremental session without the documents, result tables
+        and deltas that later saves superseded.
+
+        Returns:
+            True on success, False otherwise.
+        """
+        archive = SessionArchive(filepath, self.config_manager.get("session_pack_workers", 0))
+        if not archive.is_incremental():
+            log.info(f"{filepath} is not an incremental session; nothing to compact.")
+            return False
+        try:
+            archive.compact()
+            return True
+        except Exception as e:
+            log.error(f"Failed to compact session {filepath}: {e}", exc_info=True)
+            return False
+
+    def load_session(self, filepath, lazy=True):
         """
         Loads a session from a .ocrtool_session file.
 
+        Metadata and results are read right away. With `lazy` set, the
+        documents are not extracted yet: 'image_paths' lists where they will
+        be, 'documents' is the SessionDocuments that extracts them, either on
+        first access through ensure_document() or in the background with a
+        SessionExtractor. Stop a running SessionExtractor before loading
+        another session.
+
         Args:
             filepath (str): The path to the session file to load.
+            lazy (bool): Defer extracting the documents.
 
         Returns:
             A dictionary containing the loaded session data, or None on failure.
+            For sessions that store results as Arrow tables, 'ocr_results'
+            is a lazily decoded ArrowResultRows sequence.
         """
         log.info(f"Loading session from {filepath}...")
-        self.clear_current_imports()
+        self.documents = None
+        self._discard_current_imports()
 
         try:
             with zipfile.ZipFile(filepath, 'r') as zf:
@@ -83,21 +154,28 @@ class SessionManager:
                     return None
 
                 session_data = json.loads(zf.read('session_data.json'))
-                
-                # Extract documents
+                if 'documents' in session_data:
+                    session_data, entries = self._load_incremental_session(zf)
+                    self._set_documents(filepath, entries, session_data, lazy)
+                    return session_data
+                if 'ocr_results_member' in session_data:
+                    session_data['ocr_results'] = self._open_results_member(zf, session_data['ocr_results_member'])
+                else:
+                    session_data.setdefault('ocr_results', [])
+
+                # Documents are extracted on demand
                 docs_subdir_in_zip = "imported_documents"
-                extracted_paths = []
+                entries = []
                 for member_info in zf.infolist():
                     if member_info.filename.startswith(docs_subdir_in_zip + "/") and not member_info.is_dir():
-                        target_path = os.path.join(self.imports_dir, os.path.basename(member_info.filename))
-                        with zf.open(member_info) as source, open(target_path, 'wb') as target:
-                            shutil.copyfileobj(source, target)
-                        extracted_paths.append(target_path)
+                        member_key = hashlib.sha1(member_info.filename.encode('utf-8')).hexdigest()
+                        target_path = self._session_document_path(member_key, os.path.basename(member_info.filename))
+                        entries.append((target_path, member_info.filename, None))
 
-                # The main window will use this data to populate the app state
-                session_data['image_paths'] = extracted_paths
-                log.info("Session loaded successfully.")
-                return session_data
+            # The main window will use this data to populate the app state
+            self._set_documents(filepath, entries, session_data, lazy)
+            log.info("Session loaded successfully.")
+            return session_data
 
         except zipfile.BadZipFile:
             log.error(f"Invalid or corrupted session file: {filepath}")
@@ -106,6 +184,76 @@ class SessionManager:
             log.error(f"Failed to load session from {filepath}: {e}", exc_info=True)
             return None
             
+    def _load_incremental_session(self, zf):
+        """
+        Reads a 3.2-qt session: applies its deltas and opens the result tables.
+
+        Returns:
+            (session data, document entries for SessionDocuments)
+        """
+        state = SessionArchive.read_state(zf)
+        entries = [(self._session_document_path(digest, basename), f"blobs/{digest}", digest)
+                   for basename, digest in state['documents']]
+
+        self._clear_extracted_results()
+        os.makedirs(self.results_dir, exist_ok=True)
+        ocr_results = SessionArchive.read_result_rows(zf, state['results']['members'], self.results_dir)
+        if isinstance(ocr_results, ArrowResultRows):
+            self._loaded_results = ocr_results
+
+        log.info(f"Session loaded successfully ({len(ocr_results)} result rows, {state['delta_count']} deltas).")
+        session_data = {
+            'version': state['version'],
+            'image_basenames': [basename for basename, _ in state['documents']],
+            'templates': state['templates'],
+            'ocr_results': ocr_results,
+            'ui_settings': state['ui_settings'],
+        }
+        return session_data, entries
+
+    def _session_document_path(self, key, basename):
+        """
+        Where a session document is extracted: under its own name, in a
+        directory per content hash (per archive member for older sessions),
+        so neither same-named documents of the session nor files imported
+        through the ImportStore overwrite each other.
+        """
+        return os.path.join(self.imports_dir, '.session', key, basename)
+
+    def _set_documents(self, filepath, entries, session_data, lazy):
+        self.documents = SessionDocuments(filepath, entries)
+        if not lazy:
+            self.documents.ensure_all()
+        session_data['image_paths'] = list(self.documents.paths)
+        session_data['documents'] = self.documents
+
+    def _open_results_member(self, zf, member_name):
+        """Extracts the Arrow result table of a 3.1-qt session and opens it memory-mapped."""
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("This session stores its results as an Arrow table; install pyarrow to load it.")
+        self._clear_extracted_results()
+        os.makedirs(self.results_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix='.arrow', dir=self.results_dir)
+        with zf.open(member_name) as source, os.fdopen(fd, 'wb') as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+        self._loaded_results = ArrowResultRows(path)
+        log.info(f"Opened {len(self._loaded_results)} result rows from the session.")
+        return self._loaded_results
+
+    def _clear_extracted_results(self):
+        """Closes the previous session's result table and removes extracted tables."""
+        if self._loaded_results is not None:
+            self._loaded_results.close()
+            self._loaded_results = None
+        if not os.path.isdir(self.results_dir):
+            return
+        for filename in os.listdir(self.results_dir):
+            try:
+                os.unlink(os.path.join(self.results_dir, filename))
+            except OSError as e:
+                # Still mapped by another process on some platforms; removed next time
+                log.warning(f"Could not remove old session results {filename}: {e}")
+
     def copy_file_to_imports(self, original_path):
         """Copies a single file to the imports directory and returns the new path."""
         if not os.path.exists(original_path):
@@ -113,16 +261,37 @@ class SessionManager:
             return None
         
         base_name = os.path.basename(original_path)
-        local_copy_path = os.path.join(self.imports_dir, base_name)
-        
         try:
-            shutil.copy2(original_path, local_copy_path)
+            local_copy_path, _ = self.import_store.import_file(original_path)
             log.info(f"Copied '{base_name}' to imports directory.")
             return local_copy_path
         except Exception as e:
             log.error(f"Could not copy '{base_name}' to imports directory: {e}")
             return None
 
+    def _discard_current_imports(self):
+        """
+        Empties the imports directory without waiting for the deletion: the
+        directory is renamed aside and removed by a background thread, so
+        opening a session does not depend on the size of the previous one.
+        """
+        if not os.path.isdir(self.imports_dir):
+            os.makedirs(self.imports_dir, exist_ok=True)
+            return
+        discarded = f"{self.imports_dir}.discarded-{uuid.uuid4().hex}"
+        try:
+            os.rename(self.imports_dir, discarded)
+        except OSError as e:
+            # E.g. a file in it is still open on Windows
+            log.warning(f"Could not move the imports directory aside ({e}); clearing it in place.")
+            self.clear_current_imports()
+            return
+        os.makedirs(self.imports_dir, exist_ok=True)
+        # Also removes directories left behind by an interrupted earlier run
+        leftovers = glob.glob(f"{glob.escape(self.imports_dir)}.discarded-*")
+        threading.Thread(target=lambda: [shutil.rmtree(path, ignore_errors=True) for path in leftovers],
+                         name="discard-imports", daemon=True).start()
+
     def clear_current_imports(self):
         """Removes all files from the imports directory."""
         if not os.path.exists(self.imports_dir):
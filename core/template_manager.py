@@ -3,8 +3,29 @@
 import json
 import os
 import re
+from core.parse_plan import compile_parse_plan, search_fields, field_value, NOT_FOUND
+from core.label_matcher import LabelMatcher
 from utils.logger import log
 
+# Columns of the GSTR-7A tax table, mapped to their position in the table row.
+GSTR7A_TABLE_COLUMNS = {
+    "Value on which Tax deducted": 0,
+    "Amount of Tax Deducted at Source-Integrated Tax": 1,
+    "Amount of Tax Deducted at Source-Central Tax": 2,
+    "Amount of Tax Deducted at Source-State/UT Tax": 3,
+}
+_GSTR7A_TABLE_HEADER = r"Value on which Tax deducted\s*\(₹\)\s*Amount of Tax Deducted at Source\s*\(₹\)\s*\n\s*Integrated Tax\s*Central Tax\s*State/UT Tax"
+GSTR7A_TABLE_PATTERN = re.compile(_GSTR7A_TABLE_HEADER + r"\s*\n\s*([\d,.]+\s+[\d,.]+\s+[\d,.]+\s+[\d,.]+)", re.IGNORECASE)
+
+# Inline GSTR-7 patterns: (data key, compiled pattern, capture group).
+GSTR7_PATTERNS = (
+    ('Financial_Year', re.compile(r"Financial Year\s*([\d-]+)", re.IGNORECASE | re.DOTALL), 1),
+    ('Month', re.compile(r"Month\s*(\w+)", re.IGNORECASE | re.DOTALL), 1),
+    ('GSTIN', re.compile(r"1\. GSTIN\s*(\S+)", re.IGNORECASE | re.DOTALL), 1),
+    # Continue with all other regex searches...
+)
+GSTR7_MATCHER = LabelMatcher([pattern for _, pattern, _ in GSTR7_PATTERNS])
+
 class TemplateManager:
     """
     Manages loading, saving, and applying OCR templates.
@@ -12,7 +33,14 @@ class TemplateManager:
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.templates_dir = os.path.join(self.config_manager.get('workspace_dir'), 'templates')
+        # "regex" runs every field over the whole page; "label_prefilter"
+        # locates literal field labels first (same results, fewer scans).
+        self.use_label_prefilter = self.config_manager.get('text_parser_engine', 'regex') == 'label_prefilter'
         self.templates = self._load_templates()
+        # Precompiled parse plans for text_parser templates, keyed by name
+        self._plans = {}
+        for template in self.templates:
+            self._compile_plan(template)
 
     def _load_templates(self):
         """Loads all .json template files from the templates directory."""
@@ -53,10 +81,12 @@ class TemplateManager:
             log.info(f"Template '{template_data['name']}' saved to {filepath}")
         except Exception as e:
             log.error(f"Failed to save template {filename}: {e}")
+        self._compile_plan(template_data)
 
     def delete_template(self, template_name):
         """Deletes a template from the list and its corresponding file."""
         self.templates = [t for t in self.templates if t['name'] != template_name]
+        self._plans.pop(template_name, None)
         filename = f"{template_name.replace(' ', '_')}.json"
         filepath = os.path.join(self.templates_dir, filename)
         if os.path.exists(filepath):
@@ -73,70 +103,67 @@ class TemplateManager:
                 return t
         return None
 
+    def _compile_plan(self, template):
+        """Compiles a text_parser template into its parse plan and caches it."""
+        if template.get('type') != 'text_parser' or not template.get('name'):
+            return None
+        skip_columns = GSTR7A_TABLE_COLUMNS if template['name'] == "GSTR-7A" else ()
+        plan = compile_parse_plan(template, skip_columns)
+        self._plans[template['name']] = plan
+        return plan
+
+    def get_parse_plan(self, template_name):
+        """
+        Returns the precompiled parse plan for a text_parser template,
+        compiling it on first use if the template was added externally.
+        """
+        plan = self._plans.get(template_name)
+        if plan is None:
+            template = self.get_template_by_name(template_name)
+            if template:
+                plan = self._compile_plan(template)
+        return plan
+
     def apply_text_parser(self, template_name, full_page_text):
         """
         Applies a specific text parsing template to extracted text.
         This is where special GSTR logic is now centralized.
         """
         log.info(f"Applying text parser: {template_name}")
-        
-        template = self.get_template_by_name(template_name)
-        if not template or template.get('type') != 'text_parser':
+
+        plan = self.get_parse_plan(template_name)
+        if plan is None:
             return {}
 
         # Special parsers
         if template_name == "GSTR-7":
             return self._parse_gstr7_data(full_page_text)
         elif template_name == "GSTR-7A":
-            return self._parse_gstr7a_data(template, full_page_text)
-        
+            return self._parse_gstr7a_data(plan, full_page_text)
+
         # Generic Regex Parser
-        results = {}
-        for field in template.get('fields', []):
-            col_name = field['column_name']
-            regex = field['regex']
-            try:
-                match = re.search(regex, full_page_text, re.DOTALL | re.IGNORECASE)
-                if match:
-                    # Use group 1 if it exists, otherwise the full match
-                    results[col_name] = match.group(1).strip() if len(match.groups()) > 0 else match.group(0).strip()
-                else:
-                    results[col_name] = "[Not Found]"
-            except re.error as e:
-                log.error(f"Regex error in template '{template_name}' for field '{col_name}': {e}")
-                results[col_name] = "[Regex Error]"
-        return results
+        matches = search_fields(plan, full_page_text, self.use_label_prefilter)
+        return {field.column_name: field_value(field, match) for field, match in zip(plan.fields, matches)}
 
-    def _parse_gstr7a_data(self, template, text):
+    def _parse_gstr7a_data(self, plan, text):
         """Parses GSTR-7A data, including special table logic."""
-        results = {}
         # Table data extraction
-        table_header_regex = r"Value on which Tax deducted\s*\(₹\)\s*Amount of Tax Deducted at Source\s*\(₹\)\s*\n\s*Integrated Tax\s*Central Tax\s*State/UT Tax"
-        table_data_regex = table_header_regex + r"\s*\n\s*([\d,.]+\s+[\d,.]+\s+[\d,.]+\s+[\d,.]+)"
-        table_match = re.search(table_data_regex, text, re.IGNORECASE)
+        table_match = GSTR7A_TABLE_PATTERN.search(text)
         table_values = []
         if table_match:
             table_values = table_match.group(1).strip().split()
 
         # Process all fields
-        for field in template.get('fields', []):
-            col_name = field['column_name']
+        results = {}
+        matches = search_fields(plan, text, self.use_label_prefilter)
+        for field, match in zip(plan.fields, matches):
+            col_name = field.column_name
             # Handle special table fields first
-            if col_name == "Value on which Tax deducted":
-                results[col_name] = table_values[0] if len(table_values) > 0 else "[Not Found]"
-            elif col_name == "Amount of Tax Deducted at Source-Integrated Tax":
-                results[col_name] = table_values[1] if len(table_values) > 1 else "[Not Found]"
-            elif col_name == "Amount of Tax Deducted at Source-Central Tax":
-                results[col_name] = table_values[2] if len(table_values) > 2 else "[Not Found]"
-            elif col_name == "Amount of Tax Deducted at Source-State/UT Tax":
-                results[col_name] = table_values[3] if len(table_values) > 3 else "[Not Found]"
+            if col_name in GSTR7A_TABLE_COLUMNS:
+                index = GSTR7A_TABLE_COLUMNS[col_name]
+                results[col_name] = table_values[index] if len(table_values) > index else NOT_FOUND
             else: # Fallback to generic regex for other fields
-                regex = field['regex']
-                match = re.search(regex, text, re.DOTALL | re.IGNORECASE)
-                if match:
-                    results[col_name] = match.group(1).strip() if len(match.groups()) > 0 else match.group(0).strip()
-                else:
-                    results[col_name] = "[Not Found]"
+                results[col_name] = field_value(field, match)
         return results
 
     def _parse_gstr7_data(self, text):
@@ -147,20 +174,21 @@ class TemplateManager:
             'Table3_No_of_Records': '0', 'Table3_Total_Amount_Paid_to_Deductees_INR': '0.00',
             # ... and so on for all 44 fields.
         }
-        
-        def search_and_clean(pattern, content, group=1):
-            match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+
+        def clean(match, group=1):
             if match:
                 val = match.group(group).strip()
                 return ' '.join(val.split())
             return ""
 
-        # ... (The rest of the GSTR-7 parsing regex from the original file would go here)
-        data['Financial_Year'] = search_and_clean(r"Financial Year\s*([\d-]+)", text)
-        data['Month'] = search_and_clean(r"Month\s*(\w+)", text)
-        data['GSTIN'] = search_and_clean(r"1\. GSTIN\s*(\S+)", text)
-        # Continue with all other regex searches...
+        # ... (The rest of the GSTR-7 parsing regex from the original file would go here,
+        # precompiled in GSTR7_PATTERNS)
+        if self.use_label_prefilter:
+            matches = GSTR7_MATCHER.search_all(text)
+        else:
+            matches = [pattern.search(text) for _, pattern, _ in GSTR7_PATTERNS]
+        for (key, _, group), match in zip(GSTR7_PATTERNS, matches):
+            data[key] = clean(match, group)
 
         log.info(f"Parsed GSTR-7 data. GSTIN: {data.get('GSTIN')}")
         return data
-
@@ -0,0 +1,134 @@
+# ocr_tool_qt/core/tesseract_pool.py
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+from core.word_index import Word
+from utils.logger import log
+
+class TesseractApiPool:
+    """
+    Long-lived Tesseract engines (tesserocr API handles), keyed by
+    (lang, oem, psm, whitelist). Each engine loads its traineddata once and
+    receives raw pixel buffers in memory, so callers pay neither process
+    startup, temp PNG files nor model loading per snip.
+
+    In the batch engine every pool worker process owns one pool, which gives
+    one engine per core for each key; `max_per_key` bounds the engines a
+    single process creates when it is used from several threads.
+
+    close() ends the idle engines at once and engines still checked out
+    when they are returned; the pool can be used again afterwards.
+    """
+    def __init__(self, tessdata_path=None, dpi=300, max_per_key=None):
+        self.tessdata_path = tessdata_path
+        self.dpi = int(dpi)
+        self.max_per_key = max_per_key or os.cpu_count() or 1
+        self._cond = threading.Condition()
+        self._idle = {}     # key -> [api, ...]
+        self._created = {}  # key -> number of engines created
+        self._generation = 0  # Bumped by close(); older engines are ended when returned
+
+    def _create_api(self, key):
+        lang, oem, psm, whitelist = key
+        log.info(f"Starting Tesseract engine for lang={lang} oem={oem} psm={psm}.")
+        kwargs = {'lang': lang, 'oem': int(oem), 'psm': int(psm)}
+        if self.tessdata_path:
+            kwargs['path'] = self.tessdata_path
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        if whitelist:
+            api.SetVariable("tessedit_char_whitelist", whitelist)
+        return api
+
+    @contextmanager
+    def acquire(self, lang, oem, psm, whitelist=''):
+        """Checks out an engine for the given settings, creating one if allowed."""
+        key = (lang, str(oem), str(psm), whitelist or '')
+        api = None
+        with self._cond:
+            generation = self._generation
+            while True:
+                idle = self._idle.setdefault(key, [])
+                if idle:
+                    api = idle.pop()
+                    break
+                if self._created.get(key, 0) < self.max_per_key:
+                    self._created[key] = self._created.get(key, 0) + 1
+                    break
+                self._cond.wait()
+
+        if api is None:
+            try:
+                api = self._create_api(key)
+            except Exception:
+                with self._cond:
+                    if generation == self._generation:
+                        self._created[key] -= 1
+                    self._cond.notify()
+                raise
+        try:
+            yield api
+        finally:
+            with self._cond:
+                closed = generation != self._generation
+                if not closed:
+                    self._idle[key].append(api)
+                    self._cond.notify()
+            if closed:
+                api.End()
+
+    def image_to_string(self, image, lang, oem, psm, whitelist=''):
+        """
+        OCRs an image with a pooled engine.
+
+        Args:
+            image: A uint8 NumPy array (grayscale or RGB, views allowed) or a PIL image.
+        """
+        with self.acquire(lang, oem, psm, whitelist) as api:
+            self._set_image(api, image)
+            return api.GetUTF8Text()
+
+    def image_to_words(self, image, lang, oem, psm):
+        """OCRs a whole page once and returns its Words in reading order."""
+        with self.acquire(lang, oem, psm) as api:
+            self._set_image(api, image)
+            api.Recognize()
+            words = []
+            iterator = api.GetIterator()
+            if iterator is None:
+                return words
+            level = tesserocr.RIL.WORD
+            for result in tesserocr.iterate_level(iterator, level):
+                text = (result.GetUTF8Text(level) or '').strip()
+                box = result.BoundingBox(level)
+                if text and box:
+                    words.append(Word(*box, text, result.Confidence(level), len(words)))
+            return words
+
+    def _set_image(self, api, image):
+        if hasattr(image, 'shape'):
+            height, width = image.shape[:2]
+            channels = image.shape[2] if image.ndim == 3 else 1
+            buffer = image.tobytes()  # C-contiguous copy of the crop
+            api.SetImageBytes(buffer, width, height, channels, width * channels)
+        else:
+            api.SetImage(image)
+        api.SetSourceResolution(self.dpi)
+
+    def close(self):
+        """Shuts down every engine: idle ones now, checked-out ones when they are returned."""
+        with self._cond:
+            idle = [api for apis in self._idle.values() for api in apis]
+            self._idle.clear()
+            self._created.clear()
+            self._generation += 1
+            self._cond.notify_all()
+        for api in idle:
+            api.End()
@@ -0,0 +1,52 @@
+# ocr_tool_qt/core/text_layer.py
+
+import math
+from core.word_index import Word
+
+def read_text_layer(page):
+    """
+    Reads the text layer of a PyMuPDF page as plain data: the page size and
+    its words, both in PDF points of the page as displayed (rotation
+    applied), in reading order.
+
+    Returns:
+        A dict {'size': [width, height], 'words': [[x1, y1, x2, y2, text], ...]}
+        that can be stored as JSON.
+    """
+    a, b, c, d, e, f = page.rotation_matrix
+    words = []
+    for x1, y1, x2, y2, text, *_ in page.get_text("words", sort=True):
+        xs = [x * a + y * c + e for x, y in ((x1, y1), (x2, y2))]
+        ys = [x * b + y * d + f for x, y in ((x1, y1), (x2, y2))]
+        words.append([round(min(xs), 2), round(min(ys), 2), round(max(xs), 2), round(max(ys), 2), text])
+    return {'size': [page.rect.width, page.rect.height], 'words': words}
+
+
+def count_text_chars(text):
+    """Counts the non-whitespace characters of extracted page text."""
+    return len(''.join(text.split()))
+
+
+def is_native_text(char_count, min_chars):
+    """
+    True if a page's text layer is dense enough to be used instead of OCR:
+    it must hold at least `min_chars` (and never less than one)
+    non-whitespace characters.
+    """
+    return char_count >= max(1, int(min_chars))
+
+
+def text_layer_words(layer, dpi):
+    """
+    Scales the words of a text layer to page pixels at `dpi`, the
+    coordinate space of a page rendered for OCR, so they can be clipped
+    against snip boxes with a WordGrid.
+
+    Returns:
+        (words, (height, width)) with the page shape in pixels.
+    """
+    scale = dpi / 72.0
+    words = [Word(int(x1 * scale), int(y1 * scale), int(x2 * scale) + 1, int(y2 * scale) + 1, text, 100.0, i)
+             for i, (x1, y1, x2, y2, text) in enumerate(layer['words'])]
+    width, height = layer['size']
+    return words, (math.ceil(height * scale), math.ceil(width * scale))
@@ -0,0 +1,105 @@
+# ocr_tool_qt/core/thumbnail_cache.py
+
+import io
+import os
+import threading
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+from core.disk_cache import DiskCache
+from core.file_hash import file_sha256
+from utils.logger import log
+
+# Bump whenever the way thumbnails are produced changes.
+THUMBNAIL_VERSION = 1
+
+# PyMuPDF must not render from several threads at once
+_fitz_lock = threading.Lock()
+
+
+def make_thumbnail_png(path, size=64):
+    """
+    Renders a PNG thumbnail fitting in `size` x `size`: the first page of a
+    PDF, or a downscaled image. Only the first page is rendered, and JPEGs
+    are decoded at a reduced scale.
+
+    Returns:
+        The PNG bytes, or None if the file cannot be read.
+    """
+    if path.lower().endswith('.pdf'):
+        if not PYMUPDF_AVAILABLE:
+            return None
+        with _fitz_lock, fitz.open(path) as doc:
+            if not doc.page_count:
+                return None
+            page = doc.load_page(0)
+            zoom = size / max(page.rect.width, page.rect.height)
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).tobytes("png")
+
+    if not PIL_AVAILABLE:
+        return None
+    with Image.open(path) as image:
+        image.draft('RGB', (size, size))  # Reduced-scale JPEG decoding
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Persistent PNG thumbnails for the file list under the workspace cache
+    dir. Thumbnails are keyed by file content hash and size, so a session
+    that is reopened (and re-extracted with new mtimes) reuses them; a
+    (path, size, mtime) index maps unchanged files to their hash without
+    reading them again. Safe to use from several threads.
+    """
+    def __init__(self, cache_dir, max_bytes, size=64):
+        self._store = DiskCache(cache_dir, max_bytes)
+        self.size = int(size)
+
+    def _content_key(self, path):
+        stat = os.stat(path)
+        stat_key = f"index:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        file_hash = self._store.get(stat_key)
+        if file_hash is None:
+            file_hash = file_sha256(path)
+            self._store.put(stat_key, file_hash)
+        return f"thumb:{file_hash}:{self.size}:{THUMBNAIL_VERSION}"
+
+    def get(self, path):
+        """Returns the cached PNG thumbnail of a file, or None on a miss."""
+        return self._store.get_bytes(self._content_key(path))
+
+    def get_or_create(self, path):
+        """Returns the PNG thumbnail of a file, rendering and storing it on a miss."""
+        key = self._content_key(path)
+        data = self._store.get_bytes(key)
+        if data is not None:
+            return data
+        try:
+            data = make_thumbnail_png(path, self.size)
+        except Exception as e:
+            log.warning(f"Could not create a thumbnail for {path}: {e}")
+            return None
+        if data is not None:
+            self._store.put_bytes(key, data)
+        return data
+
+    def prune(self):
+        self._store.prune()
+
+    def clear(self):
+        self._store.clear()
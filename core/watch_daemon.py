@@ -0,0 +1,212 @@
+# ocr_tool_qt/core/watch_daemon.py
+
+import os
+import queue
+import threading
+import time
+
+from PyQt5.QtCore import Qt
+
+from core.batch_engine import resolve_worker_count
+from core.exporter import result_columns, make_export_path, open_result_writer
+from core.file_importer import FileImporter
+from core.folder_watcher import FolderWatcher
+from core.ocr_processor import OcrProcessor
+from utils.logger import log
+
+
+class WatchDaemon:
+    """
+    Headless ingestion: watches a folder for new documents, imports them
+    with a FileImporter and processes them with OcrProcessors, appending
+    every result row to one streaming export file.
+
+    New stable files (see FolderWatcher) are collected until no new file
+    has arrived for `debounce_ms`, a batch is full, or the oldest waiting
+    file has waited `max_wait_ms`; a burst of scans thus becomes a few
+    batches instead of one run per file. Batches go through a bounded
+    queue to `workers` processing threads, each with its own importer and
+    processor, so at most `workers` batches run at once and polling pauses
+    while the queue is full. The processors share one process pool of
+    'max_workers' processes for the whole run instead of starting one per
+    batch. stop() stops the running batches too; files still waiting are
+    left for the next start.
+
+    No Qt event loop is needed: the workers' signals are connected
+    directly and handled in the thread that emits them.
+    """
+    def __init__(self, config_manager, template_manager, folder, templates=None,
+                 include=(), exclude=(), export_format=None, skip_existing=None):
+        """
+        Args:
+            config_manager: The ConfigManager; 'watch_*' settings are read from it.
+            template_manager: The TemplateManager.
+            folder (str): The folder to watch, including subfolders.
+            templates (list): Names of the templates to apply; None for all.
+            include, exclude: File globs, as for FolderWatcher.
+            export_format (str): 'csv', 'xlsx', 'parquet' or 'arrow'; None
+                for the 'watch_export_format' setting. CSV rows are on disk
+                as soon as a batch is done; the others buffer rows.
+            skip_existing (bool): Ignore files already in the folder at
+                start; None for the 'watch_skip_existing' setting.
+        """
+        self.config_manager = config_manager
+        self.template_manager = template_manager
+        self.folder = folder
+        self.templates = [t for t in template_manager.get_templates() if templates is None or t.get('name') in templates]
+        self.poll_interval = config_manager.get("watch_poll_interval_ms", 1000) / 1000.0
+        self.debounce = config_manager.get("watch_debounce_ms", 500) / 1000.0
+        self.max_wait = config_manager.get("watch_max_wait_ms", 2000) / 1000.0
+        self.max_batch = max(1, config_manager.get("watch_batch_files", 50))
+        self.workers = resolve_worker_count(config_manager.get("watch_workers", 0))
+        self.export_format = (export_format or config_manager.get("watch_export_format", "csv")).lower().lstrip('.')
+        if skip_existing is None:
+            skip_existing = config_manager.get("watch_skip_existing", False)
+        self.watcher = FolderWatcher(folder, include, exclude,
+                                     settle_seconds=config_manager.get("watch_settle_ms", 2000) / 1000.0)
+        if skip_existing:
+            self.watcher.skip_existing()
+
+        self.export_path = None
+        self.stats = {'batches': 0, 'files': 0, 'rows': 0, 'errors': 0, 'max_latency': 0.0}
+        self._queue = queue.Queue(maxsize=self.workers)
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._pipelines = []  # (importer, processor, imported) per worker thread
+
+    def stop(self):
+        """Asks run() and the running batches to finish; safe to call from a signal handler or another thread."""
+        log.info("Watch folder stop requested.")
+        self._stop_event.set()
+        for importer, processor, _ in list(self._pipelines):
+            importer.stop()
+            processor.stop()
+
+    def run(self):
+        """Watches the folder until stop() is called; blocks the calling thread."""
+        if not self.templates:
+            raise ValueError("No templates to apply; create a template first.")
+        # Built here so that setup errors surface from run(), not in a thread
+        self._pipelines = [self._make_pipeline() for _ in range(self.workers)]
+        threads = [threading.Thread(target=self._worker, args=pipeline, name=f"watch-worker-{i}", daemon=True)
+                   for i, pipeline in enumerate(self._pipelines)]
+        executor = None
+        ocr_workers = resolve_worker_count(self.config_manager.get("max_workers", 0))
+        if ocr_workers > 1:
+            # One pool for every batch: starting processes costs more than a small batch
+            executor = self._pipelines[0][1].make_batch_executor(ocr_workers)
+            for _, processor, _ in self._pipelines:
+                processor.share_executor(executor, ocr_workers)
+        exports_dir = os.path.join(self.config_manager.get('workspace_dir', 'data'), 'exports')
+        try:
+            self.export_path = make_export_path(exports_dir, self.export_format, prefix="watch")
+            self._writer = open_result_writer(self.export_path, result_columns(self.templates))
+        except Exception:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        log.info(f"Watching {self.folder} with {self.workers} workers; streaming results to {self.export_path}")
+
+        for thread in threads:
+            thread.start()
+        pending, first_arrival, last_arrival = [], 0.0, 0.0
+        try:
+            while not self._stop_event.is_set():
+                started = time.monotonic()
+                ready = self.watcher.poll()
+                now = time.monotonic()
+                if ready:
+                    if not pending:
+                        first_arrival = now
+                    pending.extend(ready)
+                    last_arrival = now
+                    log.info(f"{len(ready)} new files in {self.folder}.")
+                while pending and (len(pending) >= self.max_batch or now - last_arrival >= self.debounce
+                                   or now - first_arrival >= self.max_wait):
+                    batch, pending = pending[:self.max_batch], pending[self.max_batch:]
+                    # Blocks while all workers are busy and the queue is full
+                    self._queue.put(batch)
+                    first_arrival = now
+                # Poll more often while a burst is being collected
+                wait = min(self.poll_interval, self.debounce) if pending else self.poll_interval
+                self._stop_event.wait(max(0.0, wait - (time.monotonic() - started)))
+            if pending:
+                log.info(f"{len(pending)} new files were not processed before the stop.")
+        finally:
+            for _ in threads:
+                self._queue.put(None)
+            for thread in threads:
+                thread.join()
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+            with self._write_lock:
+                self._writer.close()
+            stats = self.stats
+            log.info(f"Watch folder stopped: {stats['files']} files, {stats['rows']} rows, {stats['errors']} errors "
+                     f"in {stats['batches']} batches; max latency {stats['max_latency']:.1f}s. Results: {self.export_path}")
+
+    def _make_pipeline(self):
+        """Returns a worker's FileImporter, OcrProcessor and the list the importer's paths are collected in."""
+        importer = FileImporter(os.path.join(self.config_manager.get('workspace_dir', 'data'), 'imports'),
+                                self.config_manager.get("import_workers", 8),
+                                self.config_manager.get("import_link_sources", False))
+        processor = OcrProcessor(self.config_manager, self.template_manager)
+        processor.templates_to_use = self.templates
+        processor.ocr_engine = self.config_manager.get("default_ocr_engine", "none")
+        processor.export_format = ""  # Rows go to the daemon's single export
+        imported = []
+        importer.files_imported.connect(imported.extend, Qt.DirectConnection)
+        importer.error_occurred.connect(self._on_error, Qt.DirectConnection)
+        processor.results_ready.connect(self._write_rows, Qt.DirectConnection)
+        processor.error_occurred.connect(self._on_error, Qt.DirectConnection)
+        return importer, processor, imported
+
+    def _worker(self, importer, processor, imported):
+        """Processing thread: imports and processes queued batches until it gets None."""
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if self._stop_event.is_set():
+                log.info(f"Skipping a batch of {len(batch)} watched files after the stop.")
+                continue
+            try:
+                imported.clear()
+                importer.set_files_to_import(batch)
+                importer.run()
+                processor.files_to_process = list(imported)
+                if not self._stop_event.is_set():
+                    processor.run()
+            except Exception as e:
+                log.error(f"Watch folder batch failed: {e}", exc_info=True)
+                self._on_error(str(e))
+            # Landing time: the files' last modification
+            latency = max(0.0, time.time() - min(self._mtime(path) for path in batch))
+            with self._write_lock:
+                self.stats['batches'] += 1
+                self.stats['files'] += len(imported)
+                self.stats['max_latency'] = max(self.stats['max_latency'], latency)
+            log.info(f"Processed {len(imported)} watched files, {latency:.1f}s after they landed.")
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return time.time()
+
+    def _write_rows(self, rows):
+        # Runs inside the processor's signal emission, so it must not raise
+        try:
+            with self._write_lock:
+                self._writer.write_rows(rows)
+                self.stats['rows'] += len(rows)
+        except Exception as e:
+            log.error(f"Could not write {len(rows)} rows to {self.export_path}: {e}", exc_info=True)
+            self._on_error(str(e))
+
+    def _on_error(self, message):
+        """Counts errors; the importer and processor log them when they emit them."""
+        with self._write_lock:
+            self.stats['errors'] += 1
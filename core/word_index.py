@@ -0,0 +1,56 @@
+# ocr_tool_qt/core/word_index.py
+
+from collections import namedtuple, defaultdict
+
+# One recognised word: its box in page pixels, text, confidence (0-100)
+# and position in reading order.
+Word = namedtuple('Word', ['x1', 'y1', 'x2', 'y2', 'text', 'conf', 'order'])
+
+
+def words_from_tesseract_data(data):
+    """
+    Converts the dict returned by pytesseract.image_to_data(...,
+    output_type=Output.DICT) into Words, dropping empty entries and the
+    non-word layout rows Tesseract reports with a confidence of -1.
+    """
+    words = []
+    for i, text in enumerate(data.get('text', [])):
+        text = (text or '').strip()
+        conf = float(data['conf'][i])
+        if not text or conf < 0:
+            continue
+        x, y = int(data['left'][i]), int(data['top'][i])
+        words.append(Word(x, y, x + int(data['width'][i]), y + int(data['height'][i]), text, conf, len(words)))
+    return words
+
+
+class WordGrid:
+    """
+    A uniform-grid spatial index over the words of a page. Each word is
+    filed under the cell containing its centre, so a box query only visits
+    the cells the box overlaps and every word belongs to at most one snip
+    whose box contains its centre.
+    """
+    def __init__(self, words, cell_size=64):
+        self.cell_size = max(1, int(cell_size))
+        self._cells = defaultdict(list)
+        for word in words:
+            cx, cy = (word.x1 + word.x2) // 2, (word.y1 + word.y2) // 2
+            self._cells[(cx // self.cell_size, cy // self.cell_size)].append(word)
+
+    def query(self, x1, y1, x2, y2):
+        """Returns the words whose centre lies inside the box, in reading order."""
+        size = self.cell_size
+        found = []
+        for cell_x in range(x1 // size, x2 // size + 1):
+            for cell_y in range(y1 // size, y2 // size + 1):
+                for word in self._cells.get((cell_x, cell_y), ()):
+                    cx, cy = (word.x1 + word.x2) // 2, (word.y1 + word.y2) // 2
+                    if x1 <= cx < x2 and y1 <= cy < y2:
+                        found.append(word)
+        found.sort(key=lambda w: w.order)
+        return found
+
+    def text_in(self, x1, y1, x2, y2):
+        """Returns the text of the words inside the box, joined in reading order."""
+        return ' '.join(word.text for word in self.query(x1, y1, x2, y2))
@@ -0,0 +1,247 @@
+# ocr_tool_qt/core/zip_packing.py
+
+import os
+import shutil
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from core.batch_engine import resolve_worker_count, iter_ordered_results
+
+# Formats that are compressed already; deflating them again gains next to nothing.
+STORED_EXTENSIONS = frozenset({
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.jp2', '.heic',
+    '.zip', '.gz', '.bz2', '.xz', '.7z', '.docx', '.xlsx', '.arrow', '.parquet',
+})
+# Other files (PDFs, TIFFs, ...) are deflated only if samples of them shrink
+# by at least this fraction at a fast compression level.
+MIN_DEFLATE_SAVING = 0.1
+SAMPLE_SIZE = 64 * 1024
+# Larger compressible members are deflated while being written instead of
+# being compressed into memory by a worker.
+MAX_BUFFERED_MEMBER = 128 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+# Offsets into a local file header (see zipfile's _FH_* constants)
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+# End of central directory record, and the ZIP64 locator and record (see
+# zipfile's structEndArchive, structEndArchive64Locator and structEndArchive64)
+_END_RECORD = struct.Struct("<4s4H2LH")
+_END_LOCATOR64 = struct.Struct("<4sLQL")
+_END_RECORD64 = struct.Struct("<4sQ2H2L4Q")
+
+# Writing members whose data is already compressed relies on ZipFile
+# internals (_lock, _writing, _writecheck, _didModify, start_dir, fp) that
+# are the same from Python 3.6 through 3.13. Other versions, or a ZipFile
+# without them, take the public ZipFile.open(..., 'w') path, which
+# compresses in the writing thread.
+RAW_WRITES = (3, 6) <= sys.version_info[:2] <= (3, 13)
+_RAW_WRITE_ATTRIBUTES = ('_lock', '_writing', '_writecheck', '_didModify', 'start_dir', 'fp')
+
+
+def choose_compression(path):
+    """Returns ZIP_STORED or ZIP_DEFLATED for a file, by extension and by measured compressibility."""
+    if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    size = os.path.getsize(path)
+    if size < SAMPLE_SIZE:
+        return zipfile.ZIP_DEFLATED
+    raw = compressed = 0
+    with open(path, 'rb') as f:
+        # Start, middle and end: PDFs keep uncompressed structure at both ends
+        for offset in (0, (size - SAMPLE_SIZE) // 2, size - SAMPLE_SIZE):
+            f.seek(offset)
+            sample = f.read(SAMPLE_SIZE)
+            raw += len(sample)
+            compressed += len(zlib.compress(sample, 1))
+    return zipfile.ZIP_DEFLATED if compressed <= raw * (1 - MIN_DEFLATE_SAVING) else zipfile.ZIP_STORED
+
+
+def _iter_file_chunks(path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            yield chunk
+
+
+def raw_writes_supported(zf):
+    """True if write_raw_member() can be used on an open ZipFile."""
+    return RAW_WRITES and all(hasattr(zf, name) for name in _RAW_WRITE_ATTRIBUTES)
+
+
+def central_directory_offset(fp):
+    """Returns where the central directory of a ZIP file starts, read from its end records."""
+    fp.seek(0, os.SEEK_END)
+    size = fp.tell()
+    tail_size = min(size, _END_RECORD.size + 0xFFFF)  # The record plus the longest comment
+    fp.seek(size - tail_size)
+    tail = fp.read(tail_size)
+    pos = len(tail)
+    while True:
+        pos = tail.rfind(b"PK\x05\x06", 0, pos)
+        if pos < 0 or pos + _END_RECORD.size > len(tail):
+            raise zipfile.BadZipFile("End of central directory record not found")
+        record = _END_RECORD.unpack_from(tail, pos)
+        if pos + _END_RECORD.size + record[7] == len(tail):  # Ends with its comment
+            break
+    offset = record[6]
+    if offset == 0xFFFFFFFF and pos >= _END_LOCATOR64.size:
+        locator = _END_LOCATOR64.unpack_from(tail, pos - _END_LOCATOR64.size)
+        if locator[0] == b"PK\x06\x07":
+            fp.seek(locator[2])
+            offset = _END_RECORD64.unpack(fp.read(_END_RECORD64.size))[9]
+    return offset
+
+
+def _prepare_member(member, buffered=True):
+    """
+    Worker task: chooses a file's compression method and computes its CRC
+    and, for deflated members, its compressed bytes. zlib releases the GIL,
+    so this runs in parallel across threads.
+
+    Returns:
+        (compress_type, crc, file_size, deflated bytes or None). crc is None
+        for files that are compressed while being written: large
+        compressible ones, or all of them without `buffered`.
+    """
+    path, _ = member
+    compress_type = choose_compression(path)
+    size = os.path.getsize(path)
+    if not buffered or (compress_type == zipfile.ZIP_DEFLATED and size > MAX_BUFFERED_MEMBER):
+        return compress_type, None, size, None
+    crc = 0
+    parts = [] if compress_type == zipfile.ZIP_DEFLATED else None
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    for chunk in _iter_file_chunks(path):
+        crc = zlib.crc32(chunk, crc)
+        if parts is not None:
+            parts.append(compressor.compress(chunk))
+    if parts is not None:
+        parts.append(compressor.flush())
+        return compress_type, crc, size, b''.join(parts)
+    return compress_type, crc, size, None
+
+
+def write_raw_member(zf, zinfo, data_chunks):
+    """
+    Writes a member whose data is already in its final (stored or deflated)
+    form. `zinfo` must carry compress_type, CRC, file_size and
+    compress_size. Mirrors what ZipFile.open(..., 'w') does, minus the
+    compression, so that compression can happen elsewhere. Check
+    raw_writes_supported() first.
+
+    Stored data is checked against zinfo.CRC as it is written, since the
+    CRC usually comes from an earlier read of the file. On a mismatch an
+    IOError is raised and the partly written member is removed.
+    """
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    with zf._lock:
+        if zf._writing:
+            raise ValueError("Can't write to the ZIP file while another write handle is open on it.")
+        zinfo.flag_bits = 0x00
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16
+        zf.fp.seek(zf.start_dir)
+        zinfo.header_offset = zf.fp.tell()
+        zf._writecheck(zinfo)
+        zf._didModify = True
+        try:
+            zf.fp.write(zinfo.FileHeader(zip64))
+            written = 0
+            crc = 0
+            check_crc = zinfo.compress_type == zipfile.ZIP_STORED
+            for chunk in data_chunks:
+                zf.fp.write(chunk)
+                written += len(chunk)
+                if check_crc:
+                    crc = zlib.crc32(chunk, crc)
+            if written != zinfo.compress_size or (check_crc and crc != zinfo.CRC):
+                raise IOError(f"{zinfo.filename} changed while it was being written")
+        except BaseException:
+            # Drop the partial member; ZipFile only truncates archives opened with 'a'
+            zf.fp.seek(zf.start_dir)
+            zf.fp.truncate()
+            raise
+        zf.start_dir = zf.fp.tell()
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+
+
+def copy_member_raw(source, info, target):
+    """
+    Copies a member between archives without decompressing and
+    recompressing it, or through ZipFile.open() where raw writes are not
+    supported.
+    """
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    if not (raw_writes_supported(source) and raw_writes_supported(target)):
+        with source.open(info) as src, target.open(zinfo, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dst:
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+        return
+
+    source.fp.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(source.fp.read(_LOCAL_HEADER.size))
+    data_offset = info.header_offset + _LOCAL_HEADER.size + header[10] + header[11]
+
+    def chunks():
+        remaining = info.compress_size
+        while remaining:
+            source.fp.seek(data_offset + info.compress_size - remaining)
+            chunk = source.fp.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f"Unexpected end of archive in {info.filename}")
+            remaining -= len(chunk)
+            yield chunk
+
+    zinfo.CRC, zinfo.file_size, zinfo.compress_size = info.CRC, info.file_size, info.compress_size
+    with source._lock:
+        write_raw_member(target, zinfo, chunks())
+
+
+def pack_files(zf, members, workers=0):
+    """
+    Adds files to an open archive. Each file's compression method is
+    chosen by choose_compression(), and CRCs and deflated data are computed
+    in parallel worker threads; the archive itself is written in order by
+    the calling thread.
+
+    Args:
+        zf: A ZipFile opened for writing or appending.
+        members (list): (path, arcname) pairs.
+        workers (int): Thread count; 0 means one per CPU core.
+
+    Returns:
+        Stats: files, input_bytes, output_bytes, stored, deflated, seconds.
+        Where raw writes are not supported (see RAW_WRITES), only the
+        compression method is chosen in parallel.
+    """
+    stats = {'files': 0, 'input_bytes': 0, 'output_bytes': 0, 'stored': 0, 'deflated': 0, 'seconds': 0.0}
+    if not members:
+        return stats
+    start = time.perf_counter()
+    workers = min(resolve_worker_count(workers), len(members))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # The window bounds how much deflated data waits in memory
+        for (path, arcname), (compress_type, crc, size, data) in iter_ordered_results(
+                pool, partial(_prepare_member, buffered=raw_writes_supported(zf)), members,
+                max_in_flight=workers * 2):
+            if crc is None:
+                zf.write(path, arcname, compress_type=compress_type)
+                compressed_size = zf.getinfo(arcname).compress_size
+            else:
+                zinfo = zipfile.ZipInfo.from_file(path, arcname)
+                zinfo.compress_type = compress_type
+                zinfo.CRC, zinfo.file_size = crc, size
+                zinfo.compress_size = size if data is None else len(data)
+                write_raw_member(zf, zinfo, _iter_file_chunks(path) if data is None else [data])
+                compressed_size = zinfo.compress_size
+            stats['files'] += 1
+            stats['input_bytes'] += size
+            stats['output_bytes'] += compressed_size
+            stats['stored' if compress_type == zipfile.ZIP_STORED else 'deflated'] += 1
+    stats['seconds'] = time.perf_counter() - start
+    return stats
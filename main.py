@@ -1,27 +1,73 @@
 # ocr_tool_qt/main.py
 
+import argparse
+import signal
 import sys
-from PyQt5.QtWidgets import QApplication
 
-# Import only the main window. All other modules will be managed by it.
-from app.main_window import MainWindow
 from utils.logger import log
 
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="OCR Tool")
+    parser.add_argument("--watch", metavar="FOLDER",
+                        help="Run headless: process documents as they appear in FOLDER (and its subfolders).")
+    parser.add_argument("--template", action="append", metavar="NAME",
+                        help="Template to apply in watch mode; repeat for several. Default: all templates.")
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="Only watch files matching GLOB, e.g. '*.pdf' or 'invoices/**'.")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Ignore files and folders matching GLOB.")
+    parser.add_argument("--export-format", choices=["csv", "xlsx", "parquet", "arrow"],
+                        help="Format of the results file (default: the watch_export_format setting).")
+    parser.add_argument("--skip-existing", action="store_true", default=None,
+                        help="Only process files that arrive after the start.")
+    parser.add_argument("--config", default="config.json", help="Configuration file.")
+    # Anything else is left to Qt (e.g. -style)
+    return parser.parse_known_args(argv)
+
+def run_watch(args):
+    """Runs the headless watch-folder mode until interrupted; returns the exit code."""
+    # No QApplication or event loop: the daemon connects its workers' signals directly
+    from core.config_manager import ConfigManager
+    from core.template_manager import TemplateManager
+    from core.watch_daemon import WatchDaemon
+
+    config_manager = ConfigManager(args.config)
+    daemon = WatchDaemon(config_manager, TemplateManager(config_manager), args.watch, args.template,
+                         args.include, args.exclude, args.export_format, args.skip_existing)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    try:
+        daemon.run()
+    except ValueError as e:
+        log.error(f"Cannot watch {args.watch}: {e}")
+        return 1
+    return 0
+
 def main():
     """
     The main entry point for the OCR Tool application.
     Initializes the QApplication and the main window. The window itself
     handles its own deferred initialization to prevent startup freezes.
+    With --watch, runs the headless watch-folder mode instead.
     """
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.watch:
+        log.info(f"--- Watch Folder Mode Starting: {args.watch} ---")
+        sys.exit(run_watch(args))
+
     log.info("--- Application Starting ---")
-    
-    app = QApplication(sys.argv)
-    
+
+    from PyQt5.QtWidgets import QApplication
+    # Import only the main window. All other modules will be managed by it.
+    from app.main_window import MainWindow
+
+    app = QApplication(sys.argv[:1] + qt_args)
+
     # Create the main window. The constructor will only perform the most
     # basic setup to ensure the window is shown quickly.
     main_win = MainWindow()
     main_win.show()
-    
+
     # Start the Qt Event Loop.
     sys.exit(app.exec_())
 
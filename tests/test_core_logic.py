@@ -2,15 +2,42 @@
 
 import pytest
 import os
+import io
+import zipfile
 import json
+import re
 from unittest.mock import MagicMock
 
+import numpy as np
+
 # To run tests, you'll need to configure the Python path
 # For now, we assume the core modules can be imported.
 # In a real project, you'd use a proper setup (e.g., setup.py or pyproject.toml)
 
 from core.config_manager import ConfigManager
 from core.template_manager import TemplateManager
+from core.label_matcher import LabelMatcher, literal_label
+from core.disk_cache import DiskCache
+from core.ocr_cache import OcrResultCache
+from core.memory_cache import SizedLRUCache
+from core.thumbnail_cache import ThumbnailCache
+from core.result_store import ResultStore
+from core.result_batcher import ResultBatcher, Throttle
+from core import exporter
+from core.exporter import result_columns, export_rows, open_result_writer
+from core import zip_packing
+from core.zip_packing import pack_files, copy_member_raw
+from core.import_store import ImportStore
+from core.path_index import PathIndex
+from core.folder_watcher import FolderWatcher
+from core.folder_scanner import iter_folder_files, sniff_file_type, import_name
+from core.session_manager import SessionManager
+from core.session_archive import SessionArchive
+from core.arrow_results import ArrowResultRows
+from core.tesseract_pool import TesseractApiPool
+from core.word_index import WordGrid, words_from_tesseract_data
+from core.text_layer import read_text_layer, count_text_chars, is_native_text, text_layer_words
+from core.batch_engine import parse_page_selection, expand_work_units, chunk_work_units, iter_ordered_results
 
 # Fixture to create a temporary config file for testing
 @pytest.fixture
@@ -41,6 +68,16 @@ class TestConfigManager:
         assert os.path.exists(config_file)
         assert cm.get("ocr_dpi") == 300 # Check a default value
 
+    def test_clear_cache(self, temp_config):
+        """Tests that clearing the cache empties the workspace cache directory."""
+        cm = ConfigManager(config_path=temp_config)
+        cache_dir = cm.get_cache_dir("page_text")
+        os.makedirs(cache_dir)
+        with open(os.path.join(cache_dir, "entry"), "w") as f:
+            f.write("text")
+        cm.clear_cache()
+        assert os.listdir(os.path.dirname(cache_dir)) == []
+
 
 class TestTemplateManager:
     def test_load_templates(self, tmp_path):
@@ -62,5 +99,1104 @@ class TestTemplateManager:
         assert len(loaded_templates) == 1
         assert loaded_templates[0]["name"] == "Test Template"
 
+    def test_apply_text_parser_uses_compiled_plan(self, tmp_path):
+        """Tests group selection, missing matches and pre-validated regex errors."""
+        mock_config = MagicMock()
+        mock_config.get.return_value = str(tmp_path)
+        (tmp_path / "templates").mkdir()
+
+        tm = TemplateManager(mock_config)
+        tm.add_template({"name": "Invoice", "type": "text_parser", "fields": [
+            {"column_name": "Number", "regex": r"invoice\s*#\s*(\w+)"},
+            {"column_name": "Total", "regex": r"Total:\s*[\d.]+"},
+            {"column_name": "Date", "regex": r"Date:\s*(\S+)"},
+            {"column_name": "Broken", "regex": r"Amount ("},
+        ]})
+
+        plan = tm.get_parse_plan("Invoice")
+        assert plan.fields[0].group == 1 and plan.fields[1].group == 0
+        assert plan.fields[3].pattern is None
+
+        results = tm.apply_text_parser("Invoice", "INVOICE # A123\nTotal: 42.50")
+        assert results == {"Number": "A123", "Total": "Total: 42.50",
+                           "Date": "[Not Found]", "Broken": "[Regex Error]"}
+
+    def test_gstr7a_table_fields(self, tmp_path):
+        """Tests that GSTR-7A table columns come from the tax table row."""
+        mock_config = MagicMock()
+        mock_config.get.return_value = str(tmp_path)
+        (tmp_path / "templates").mkdir()
+
+        tm = TemplateManager(mock_config)
+        tm.add_template({"name": "GSTR-7A", "type": "text_parser", "fields": [
+            {"column_name": "GSTIN", "regex": r"GSTIN\s*(\S+)"},
+            {"column_name": "Value on which Tax deducted", "regex": ""},
+            {"column_name": "Amount of Tax Deducted at Source-State/UT Tax", "regex": ""},
+        ]})
+        text = ("GSTIN 27ABCDE1234F1Z5\n"
+                "Value on which Tax deducted (₹) Amount of Tax Deducted at Source (₹)\n"
+                "Integrated Tax Central Tax State/UT Tax\n"
+                "1,000.00 0.00 10.00 10.00\n")
+        results = tm.apply_text_parser("GSTR-7A", text)
+        assert results == {"GSTIN": "27ABCDE1234F1Z5", "Value on which Tax deducted": "1,000.00",
+                           "Amount of Tax Deducted at Source-State/UT Tax": "10.00"}
+
+
+class TestLabelMatcher:
+    def test_literal_label(self):
+        """Tests extraction of the literal label a pattern is anchored on."""
+        flags = re.DOTALL | re.IGNORECASE
+        assert literal_label(re.compile(r"1\. GSTIN\s*(\S+)", flags)) == "1. GSTIN"
+        assert literal_label(re.compile(r"Financial Year\s*([\d-]+)", flags)) == "Financial Year"
+        assert literal_label(re.compile(r"(?:ARN|Ref)\s*(\S+)", flags)) == ""
+        assert literal_label(re.compile(r"No\s*(\d+)", flags)) == ""
+        assert literal_label(re.compile(r"Totals?\s*(\S+)", flags)) == "Total"
+        assert literal_label(re.compile(r"Total\s*(\S+)|Amount (\S+)", flags)) == ""
+        assert literal_label(re.compile(r"Total [(|]\s*(\S+)", flags)) == "Total "
+        assert literal_label(re.compile(r"Total due (\S+)", flags | re.VERBOSE)) == ""
+
+    def test_search_all_matches_per_pattern_search(self):
+        """Tests that prefiltered matches are identical to re.search per pattern."""
+        flags = re.DOTALL | re.IGNORECASE
+        patterns = [re.compile(p, flags) for p in (
+            r"Financial Year\s*([\d-]+)",  # first label hit has no value
+            r"Month\s*(\w+)",
+            r"Month of return\s*(\w+)",   # label overlaps with 'Month'
+            r"1\. GSTIN\s*(\S+)",
+            r"Missing Label\s*(\S+)",
+            r"(?:ARN|Ref)\s*(\S+)",        # no literal label, searched directly
+            r"MONTH OF\s*(\w+)",            # same label text, different case
+            r"Stra\u00dfe\s*(\w+)",          # non-ASCII label
+        )] + [None]
+        pages = [
+            "FINANCIAL YEAR n/a\nfinancial year 2023-24\nMonth of return June\n1. gstin 27ABC\nRef X1",
+            "Financial Year 2023-24 \u017fome ₹ text Month May",  # long s equals 's' under IGNORECASE
+            "Month\u0130 İstanbul 1. GSTIN 29XYZ",               # dotted I equals 'i' under IGNORECASE
+            "STRASSE 1 STRAẞE 2 mONTH oF x",                     # 'SS' is not 'ß', 'ẞ' is
+            "FINANC\u0130AL YEAR 2024 1. G\u017fTIN 07K",              # exotic case variants inside labels
+        ]
+        matcher = LabelMatcher(patterns)
+        for text in pages:
+            expected = [p.search(text) if p is not None else None for p in patterns]
+            actual = matcher.search_all(text)
+            assert [m and (m.span(), m.groups()) for m in actual] == \
+                   [m and (m.span(), m.groups()) for m in expected]
+
+
+class TestDiskCache:
+    def test_put_get_and_lru_prune(self, tmp_path):
+        """Tests round trips and that the least recently used entries are evicted first."""
+        cache = DiskCache(str(tmp_path / "cache"), max_bytes=10000)
+        for i in range(3):
+            cache.put(f"key{i}", str(i) * 100)
+            path = cache._entry_path(f"key{i}")
+            os.utime(path, (1000 + i, 1000 + i))
+        assert cache.get("missing") is None
+        assert cache.get("key0") == "0" * 100  # Refreshes key0's mtime
+
+        cache.max_bytes = 250
+        cache.prune()
+        assert cache.get("key1") is None
+        assert cache.get("key0") == "0" * 100
+        assert cache.get("key2") == "2" * 100
+
+
+class TestOcrResultCache:
+    def test_keys_hits_and_counters(self, tmp_path):
+        """Tests that keys depend on pixels and settings and that hits are counted."""
+        crop = MagicMock(mode="L", size=(2, 1))
+        crop.tobytes.return_value = b"\x00\xff"
+        settings = ("tesseract", "eng", "3", "3", "")
+        key = OcrResultCache.make_key(crop, settings)
+        assert key != OcrResultCache.make_key(crop, settings[:-1] + ("0123456789",))
+
+        cache = OcrResultCache(str(tmp_path / "ocr"), max_bytes=10000, memory_items=1)
+        assert cache.get(key) is None
+        cache.put(key, "INV-42")
+        cache.put("other", "text")  # Pushes key out of the in-memory LRU
+        assert cache.get(key) == "INV-42"
+        assert cache.get(key) == "INV-42"
+        assert cache.take_stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 1}
+        assert cache.take_stats() == {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+class TestSizedLRUCache:
+    def test_byte_budget_and_lru_eviction(self):
+        """Tests that entries are evicted least-recently-used first once the byte budget is exceeded."""
+        cache = SizedLRUCache(max_bytes=100)
+        cache.put("p1", "page 1", 40)
+        cache.put("p2", "page 2", 40)
+        assert cache.get("p1") == "page 1"  # p2 is now least recently used
+        cache.put("p3", "page 3", 40)
+        assert "p2" not in cache and "p1" in cache and "p3" in cache
+        assert cache.total_bytes == 80
+
+        cache.put("huge", "too big", 500)  # Larger than the whole budget
+        assert "huge" not in cache and len(cache) == 2
+
+        cache.set_max_bytes(50)
+        assert len(cache) == 1 and cache.get("p3") == "page 3"
+        assert cache.get("missing") is None
+
+
+    def test_file_digest_memo_is_bounded(self, tmp_path, monkeypatch):
+        """Tests that memoized file digests are evicted once the entry limit is reached."""
+        import hashlib
+        from core import file_hash
+        monkeypatch.setattr(file_hash, '_digest_memo', SizedLRUCache(2))
+        paths = []
+        for i in range(3):
+            (tmp_path / f"{i}.pdf").write_bytes(b"page %d" % i)
+            paths.append(str(tmp_path / f"{i}.pdf"))
+        digests = [file_hash.file_sha256(path) for path in paths]
+        assert digests == [hashlib.sha256(b"page %d" % i).hexdigest() for i in range(3)]
+        assert len(file_hash._digest_memo) == 2
+
+class TestThumbnailCache:
+    def test_thumbnails_are_reused_by_content(self, tmp_path):
+        """Tests that thumbnails fit the requested size and are found again for a re-extracted copy."""
+        Image = pytest.importorskip("PIL.Image")
+        fitz = pytest.importorskip("fitz")
+        image_path = tmp_path / "scan.png"
+        Image.new("RGB", (400, 200), "white").save(image_path)
+        pdf_path = tmp_path / "doc.pdf"
+        doc = fitz.open()
+        doc.new_page(width=300, height=600).insert_text((72, 72), "Invoice")
+        doc.save(str(pdf_path))
+        doc.close()
+
+        cache = ThumbnailCache(str(tmp_path / "cache"), 10_000_000, size=64)
+        assert cache.get(str(image_path)) is None
+        for path, expected_size in ((image_path, (64, 32)), (pdf_path, (32, 64))):
+            data = cache.get_or_create(str(path))
+            with Image.open(io.BytesIO(data)) as thumbnail:
+                assert thumbnail.size == expected_size
+
+        # A session reload writes the same content to a new file with a new mtime
+        copy_path = tmp_path / "reloaded.png"
+        copy_path.write_bytes(image_path.read_bytes())
+        assert cache.get(str(copy_path)) == cache.get(str(image_path))
+
+
+class TestResultStore:
+    def test_append_sort_and_merge(self):
+        """Tests columnar appends, numeric/text sorting and merging new rows into an active sort."""
+        store = ResultStore(["File", "Page", "Total"])
+        store.append_rows([
+            {'File': 'b.pdf', 'Page': 10, 'Total': '5'},
+            {'File': 'a.pdf', 'Page': 2, 'Total': '', 'Ignored': 'x'},
+            {'File': 'c.pdf', 'Page': 1, 'Total': '7.5'},
+        ])
+        assert len(store) == 3
+        assert store.row_values(1) == ['a.pdf', '2', '']
+
+        store.sort(1)  # Numeric, not "10" < "2"
+        assert [store.value(r, 1) for r in range(3)] == ['1', '2', '10']
+        store.sort(2, descending=True)
+        assert [store.value(r, 2) for r in range(3)] == ['7.5', '5', '']  # Empty cells last either way
+
+        store.sort(0)
+        assert store.append_rows([{'File': 'a.pdf', 'Page': 3}, {'File': 'bb.pdf', 'Page': 4}]) is False
+        assert [store.value(r, 0) for r in range(5)] == ['a.pdf', 'a.pdf', 'b.pdf', 'bb.pdf', 'c.pdf']
+        assert [store.value(r, 1) for r in range(2)] == ['2', '3']  # Stable: earlier rows first
+
+        store.sort(-1)
+        assert [row['Page'] for row in store.iter_rows()] == ['10', '2', '1', '3', '4']
+        store.set_columns(["File", "Notes"])
+        assert store.row_values(0) == ['b.pdf', '']
+
+    def test_descending_sort_is_stable_and_numeric(self):
+        """Tests ties in descending sorts, amounts with thousands separators and merged appends."""
+        store = ResultStore(["File", "Total"])
+        store.append_rows([{'File': f"{name}.pdf", 'Total': total} for name, total in
+                           [('a', '1,234.00'), ('b', '99.50'), ('c', ''), ('d', '1,234.00'), ('e', '250')]])
+        store.sort(1, descending=True)
+        assert [store.value(r, 0) for r in range(5)] == ['a.pdf', 'd.pdf', 'e.pdf', 'b.pdf', 'c.pdf']
+
+        # Merged rows go after equal keys, empty cells stay last
+        assert store.append_rows([{'File': 'f.pdf', 'Total': '1234'}, {'File': 'g.pdf'},
+                                  {'File': 'h.pdf', 'Total': '12,000'}]) is False
+        assert [store.value(r, 0) for r in range(8)] == [
+            'h.pdf', 'a.pdf', 'd.pdf', 'f.pdf', 'e.pdf', 'b.pdf', 'c.pdf', 'g.pdf']
+        assert store.view_rows([0, 7, 6]) == [1, 0, 7]
+
+        store.sort(0, descending=True)
+        assert store.value(0, 0) == 'h.pdf'
+        store.sort(1)
+        assert [store.value(r, 0) for r in range(8)] == [
+            'b.pdf', 'e.pdf', 'a.pdf', 'd.pdf', 'f.pdf', 'h.pdf', 'c.pdf', 'g.pdf']
+        # A text value turns the column into a text sort
+        store.append_rows([{'File': 'i.pdf', 'Total': 'n/a'}])
+        assert [store.value(r, 1) for r in range(9)][-3:] == ['n/a', '', '']
+
+
+class TestTesseractApiPool:
+    def test_engines_are_reused_per_settings_key(self):
+        """Tests that engines are created once per (lang, oem, psm, whitelist) and reused."""
+        pool = TesseractApiPool(max_per_key=1)
+        created = []
+
+        def fake_create(key):
+            api = MagicMock()
+            api.GetUTF8Text.return_value = f"text for {key}"
+            created.append(key)
+            return api
+        pool._create_api = fake_create
+
+        image = MagicMock(mode="L", size=(10, 5), spec=["mode", "size"])
+        for _ in range(3):
+            assert pool.image_to_string(image, "eng", 3, 7) == "text for ('eng', '3', '7', '')"
+        pool.image_to_string(image, "eng", 3, 7, "0123456789")
+        assert created == [("eng", "3", "7", ""), ("eng", "3", "7", "0123456789")]
+
+    def test_close_ends_idle_and_checked_out_engines(self):
+        """Tests checkout, return and close with fake engines."""
+        pool = TesseractApiPool(max_per_key=2)
+        engines = []
+        pool._create_api = lambda key: engines.append(MagicMock()) or engines[-1]
+
+        with pool.acquire("eng", 3, 7) as first:
+            with pool.acquire("eng", 3, 7) as second:
+                assert first is not second and len(engines) == 2
+        with pool.acquire("eng", 3, 7) as again:
+            assert again in (first, second) and len(engines) == 2  # Returned engines are reused
+
+        with pool.acquire("eng", 3, 7) as held:
+            pool.close()
+            idle = first if held is second else second
+            idle.End.assert_called_once_with()
+            held.End.assert_not_called()
+        held.End.assert_called_once_with()  # Ended on return instead of going back to the pool
+
+        with pool.acquire("eng", 3, 7) as fresh:
+            assert fresh not in (first, second)
+        pool.close()
+        fresh.End.assert_called_once_with()
+
+
+class TestResultBatcher:
+    def test_flushes_by_count_and_time(self):
+        """Tests that rows are flushed in batches by size or by age, and that the throttle limits updates."""
+        now = [0.0]
+        batches = []
+        batcher = ResultBatcher(batches.append, max_rows=3, max_interval_ms=100, clock=lambda: now[0])
+
+        for i in range(4):
+            batcher.add({'Page': i})
+        assert batches == [[{'Page': 0}, {'Page': 1}, {'Page': 2}]]
+        assert len(batcher) == 1
+
+        now[0] = 0.15  # The buffered row is now older than the interval
+        batcher.add({'Page': 4})
+        assert batches[-1] == [{'Page': 3}, {'Page': 4}]
+        batcher.flush()
+        assert len(batches) == 2
+
+        throttle = Throttle(100, clock=lambda: now[0])
+        assert throttle.ready() and not throttle.ready()
+        now[0] = 0.3
+        assert throttle.ready()
+
+    def test_rows_of_a_task_arrive_within_the_interval(self):
+        """Tests that a task's rows are not held back until the next task adds rows."""
+        now = [0.0]
+        delivered = {}  # (task, page) -> time delivered
+        batcher = ResultBatcher(lambda rows: delivered.update({(r['Task'], r['Page']): now[0] for r in rows}),
+                                max_rows=200, max_interval_ms=100, clock=lambda: now[0])
+
+        def run_task(task, seconds):
+            # Like OcrProcessor.run: a task's rows are added together when it ends
+            now[0] += seconds
+            batcher.extend([{'Task': task, 'Page': page} for page in range(2)])
+            return now[0]
+
+        # Tasks slower than the interval: every row goes out as its task ends
+        for task in range(3):
+            ended = run_task(task, 0.15)
+            assert delivered[(task, 0)] == delivered[(task, 1)] == ended
+
+        # Faster tasks: rows are collected, but for no longer than the interval
+        ended = {task: run_task(task, 0.04) for task in range(3, 9)}
+        batcher.flush()
+        for (task, page), when in delivered.items():
+            if task in ended:
+                assert when - ended[task] <= 0.1
+        assert len(delivered) == 18 and len(set(delivered.values())) < 9
+
+
+class TestExporter:
+    def test_result_columns(self):
+        visual = [{'name': 'Total', 'type': 'visual'}, {'name': 'Date', 'type': 'visual'}]
+        parser = {'name': 'P', 'type': 'text_parser', 'fields': [{'column_name': 'No', 'regex': 'x'}]}
+        assert result_columns(visual) == ['File', 'Page', 'Total', 'Date']
+        assert result_columns(visual + [parser]) == ['File', 'Page', 'No']
+
+    def test_csv_streams_batches(self, tmp_path):
+        """Tests that CSV rows are on disk after each batch, before the writer is closed."""
+        path = str(tmp_path / "out.csv")
+        writer = open_result_writer(path, ['File', 'Page', 'No'])
+        writer.write_rows([{'File': 'a.pdf', 'Page': 1, 'No': '7'}, {'File': 'b,c.pdf', 'Page': 2}])
+        with open(path, encoding='utf-8-sig') as f:
+            assert f.read().splitlines() == ['File,Page,No', 'a.pdf,1,7', '"b,c.pdf",2,']
+        writer.close()
+        with pytest.raises(ValueError):
+            open_result_writer(str(tmp_path / "out.txt"), ['File'])
+
+    def test_excel_splits_full_sheets(self, tmp_path, monkeypatch):
+        openpyxl = pytest.importorskip("openpyxl")
+        monkeypatch.setattr(exporter, 'EXCEL_MAX_ROWS', 3)
+        path = str(tmp_path / "out.xlsx")
+        rows = ({'File': f'{i}.pdf', 'Page': i} for i in range(5))
+        assert export_rows(path, ['File', 'Page'], rows, batch_size=2) == 5
+
+        workbook = openpyxl.load_workbook(path, read_only=True)
+        sheets = [list(ws.values) for ws in workbook.worksheets]
+        assert workbook.sheetnames == ['Results', 'Results 2', 'Results 3']
+        assert sheets[0] == [('File', 'Page'), ('0.pdf', 0), ('1.pdf', 1)]
+        assert sheets[2] == [('File', 'Page'), ('4.pdf', 4)]
+        workbook.close()
+
+
+    def test_columnar_exports(self, tmp_path):
+        """Tests Parquet and Arrow exports of display-string rows, with page numbers stored as integers."""
+        pa = pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+        rows = [{'File': 'a.pdf', 'Page': '2', 'No': '7'}, {'File': 'b.pdf', 'Page': 3}]
+        for name in ("out.parquet", "out.arrow"):
+            path = str(tmp_path / name)
+            assert export_rows(path, ['File', 'Page', 'No'], iter(rows)) == 2
+            table = pq.read_table(path) if name.endswith('.parquet') else pa.ipc.open_file(path).read_all()
+            assert table.schema.field('Page').type == pa.int64()
+            assert table.to_pylist() == [{'File': 'a.pdf', 'Page': 2, 'No': '7'}, {'File': 'b.pdf', 'Page': 3, 'No': None}]
+
+
+class TestSessionManager:
+    def test_results_round_trip_as_arrow(self, temp_config, tmp_path):
+        """Tests that results are saved as an Arrow member and read back lazily."""
+        pytest.importorskip("pyarrow")
+        cm = ConfigManager(config_path=temp_config)
+        sm = SessionManager(cm)
+        doc = tmp_path / "a.pdf"
+        doc.write_bytes(b"%PDF-1.4 test")
+        rows = [{'File': 'a.pdf', 'Page': i, 'Total': str(i * 2)} for i in range(1, 6)]
+        rows[2] = {'File': 'a.pdf', 'Page': 3}
+        session = str(tmp_path / "s.ocrtool_session")
+        assert sm.save_session(session, [str(doc)], [], iter(rows), {'zoom': 1})
+
+        with zipfile.ZipFile(session) as zf:
+            metadata = json.loads(zf.read('session_data.json'))
+            assert 'results/000000.arrow' in zf.namelist()
+        assert metadata['version'] == '3.2-qt' and 'ocr_results' not in metadata
+
+        loaded = sm.load_session(session)
+        assert len(loaded['ocr_results']) == 5
+        assert loaded['ocr_results'][2] == {'File': 'a.pdf', 'Page': 3}
+        assert loaded['ocr_results'][-1] == rows[-1]
+        assert list(loaded['ocr_results']) == rows
+        assert [os.path.basename(p) for p in loaded['image_paths']] == ['a.pdf']
+
+    def test_arrow_rows_slice_across_batches(self, tmp_path, monkeypatch):
+        """Tests that slices spanning several record batches and files match the rows written."""
+        pytest.importorskip("pyarrow")
+        from core import arrow_results
+        monkeypatch.setattr(arrow_results, 'RECORD_BATCH_ROWS', 4)
+        rows = [{'File': f'{i}.pdf', 'Page': i} for i in range(10)]
+        paths = [str(tmp_path / "a.arrow"), str(tmp_path / "b.arrow")]
+        arrow_results.write_results_ipc(paths[0], rows[:6])
+        arrow_results.write_results_ipc(paths[1], rows[6:])
+        table = arrow_results.ArrowResultRows(paths)
+        try:
+            assert table[2:9] == rows[2:9] and table[-3:] == rows[-3:] and table[::3] == rows[::3]
+            assert table[5:5] == [] and table[8:2] == []
+            assert [table[i] for i in (5, 4, 9, 0)] == [rows[i] for i in (5, 4, 9, 0)]
+        finally:
+            table.close()
+
+    def test_incremental_saves_append_only_changes(self, temp_config, tmp_path):
+        """Tests that re-saving appends blobs, rows and deltas, and that compaction keeps the state."""
+        pytest.importorskip("pyarrow")
+        sm = SessionManager(ConfigManager(config_path=temp_config))
+        doc_a, doc_b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+        doc_a.write_bytes(os.urandom(200000))
+        doc_b.write_bytes(b"%PDF-1.4 b")
+        session = str(tmp_path / "s.ocrtool_session")
+        rows = [{'File': 'a.pdf', 'Page': i} for i in range(1, 4)]
+        templates = [{'name': 'Total', 'type': 'visual', 'coords': (1, 2, 3, 4)}]
+        assert sm.save_session(session, [str(doc_a)], templates, rows, {})
+        size = os.path.getsize(session)
+
+        # Unchanged: nothing is appended
+        assert sm.save_session(session, [str(doc_a)], templates, rows, {})
+        assert os.path.getsize(session) == size
+
+        # New rows (as display strings) and a new document are appended; doc_a is not written again
+        rows = [{'File': 'a.pdf', 'Page': str(i)} for i in range(1, 4)] + [{'File': 'b.pdf', 'Page': '1'}]
+        assert sm.save_session(session, [str(doc_a), str(doc_b)], templates, rows, {'zoom': 2})
+        assert os.path.getsize(session) - size < 10000
+        with zipfile.ZipFile(session) as zf:
+            assert sorted(n for n in zf.namelist() if n.startswith(('results/', 'deltas/'))) == [
+                'deltas/000001.json', 'results/000000.arrow', 'results/000001.arrow']
+
+        # Replaced rows are written out again in full
+        assert sm.save_session(session, [str(doc_b)], templates, [{'File': 'b.pdf', 'Page': 9}], {'zoom': 2})
+        loaded = sm.load_session(session)
+        assert list(loaded['ocr_results']) == [{'File': 'b.pdf', 'Page': 9}]
+        assert loaded['ui_settings'] == {'zoom': 2} and loaded['templates'][0]['coords'] == [1, 2, 3, 4]
+        assert [os.path.basename(p) for p in loaded['image_paths']] == ['b.pdf']
+
+        size = os.path.getsize(session)
+        assert sm.compact_session(session)
+        assert os.path.getsize(session) < size - 150000  # doc_a's blob is gone
+        loaded = sm.load_session(session)
+        assert list(loaded['ocr_results']) == [{'File': 'b.pdf', 'Page': 9}]
+        with open(sm.ensure_document(loaded['image_paths'][0]), 'rb') as f:
+            assert f.read() == b"%PDF-1.4 b"
+
+    def test_resaving_loaded_session_writes_nothing(self, temp_config, tmp_path):
+        """Tests that saving the lazily loaded rows of a session unchanged keeps every member."""
+        pytest.importorskip("pyarrow")
+        sm = SessionManager(ConfigManager(config_path=temp_config))
+        session = str(tmp_path / "s.ocrtool_session")
+        rows = [{'File': 'a.pdf', 'Page': i, 'Total': str(i)} for i in range(1, 301)]
+        assert sm.save_session(session, [], [], rows[:200], {})
+        assert sm.save_session(session, [], [], rows, {})
+        with zipfile.ZipFile(session) as zf:
+            saved = SessionArchive.read_state(zf)['results']
+        size = os.path.getsize(session)
+
+        loaded = sm.load_session(session)['ocr_results']
+        assert isinstance(loaded, ArrowResultRows) and saved['member_rows'] == [200, 100]
+        assert sm.save_session(session, [], [], loaded, {})
+        assert os.path.getsize(session) == size
+        with zipfile.ZipFile(session) as zf:
+            assert SessionArchive.read_state(zf)['results'] == saved
+
+    def test_edited_middle_row_is_saved(self, temp_config, tmp_path):
+        """Tests that an edit to a row between the first and last saved rows survives a re-save."""
+        pytest.importorskip("pyarrow")
+        sm = SessionManager(ConfigManager(config_path=temp_config))
+        session = str(tmp_path / "s.ocrtool_session")
+        rows = [{'File': 'a.pdf', 'Page': i, 'Total': str(i * 10)} for i in range(1, 4)]
+        assert sm.save_session(session, [], [], rows, {})
+        rows = rows + [{'File': 'b.pdf', 'Page': 1, 'Total': '7'}]
+        assert sm.save_session(session, [], [], rows, {})
+
+        loaded = list(sm.load_session(session)['ocr_results'])
+        loaded[1] = dict(loaded[1], Total='25.50')
+        assert sm.save_session(session, [], [], loaded, {})
+        assert list(sm.load_session(session)['ocr_results']) == loaded
+        assert sm.load_session(session)['ocr_results'][1]['Total'] == '25.50'
+
+        # An edit in the last member keeps the members before it
+        loaded.append({'File': 'c.pdf', 'Page': 1})
+        assert sm.save_session(session, [], [], loaded, {})
+        with zipfile.ZipFile(session) as zf:
+            first_member = SessionArchive.read_state(zf)['results']['members'][0]
+        loaded[4] = {'File': 'c.pdf', 'Page': 1, 'Total': '3'}
+        assert sm.save_session(session, [], [], loaded, {})
+        with zipfile.ZipFile(session) as zf:
+            results = SessionArchive.read_state(zf)['results']
+        assert results['members'][0] == first_member and results['member_rows'] == [4, 1]
+        assert list(sm.load_session(session)['ocr_results']) == loaded
+
+    def test_documents_are_extracted_lazily(self, temp_config, tmp_path):
+        """Tests that loading defers document extraction and that saving keeps unextracted documents."""
+        pytest.importorskip("pyarrow")
+        sm = SessionManager(ConfigManager(config_path=temp_config))
+        docs = []
+        for name in ("a.pdf", "b.png"):
+            (tmp_path / name).write_bytes(name.encode() * 1000)
+            docs.append(str(tmp_path / name))
+        session = str(tmp_path / "s.ocrtool_session")
+        assert sm.save_session(session, docs, [], [{'File': 'a.pdf', 'Page': 1}], {})
+
+        loaded = sm.load_session(session)
+        a_path, b_path = loaded['image_paths']
+        assert not os.path.exists(a_path) and loaded['documents'].pending() == [a_path, b_path]
+        assert sm.ensure_document(b_path) == b_path
+        with open(b_path, 'rb') as f:
+            assert f.read() == b"b.png" * 1000
+        assert loaded['documents'].pending() == [a_path]
+
+        # An autosave before a.pdf is extracted keeps referring to its blob
+        rows = [{'File': 'a.pdf', 'Page': 1}, {'File': 'a.pdf', 'Page': 2}]
+        assert sm.save_session(session, loaded['image_paths'], [], rows, {})
+        assert not os.path.exists(a_path)
+        loaded = sm.load_session(session, lazy=False)
+        assert loaded['documents'].pending() == []
+        with open(loaded['image_paths'][0], 'rb') as f:
+            assert f.read() == b"a.pdf" * 1000
+
+    def test_extracted_documents_do_not_overwrite_imports(self, temp_config, tmp_path):
+        pytest.importorskip("pyarrow")
+        sm = SessionManager(ConfigManager(config_path=temp_config))
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        docs = [tmp_path / "a" / "scan.pdf", tmp_path / "b" / "scan.pdf"]
+        docs[0].write_bytes(b"first" * 1000)
+        docs[1].write_bytes(b"second" * 1000)
+        session = str(tmp_path / "s.ocrtool_session")
+        assert sm.save_session(session, [str(path) for path in docs], [], [], {})
+
+        loaded = sm.load_session(session)
+        other = tmp_path / "scan.pdf"
+        other.write_bytes(b"imported later")
+        imported = sm.copy_file_to_imports(str(other))
+        first, second = [sm.ensure_document(path) for path in loaded['image_paths']]
+        assert len({first, second, imported}) == 3
+        assert os.path.basename(first) == os.path.basename(second) == "scan.pdf"
+        for path, content in ((first, b"first" * 1000), (second, b"second" * 1000), (imported, b"imported later")):
+            with open(path, 'rb') as f:
+                assert f.read() == content
+
+    def test_loads_json_results_of_old_sessions(self, temp_config, tmp_path):
+        cm = ConfigManager(config_path=temp_config)
+        session = str(tmp_path / "old.ocrtool_session")
+        rows = [{'File': 'a.pdf', 'Page': 1, 'Total': '5'}]
+        with zipfile.ZipFile(session, 'w') as zf:
+            zf.writestr('session_data.json', json.dumps({'version': '3.0-qt', 'image_basenames': [],
+                                                         'templates': [], 'ocr_results': rows, 'ui_settings': {}}))
+        assert SessionManager(cm).load_session(session)['ocr_results'] == rows
+
+
+class TestImportStore:
+    def test_deduplicates_content_and_keeps_same_named_files(self, tmp_path):
+        imports = tmp_path / "imports"
+        store = ImportStore(str(imports))
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        first, second, copy = tmp_path / "a" / "scan.pdf", tmp_path / "b" / "scan.pdf", tmp_path / "copy.pdf"
+        first.write_bytes(b"first" * 1000)
+        second.write_bytes(b"second" * 1000)
+        copy.write_bytes(b"first" * 1000)
+
+        path_a, stats_a = store.import_file(str(first))
+        assert path_a == str(imports / "scan.pdf") and stats_a['copied'] == 5000
+        # Same name, different content: imported next to it instead of overwriting it
+        path_b, _ = store.import_file(str(second))
+        assert os.path.basename(path_b) == "scan (2).pdf"
+        assert open(path_a, 'rb').read() == b"first" * 1000
+        # Same content and name again: nothing is copied
+        assert store.import_file(str(first)) == (path_a, {'bytes': 5000, 'copied': 0, 'method': 'deduplicated', 'deduplicated': True})
+        # Same content under another name shares the stored object
+        path_c, stats_c = store.import_file(str(copy))
+        assert stats_c['deduplicated'] and open(path_c, 'rb').read() == b"first" * 1000
+        assert len(os.listdir(imports / ".objects")) == 2
+        # Sources are copied, not linked, unless asked to
+        assert os.stat(first).st_nlink == 1
+
+
+class TestFileImporter:
+    def test_skips_files_that_are_not_documents(self, tmp_path):
+        pytest.importorskip("PyQt5.QtCore")
+        from core.file_importer import FileImporter
+        (tmp_path / "scan.pdf").write_bytes(b"%PDF-1.7 ...")
+        (tmp_path / "photo").write_bytes(b"\x89PNG\r\n\x1a\n...")
+        (tmp_path / "notes.txt").write_bytes(b"not a document")
+        importer = FileImporter(str(tmp_path / "imports"), max_workers=2)
+        imported = []
+        importer._emit_imported = imported.extend
+        importer.set_files_to_import([str(tmp_path / name) for name in ("scan.pdf", "notes.txt", "photo")])
+        importer.run()
+        assert [os.path.basename(path) for path in imported] == ["scan.pdf", "photo.png"]
+        assert (importer.import_stats['files'], importer.import_stats['skipped']) == (2, 1)
+
+
+class TestFolderScanner:
+    def test_scans_by_content_with_globs(self, tmp_path):
+        (tmp_path / "b" / "deep").mkdir(parents=True)
+        (tmp_path / "skip").mkdir()
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-1.7 ...")
+        (tmp_path / "notes.pdf").write_bytes(b"not a pdf")
+        (tmp_path / "scan").write_bytes(b"\x89PNG\r\n\x1a\n...")
+        (tmp_path / "b" / "c.jpg").write_bytes(b"\xff\xd8\xff\xe0...")
+        (tmp_path / "b" / "deep" / "d.tif").write_bytes(b"II*\x00...")
+        (tmp_path / "skip" / "e.pdf").write_bytes(b"%PDF-1.4")
+
+        def scan(**kwargs):
+            return sorted(os.path.relpath(p, tmp_path).replace(os.sep, '/') for p in iter_folder_files(str(tmp_path), **kwargs))
+
+        assert scan() == ['a.pdf', 'b/c.jpg', 'b/deep/d.tif', 'scan', 'skip/e.pdf']
+        assert scan(exclude=['skip', '*.jpg']) == ['a.pdf', 'b/deep/d.tif', 'scan']
+        assert scan(include=['*.pdf'], recursive=False) == ['a.pdf']
+        assert scan(include=['b/*']) == ['b/c.jpg']
+        assert scan(include=['b/**/*.tif']) == ['b/deep/d.tif']
+        assert scan(should_stop=lambda: True) == []
+
+        assert sniff_file_type(str(tmp_path / "notes.pdf")) is None
+        assert import_name(str(tmp_path / "scan")) == "scan.png"
+        assert import_name(str(tmp_path / "b" / "deep" / "d.tif")) == "d.tif"
+
+
+class TestPathIndex:
+    def test_rows_follow_adds_and_removals(self):
+        index = PathIndex(["a", "b", "c", "b"])
+        assert list(index) == ["a", "b", "c"] and len(index) == 3
+        assert index.extend(["c", "d", "e", "d"]) == ["d", "e"]
+        assert not index.add("a")
+        assert index.remove("b") == 1 and index.remove("b") == -1
+        assert [index.row(path) for path in ("a", "c", "d", "e", "b")] == [0, 1, 2, 3, -1]
+        assert index.remove_many(["a", "e", "zzz"]) == 2
+        assert index.paths() == ["c", "d"] and index.row("d") == 1 and index[1] == "d"
+        assert "a" not in index and "c" in index
+        index.clear()
+        assert len(index) == 0 and index.add("a") and index.row("a") == 0
+
+    def test_rows_stay_right_across_many_removals(self):
+        paths = [f"p{i}" for i in range(3000)]
+        index = PathIndex(paths)
+        assert index.remove_range(10, 12) == ["p10", "p11", "p12"]
+        del paths[10:13]
+        # Enough single removals to rebuild the row dict on the way
+        for path in paths[::2][:1500]:
+            assert index.remove(path) == paths.index(path)
+            paths.remove(path)
+        index.add("new")
+        paths.append("new")
+        assert index.paths() == paths
+        assert all(index.row(path) == row for row, path in enumerate(paths))
+
+
+class TestFolderWatcher:
+    def test_reports_files_once_they_settle(self, tmp_path):
+        now = [0.0]
+        (tmp_path / "old.pdf").write_bytes(b"%PDF-1.4 old")
+        watcher = FolderWatcher(str(tmp_path), settle_seconds=2.0, clock=lambda: now[0])
+        watcher.skip_existing()
+        scan = tmp_path / "scan.pdf"
+        scan.write_bytes(b"%PDF-1.7 part")
+        (tmp_path / "notes.txt").write_bytes(b"not a document")
+
+        assert watcher.poll() == []
+        now[0] = 1.0
+        scan.write_bytes(b"%PDF-1.7 part, and more")  # Still being written
+        assert watcher.poll() == []
+        now[0] = 2.5
+        assert watcher.poll() == []
+        now[0] = 3.5
+        assert watcher.poll() == [str(scan)]
+        now[0] = 10.0
+        assert watcher.poll() == []
+        # Replaced by a new version: reported again once it settles
+        scan.write_bytes(b"%PDF-1.7 second version")
+        assert watcher.poll() == []
+        now[0] = 12.0
+        assert watcher.poll() == [str(scan)]
+
+
+class TestWatchDaemon:
+    def test_processes_new_files_and_stops_running_batches(self, temp_config, tmp_path):
+        pytest.importorskip("PyQt5.QtCore")
+        fitz = pytest.importorskip("fitz")
+        import threading
+        import time
+        from core.watch_daemon import WatchDaemon
+        cm = ConfigManager(config_path=temp_config)
+        for key, value in (('ocr_cache_mb', 0), ('page_text_cache_mb', 0), ('max_workers', 1),
+                           ('watch_workers', 1), ('watch_poll_interval_ms', 20), ('watch_settle_ms', 0),
+                           ('watch_debounce_ms', 20), ('watch_max_wait_ms', 50)):
+            cm.set(key, value)
+        templates = MagicMock()
+        templates.get_templates.return_value = [{'name': 'Number', 'type': 'visual', 'coords': [560, 370, 800, 430]}]
+        inbox = tmp_path / "inbox"
+        inbox.mkdir()
+        daemon = WatchDaemon(cm, templates, str(inbox), export_format="csv")
+        runner = threading.Thread(target=daemon.run)
+        runner.start()
+        try:
+            doc = fitz.open()
+            page = doc.new_page(width=612, height=792)
+            page.insert_text((72, 100), "Invoice No: INV-4711", fontsize=12)
+            page.insert_text((72, 200), "Payment due within thirty days of receipt", fontsize=12)
+            doc.save(str(inbox / "invoice.pdf"))
+            doc.close()
+            deadline = time.monotonic() + 30
+            while daemon.stats['rows'] < 1 and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            daemon.stop()
+            runner.join(30)
+        assert not runner.is_alive()
+        assert (daemon.stats['files'], daemon.stats['rows'], daemon.stats['errors']) == (1, 1, 0)
+        with open(daemon.export_path, encoding='utf-8-sig') as f:
+            assert "INV-4711" in f.read()
+        # Stopping the daemon stops its workers' processors, not just the polling
+        assert all(processor.is_stopped for _, processor, _ in daemon._pipelines)
+
+
+    def test_shuts_pool_down_if_export_cannot_start(self, temp_config, tmp_path, monkeypatch):
+        """Tests that the shared process pool is not left running when the export file cannot be opened."""
+        pytest.importorskip("PyQt5.QtCore")
+        from core import watch_daemon
+        from core.ocr_processor import OcrProcessor
+        cm = ConfigManager(config_path=temp_config)
+        for key, value in (('ocr_cache_mb', 0), ('page_text_cache_mb', 0), ('max_workers', 2), ('watch_workers', 1)):
+            cm.set(key, value)
+        templates = MagicMock()
+        templates.get_templates.return_value = [{'name': 'Number', 'type': 'visual', 'coords': [0, 0, 10, 10]}]
+        executor = MagicMock()
+        monkeypatch.setattr(OcrProcessor, 'make_batch_executor', lambda self, workers: executor)
+        monkeypatch.setattr(watch_daemon, 'open_result_writer', MagicMock(side_effect=OSError("disk full")))
+        daemon = watch_daemon.WatchDaemon(cm, templates, str(tmp_path), export_format="csv")
+        with pytest.raises(OSError):
+            daemon.run()
+        executor.shutdown.assert_called_once_with(wait=True, cancel_futures=True)
+
+class TestZipPacking:
+    @pytest.mark.parametrize("raw_writes", [True, False])
+    def test_compression_per_member_and_raw_copy(self, tmp_path, monkeypatch, raw_writes):
+        """
+        Tests that members are stored or deflated by type and compressibility,
+        and copied without recompression; without raw writes, through the
+        public ZipFile.open() path.
+        """
+        if raw_writes and not zip_packing.RAW_WRITES:
+            pytest.skip("Raw ZIP writes are not supported on this Python version")
+        monkeypatch.setattr(zip_packing, "RAW_WRITES", raw_writes)
+        writes = []
+        monkeypatch.setattr(zip_packing, "write_raw_member",
+                            lambda *args, real=zip_packing.write_raw_member: writes.append(args[1]) or real(*args))
+        text = tmp_path / "text.pdf"
+        text.write_bytes(b"BT /F1 12 Tf (Invoice 4711) Tj ET\n" * 20000)
+        scan = tmp_path / "scan.pdf"
+        scan.write_bytes(os.urandom(300000))
+        image = tmp_path / "page.png"
+        image.write_bytes(b"\0" * 100000)  # Compressible, but stored by type
+        members = [(str(text), "docs/text.pdf"), (str(scan), "docs/scan.pdf"), (str(image), "docs/page.png")]
+
+        archive = str(tmp_path / "a.zip")
+        with zipfile.ZipFile(archive, 'w') as zf:
+            stats = pack_files(zf, members, workers=3)
+        assert (stats['files'], stats['stored'], stats['deflated']) == (3, 2, 1)
+        with zipfile.ZipFile(archive) as zf:
+            assert zf.testzip() is None
+            assert zf.getinfo("docs/text.pdf").compress_type == zipfile.ZIP_DEFLATED
+            assert zf.getinfo("docs/scan.pdf").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("docs/page.png").compress_type == zipfile.ZIP_STORED
+            assert zf.read("docs/text.pdf") == text.read_bytes()
+
+            copy = str(tmp_path / "b.zip")
+            with zipfile.ZipFile(copy, 'w') as target:
+                copy_member_raw(zf, zf.getinfo("docs/text.pdf"), target)
+                target.writestr("after.txt", "x")
+        with zipfile.ZipFile(copy) as zf:
+            assert zf.testzip() is None
+            assert zf.read("docs/text.pdf") == text.read_bytes()
+            assert zf.getinfo("docs/text.pdf").compress_type == zipfile.ZIP_DEFLATED
+        assert len(writes) == (4 if raw_writes else 0)
+
+    def test_file_changed_after_its_crc_is_not_packed(self, tmp_path, monkeypatch):
+        """Tests that a stored file rewritten (same size) between its CRC and its write raises instead of corrupting."""
+        if not zip_packing.RAW_WRITES:
+            pytest.skip("Raw ZIP writes are not supported on this Python version")
+        scan = tmp_path / "scan.pdf"
+        scan.write_bytes(os.urandom(100000))
+
+        def prepare_then_change(member, real=zip_packing._prepare_member, **kwargs):
+            result = real(member, **kwargs)
+            scan.write_bytes(os.urandom(100000))
+            return result
+        monkeypatch.setattr(zip_packing, "_prepare_member", prepare_then_change)
+        archive = str(tmp_path / "a.zip")
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr("before.txt", "x")
+            with pytest.raises(IOError, match="changed while it was being written"):
+                pack_files(zf, [(str(scan), "scan.pdf")], workers=1)
+        with zipfile.ZipFile(archive) as zf:
+            assert zf.namelist() == ["before.txt"] and zf.testzip() is None
+
+    def test_central_directory_offset(self, tmp_path):
+        archive = str(tmp_path / "a.zip")
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr("a.txt", "x" * 1000)
+            zf.writestr("b.txt", "y")
+            zf.comment = b"A comment after the end record"
+        with zipfile.ZipFile(archive) as zf:
+            last = zf.infolist()[-1]
+            expected = last.header_offset + 30 + len(last.filename) + last.compress_size
+        with open(archive, 'rb') as f:
+            assert zip_packing.central_directory_offset(f) == expected
+
+
+class TestWordGrid:
+    def test_words_from_tesseract_data_and_box_queries(self):
+        """Tests that layout rows are dropped and words are found by centre in reading order."""
+        data = {
+            'text': ['', 'Total', 'Amount', '1,250.00', 'Footer'],
+            'conf': ['-1', '96', '91', '88', '70'],
+            'left': [0, 100, 170, 300, 100],
+            'top': [0, 200, 200, 205, 900],
+            'width': [800, 60, 80, 90, 70],
+            'height': [1000, 20, 20, 20, 20],
+        }
+        words = words_from_tesseract_data(data)
+        assert [w.text for w in words] == ['Total', 'Amount', '1,250.00', 'Footer']
+
+        grid = WordGrid(words, cell_size=32)
+        assert grid.text_in(95, 190, 400, 230) == "Total Amount 1,250.00"
+        assert grid.text_in(290, 190, 400, 230) == "1,250.00"
+        assert grid.text_in(0, 0, 50, 50) == ""
+
+
+class TestTextLayer:
+    def test_text_layer_words_are_clipped_to_snip_boxes(self):
+        """Tests that native words are scaled to OCR pixels and found inside snip boxes."""
+        fitz = pytest.importorskip("fitz")
+        doc = fitz.open()
+        page = doc.new_page(width=600, height=800)
+        page.insert_text((72, 100), "Invoice No: 4711", fontsize=12)
+        page.insert_text((72, 700), "Total 1,250.00", fontsize=12)
+        layer = read_text_layer(page)
+        doc.close()
+
+        assert [word[4] for word in layer['words']] == ["Invoice", "No:", "4711", "Total", "1,250.00"]
+        assert count_text_chars("Invoice No:\n 4711") == 14
+        assert is_native_text(14, 10) and not is_native_text(0, 0)
+
+        words, shape = text_layer_words(layer, dpi=144)
+        assert shape == (1600, 1200)
+        grid = WordGrid(words)
+        assert grid.text_in(130, 170, 400, 210) == "Invoice No: 4711"
+        assert grid.text_in(130, 1370, 400, 1410) == "Total 1,250.00"
+        assert grid.text_in(0, 0, 100, 100) == ""
+
+
+class TestPageRenderer:
+    """The viewer's tiling and prefetching; needs QtGui for QImage, but no widgets."""
+    @pytest.fixture
+    def pdf_path(self, tmp_path):
+        fitz = pytest.importorskip("fitz")
+        doc = fitz.open()
+        for page_num in range(1, 4):
+            doc.new_page(width=612, height=792).insert_text((72, 72), f"Page {page_num}")
+        path = str(tmp_path / "doc.pdf")
+        doc.save(path)
+        doc.close()
+        return path
+
+    def test_prefetch_order_and_visible_tiles(self):
+        pytest.importorskip("PyQt5.QtGui")
+        from app.widgets.page_renderer import pages_to_prefetch, visible_tiles, TILE_SIZE
+        assert pages_to_prefetch(3, 2, 4) == [3, 4, 2, 1]
+        assert pages_to_prefetch(1, 0, 4) == [1]
+        # 600x300 scene units at level 2 are 1200x600 pixels: 3x2 tiles, centre first
+        tiles = visible_tiles(0, 0, 600, 300, 2.0)
+        assert sorted(tiles) == [(x, y) for x in range(3) for y in range(2)]
+        assert tiles[0][0] == 1
+        # A view ending exactly on a tile edge does not reach into the next tile
+        assert visible_tiles(TILE_SIZE, 0, 2 * TILE_SIZE, TILE_SIZE, 1.0) == [(1, 0)]
+
+    def test_renders_only_the_tile_area(self, pdf_path):
+        pytest.importorskip("PyQt5.QtGui")
+        from app.widgets.page_renderer import PageRenderer
+        renderer = PageRenderer()
+        try:
+            # A 612x792 pt page at 72 dpi and level 2 is 1224x1584 pixels; the last tile is clipped
+            image, x, y = renderer.render_tile(pdf_path, 1, 72, 2.0, 2, 3)
+            assert (x, y) == (1024, 1536) and (image.width(), image.height()) == (200, 48)
+            assert renderer.render_tile(pdf_path, 1, 72, 2.0, 3, 0) is None
+            assert renderer.render_tile(pdf_path, 9, 72, 2.0, 0, 0) is None
+        finally:
+            renderer.close()
+
+    def test_prefetcher_renders_the_current_page_then_tiles_then_neighbours(self, pdf_path):
+        QtCore = pytest.importorskip("PyQt5.QtCore")
+        from app.widgets.page_renderer import PagePrefetcher
+        import threading
+        page_cache, tile_cache = SizedLRUCache(64 * 1024 * 1024), SizedLRUCache(64 * 1024 * 1024)
+        prefetcher = PagePrefetcher(page_cache, tile_cache)
+        rendered = []
+        done = threading.Event()
+
+        def on_rendered(key):
+            rendered.append(key)
+            if len(rendered) == 4:
+                done.set()
+        prefetcher.page_rendered.connect(lambda path, page, dpi, image: on_rendered(page), QtCore.Qt.DirectConnection)
+        prefetcher.tile_rendered.connect(lambda key, image, x, y: on_rendered(key[3:]), QtCore.Qt.DirectConnection)
+
+        prefetcher.request(pdf_path, [2, 3, 1], 72)
+        prefetcher.request_tiles([(pdf_path, 2, 72, 2.0, 0, 0)])
+        worker = threading.Thread(target=prefetcher.run)
+        worker.start()
+        try:
+            assert done.wait(30)
+        finally:
+            prefetcher.stop()
+            worker.join()
+        assert rendered == [2, (2.0, 0, 0), 3, 1]
+        assert len(page_cache) == 3 and (pdf_path, 2, 72, 2.0, 0, 0) in tile_cache
+
+
+class TestBatchEngine:
+    def test_parse_page_selection(self):
+        """Tests ranges, open-ended ranges and out-of-range pages."""
+        assert parse_page_selection(None, 3) == [1, 2, 3]
+        assert parse_page_selection("all", 2) == [1, 2]
+        assert parse_page_selection("1-2, 5, 8-", 9) == [1, 2, 5, 8, 9]
+        assert parse_page_selection("0, 4, x, 12", 5) == [4]
+        assert parse_page_selection([3, 1, 3], 5) == [1, 3]
+
+    def test_expand_work_units(self):
+        """Tests that files expand into (file, page) units in order."""
+        counts = {"/in/a.pdf": 3, "/in/b.png": 1}
+        units = expand_work_units(["/in/a.pdf", "/in/b.png"], {"a.pdf": "2-"}, counts.get)
+        assert units == [("/in/a.pdf", 2), ("/in/a.pdf", 3), ("/in/b.png", 1)]
+
+    def test_chunk_work_units(self):
+        """Tests that consecutive pages of a file are grouped into bounded tasks."""
+        units = [("a.pdf", 1), ("a.pdf", 2), ("a.pdf", 3), ("b.pdf", 1)]
+        assert chunk_work_units(units, 2) == [("a.pdf", (1, 2)), ("a.pdf", (3,)), ("b.pdf", (1,))]
+
+    def test_iter_ordered_results_keeps_order(self):
+        """Tests that results stream back in submission order."""
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        def work(n):
+            time.sleep(0.01 * (5 - n))
+            return n * n
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(iter_ordered_results(executor, work, range(1, 6), max_in_flight=3))
+        assert results == [(n, n * n) for n in range(1, 6)]
+
+    @pytest.mark.parametrize("finish_started", [False, True])
+    def test_stop_cancels_queued_units_and_can_finish_started_ones(self, finish_started):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        running, gate, stopped = threading.Event(), threading.Event(), []
+
+        def work(unit):
+            if unit == "b":
+                running.set()
+                gate.wait(10)
+            return unit.upper()
+
+        results = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            for unit, result in iter_ordered_results(executor, work, "abcd", max_in_flight=4,
+                                                     should_stop=lambda: bool(stopped), finish_started=finish_started):
+                results.append(result)
+                if unit == "a":
+                    assert running.wait(10)
+                    stopped.append(True)  # "b" is running, "c" and "d" are queued
+                    threading.Timer(0.05, gate.set).start()
+        assert results == (["A", "B"] if finish_started else ["A"])
+
+@pytest.fixture
+def ocr_processor(temp_config):
+    """An OcrProcessor (a QtCore QObject, no GUI) whose OCR engine must not be called unless mocked."""
+    pytest.importorskip("PyQt5.QtCore")
+    from core.ocr_processor import OcrProcessor
+    cm = ConfigManager(config_path=temp_config)
+    cm.set('ocr_cache_mb', 0)
+    cm.set('page_text_cache_mb', 0)
+    processor = OcrProcessor(cm, MagicMock())
+    processor.ocr_engine = "tesseract"
+    processor._perform_ocr_batch = MagicMock(side_effect=AssertionError("OCR engine called"))
+    return processor
+
+
+class TestOcrProcessor:
+    def test_snip_from_native_text_pdf(self, ocr_processor, tmp_path):
+        """Tests that snips on a PDF page with a text layer are filled without rasterising or OCR."""
+        fitz = pytest.importorskip("fitz")
+        pdf_path = str(tmp_path / "invoice.pdf")
+        doc = fitz.open()
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 100), "Invoice No: INV-4711", fontsize=12)
+        page.insert_text((72, 200), "Payment due within thirty days of receipt", fontsize=12)
+        doc.save(pdf_path)
+        doc.close()
+
+        # Coords are pixels of the page rendered at ocr_dpi (300): 72 pt = 300 px
+        ocr_processor.templates_to_use = [{'name': 'Number', 'type': 'visual', 'coords': [560, 370, 800, 430]}]
+        ocr_processor._load_page_gray = MagicMock(side_effect=AssertionError("page rasterised"))
+        outcomes = ocr_processor.process_pages(pdf_path, [1, 2])
+        assert outcomes == [({'File': 'invoice.pdf', 'Page': 1, 'Number': 'INV-4711'}, None), (None, None)]
+        assert ocr_processor._take_batch_stats() == {'native_text_pages': 1, 'ocr_pages': 0}
+
+    def test_missing_and_out_of_bounds_regions(self, ocr_processor, tmp_path):
+        """Tests that snips without coords or outside the page report "[No Region]"."""
+        cv2 = pytest.importorskip("cv2")
+        image_path = tmp_path / "scan.png"
+        cv2.imwrite(str(image_path), np.full((200, 300), 255, np.uint8))
+        ocr_processor.templates_to_use = [
+            {'name': 'Inside', 'type': 'visual', 'coords': [10, 10, 100, 50]},
+            {'name': 'No Coords', 'type': 'visual'},
+            {'name': 'Off Page', 'type': 'visual', 'coords': [400, 10, 500, 50]},
+        ]
+        ocr_processor._perform_ocr_batch = MagicMock(return_value=["text"])
+        [(row, error)] = ocr_processor.process_pages(str(image_path), [1])
+        assert error is None
+        assert row == {'File': 'scan.png', 'Page': 1, 'Inside': 'text',
+                       'No Coords': '[No Region]', 'Off Page': '[No Region]'}
+        [crops, _], _ = ocr_processor._perform_ocr_batch.call_args
+        assert [crop.shape for crop in crops] == [(50, 100)]  # Widened by the 5 px tolerance
+        assert ocr_processor.process_pages(str(image_path), [2]) == [(None, None)]
+
+    def test_run_closes_pooled_engines(self, ocr_processor):
+        """Tests that a run in this thread shuts its Tesseract engines down when it ends."""
+        ocr_processor.config_manager.set('max_workers', 1)
+        ocr_processor.tesseract_pool = MagicMock()
+        ocr_processor.files_to_process = []
+        ocr_processor.run()
+        ocr_processor.tesseract_pool.close.assert_called_once_with()
+
+    def test_run_reports_broken_pool(self, ocr_processor, tmp_path):
+        """Tests that a process pool failing mid-batch is reported and the run still finishes."""
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        cv2 = pytest.importorskip("cv2")
+        files = []
+        for name in ("a.png", "b.png"):
+            cv2.imwrite(str(tmp_path / name), np.full((20, 20), 255, np.uint8))
+            files.append(str(tmp_path / name))
+
+        def submit(fn, *args):
+            future = Future()
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+            return future
+        executor = MagicMock()
+        executor.submit.side_effect = submit
+        ocr_processor.share_executor(executor, 2)
+        ocr_processor.files_to_process = files
+        errors, finished = [], []
+        ocr_processor.error_occurred.connect(errors.append)
+        ocr_processor.processing_finished.connect(lambda: finished.append(True))
+        ocr_processor.run()
+        assert finished == [True]
+        assert len(errors) == 1 and "terminated abruptly" in errors[0]
+        executor.shutdown.assert_not_called()  # Shared pools belong to the caller
+
+    def test_subprocess_fallback_is_logged_once(self, monkeypatch):
+        pytest.importorskip("PyQt5.QtCore")
+        from core import ocr_processor as module
+        monkeypatch.setattr(module, 'TESSEROCR_AVAILABLE', False)
+        monkeypatch.setattr(module, '_subprocess_fallback_logged', False)
+        monkeypatch.setattr(module, 'log', MagicMock())
+        module._log_subprocess_fallback()
+        module._log_subprocess_fallback()
+        [(message,), _] = module.log.warning.call_args
+        assert module.log.warning.call_count == 1 and "tesserocr" in message
+
+    def test_anchor_patch_relocates_snip(self, ocr_processor, tmp_path):
+        """Tests that an anchor patch is found near its stored coords and the crop taken where it is."""
+        cv2 = pytest.importorskip("cv2")
+        page = np.random.RandomState(0).randint(0, 256, (400, 600)).astype(np.uint8)
+        image_path = tmp_path / "moved.png"
+        cv2.imwrite(str(image_path), page)
+        # The form moved 30 px right and 20 px down since the template was drawn
+        ocr_processor.templates_to_use = [{'name': 'Total', 'type': 'visual', 'coords': [170, 100, 250, 140],
+                                           'image_np_array': page[120:160, 200:280].tolist()}]
+        ocr_processor._perform_ocr_batch = MagicMock(return_value=["42.00"])
+        [(row, _)] = ocr_processor.process_pages(str(image_path), [1])
+        assert row['Total'] == "42.00"
+        [crops, snip_configs], _ = ocr_processor._perform_ocr_batch.call_args
+        assert np.array_equal(crops[0], page[115:165, 195:285])
+        assert snip_configs[0]['name'] == 'Total'
+
+
 # You could add more tests for SessionManager, regex parsing in TemplateManager, etc.
 # These tests should not depend on any GUI components.